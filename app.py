@@ -36,15 +36,18 @@
 # session: Server-side session storage for user data
 # redirect: Redirects user to different URL
 # url_for: Generates URLs for routes by function name
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+# Response / stream_with_context: Streams export files while the request context stays available
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, stream_with_context
 
 # Python import statement: Imports Flask-Login classes and functions for authentication
 # LoginManager: Manages user login sessions
-# login_user: Logs in a user and creates session
 # logout_user: Logs out current user and clears session
 # login_required: Decorator to protect routes requiring authentication
 # current_user: Proxy object representing logged-in user
-from flask_login import LoginManager, login_user, logout_user, login_required, current_user
+from flask_login import LoginManager, logout_user, login_required, current_user
+
+# Python import statement: Imports click for command line options of the flask CLI commands
+import click
 
 # Python import statement: Imports pyotp module for TOTP (Time-based One-Time Password) generation
 # Used for two-factor authentication with authenticator apps
@@ -59,10 +62,15 @@ import os
 # timedelta: Calculates time differences (e.g., code expiration times)
 from datetime import datetime, timedelta
 
+# Python import statement: Imports SQLAlchemy helpers used during database initialization
+# text: Raw SQL for the PostgreSQL advisory lock
+# IntegrityError: Raised when another process already inserted the sample data
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
 # Python import statements for WebAuthn and device fingerprinting
 import base64
 import json
-import hashlib
 import secrets
 from webauthn import generate_registration_options, verify_registration_response, generate_authentication_options, verify_authentication_response
 from webauthn.helpers.structs import PublicKeyCredentialDescriptor, AuthenticatorSelectionCriteria, UserVerificationRequirement, AuthenticatorAttachment, RegistrationCredential, AuthenticatorAttestationResponse, AuthenticationCredential, AuthenticatorAssertionResponse, PublicKeyCredentialType, ResidentKeyRequirement, AuthenticatorTransport
@@ -80,8 +88,7 @@ from config import Config
 # Course: Database model representing academic courses
 # Grade: Database model representing student grades
 # WebAuthnCredential: Database model for WebAuthn biometric credentials
-# DeviceFingerprint: Database model for device fingerprinting
-from models import db, User, EmailVerificationCode, Course, Grade, WebAuthnCredential, DeviceFingerprint
+from models import db, User, EmailVerificationCode, Course, Grade, WebAuthnCredential
 
 # Python import statement: Imports email service functions from email_service.py
 # generate_verification_code: Creates random 6-digit verification codes
@@ -97,7 +104,76 @@ from email_service import generate_verification_code, send_email_code
 # normalize_username: Converts username to lowercase for case-insensitive matching
 # get_est_time: Gets current time in EST timezone
 # get_utc_time: Gets current time in UTC timezone (timezone-agnostic, works for all users)
-from auth import log_login_attempt, role_required, admin_required, verify_user_role, get_user_role, normalize_username, get_est_time, get_utc_time
+# reap_expired_sessions: Bulk-deletes expired sessions (run by the maintenance scheduler)
+from auth import log_login_attempt, role_required, admin_required, verify_user_role, get_user_role, normalize_username, get_est_time, get_utc_time, reap_expired_sessions
+
+# Python import statement: Imports the write-behind buffer for session activity tracking
+# session_activity_buffer: Batches last_activity updates from the before_request hook
+from session_activity import session_activity_buffer
+
+# Python import statement: Imports the background maintenance scheduler
+# maintenance_scheduler: Runs periodic jobs such as the expired session reaper
+from maintenance import maintenance_scheduler
+
+# Python import statement: Imports the email outbox worker pool
+# email_outbox: Queues verification emails and delivers them in the background
+from email_outbox import email_outbox
+
+# Python import statement: Imports the per-worker user snapshot cache
+# user_cache: Serves current_user without a database query on every request
+from user_cache import user_cache
+
+# Python import statement: Imports the server-side WebAuthn challenge store
+# challenge_store: Keeps challenges on the server, the session only holds a handle
+from challenge_store import challenge_store
+
+# Python import statement: Imports the TOTP verification service used by User.verify_otp()
+# totp_service: Cached TOTP instances and replay protection for OTP codes
+from totp_service import totp_service
+
+# Python import statement: Imports the sliding-window rate limiter for login and code endpoints
+# rate_limiter: Rejects excess attempts per username and client IP before any login work is done
+from rate_limiter import rate_limiter
+
+# Python import statement: Imports the batched login attempt audit log
+# audit_log: Queue used by log_login_attempt() for failed attempts
+from audit_log import audit_log
+
+# Python import statement: Imports the login completion service
+# complete_login: Commits all writes of a successful login in one transaction and logs the user in
+from login_service import complete_login
+
+# Python import statement: Imports the device fingerprint helpers
+# create_device_fingerprint: Hashes the device characteristics
+# device_fingerprints: Records devices, skipping writes for recently seen ones
+from device_fingerprint import create_device_fingerprint, device_fingerprints
+
+# Python import statement: Imports the maintained admin dashboard totals
+# site_stats: User and successful login counts read by primary key instead of COUNT(*)
+from site_stats import site_stats
+
+# Python import statement: Imports the hourly login rollups
+# login_rollups: Login counts per hour, method and status, read by the login volume chart
+from login_rollups import login_rollups
+
+# Python import statement: Imports login attempt retention
+# login_retention: Moves attempts older than the retention window to the archive in small batches
+from retention import login_retention
+
+# Python import statement: Imports the startup column upgrade
+# upgrade_schema: Adds new model columns to the tables of an existing database
+from schema_upgrade import upgrade_schema
+
+# Python import statement: Imports the streaming CSV/JSON Lines exports
+from exports import EXPORT_DATASETS, EXPORT_FORMATS, export_rows, gzip_chunks
+
+# Python import statement: Imports query helpers from queries.py
+# grade_query: Grade query with student, course and professor loaded in one SELECT
+# course_query: Course query with professor loaded in one SELECT
+# login_attempt_page / grade_page: Keyset-paginated admin listings
+# parse_page_size: Reads and clamps the ?limit= page size parameter
+# active_sessions_with_devices: Admin dashboard session overview in a single query
+from queries import grade_query, course_query, login_attempt_page, grade_page, parse_page_size, active_sessions_with_devices
 
 
 # Python variable: Creates Flask application instance
@@ -166,6 +242,49 @@ RP_NAME = "CAMPUSKEY"
 # db.init_app() connects the database instance to this Flask application
 db.init_app(app)
 
+# Python method call: Initializes the session activity write-behind buffer
+# Reads flush settings from config and flushes pending updates on worker shutdown
+session_activity_buffer.init_app(app)
+
+# Python method call: Initializes the maintenance scheduler and registers periodic jobs
+# reap_expired_sessions() bulk-deletes expired sessions off the request path
+maintenance_scheduler.init_app(app)
+maintenance_scheduler.add_job('reap-expired-sessions', reap_expired_sessions, app.config['SESSION_REAPER_INTERVAL'])
+
+# Python method call: Initializes the email outbox worker pool and purges delivered messages periodically
+email_outbox.init_app(app)
+maintenance_scheduler.add_job('purge-email-outbox', email_outbox.purge_finished, app.config['EMAIL_OUTBOX_PURGE_INTERVAL'])
+
+# Python method call: Initializes the user snapshot cache used by load_user
+user_cache.init_app(app)
+
+# Python method call: Initializes the WebAuthn challenge store and purges expired challenges periodically
+challenge_store.init_app(app)
+maintenance_scheduler.add_job('purge-webauthn-challenges', challenge_store.purge_expired, app.config['WEBAUTHN_CHALLENGE_PURGE_INTERVAL'])
+
+# Python method call: Initializes the TOTP service with the configured drift window
+totp_service.init_app(app)
+
+# Python method call: Initializes the rate limiter and purges expired counters periodically
+rate_limiter.init_app(app)
+maintenance_scheduler.add_job('purge-rate-limits', rate_limiter.purge_expired, app.config['RATE_LIMIT_PURGE_INTERVAL'])
+
+# Python method call: Initializes the login attempt audit log queue and its shutdown flush
+audit_log.init_app(app)
+
+# Python method call: Initializes the device fingerprint service (recently seen cache settings)
+device_fingerprints.init_app(app)
+
+# Python method call: Initializes the dashboard totals and recounts them periodically to correct drift
+# single_worker=True: The recount locks the statistic rows, so only one gunicorn worker runs it
+site_stats.init_app(app)
+maintenance_scheduler.add_job('reconcile-site-stats', site_stats.reconcile, app.config['SITE_STATS_RECONCILE_INTERVAL'], single_worker=True)
+
+# Python method call: Initializes login attempt retention and archives old attempts periodically (if enabled)
+login_retention.init_app(app)
+if app.config['LOGIN_RETENTION_DAYS'] > 0:
+    maintenance_scheduler.add_job('archive-login-attempts', login_retention.run, app.config['LOGIN_RETENTION_INTERVAL'])
+
 # Python variable: Creates LoginManager instance for managing user sessions
 # LoginManager handles user authentication state and session management
 login_manager = LoginManager()
@@ -187,10 +306,10 @@ login_manager.login_view = 'login'
 # Python function definition: Function to load user object from user ID
 # Parameter: user_id (string) - user ID stored in session
 def load_user(user_id):
-    # Python return statement: Queries database for user and returns User object
-    # User.query.get() retrieves user by primary key (id)
-    # int(user_id) converts string ID from session to integer for database query
-    return User.query.get(int(user_id))
+    # Python return statement: Returns a cached snapshot of the user (id, username, role, email)
+    # user_cache.get() only queries the database on a cache miss or after the entry expires
+    # int(user_id) converts string ID from session to integer for the cache lookup
+    return user_cache.get(int(user_id))
 
 
 # Python decorator: Registers function as Flask context processor
@@ -299,9 +418,17 @@ def home():
     return redirect(url_for('login'))
 
 
+# Python function definition: Response for a login form submission rejected by the rate limiter
+# Renders the login page with an error instead of the JSON error used by the API endpoints
+def login_rate_limited(retry_after):
+    return render_template('login.html', error=f'Too many login attempts. Please try again in {retry_after} seconds.'), 429
+
+
 # Python decorator: Registers route handler for '/login' URL with GET and POST methods
 # methods=['GET', 'POST'] allows both displaying login form and processing form submission
 @app.route('/login', methods=['GET', 'POST'])
+# Python decorator: Limits login form submissions per username and client IP (GET is not limited)
+@rate_limiter.limit('login', on_limited=login_rate_limited)
 # Python function definition: Login page route handler
 def login():
     # Python conditional: Checks if request method is POST (form submission)
@@ -365,59 +492,21 @@ def login():
                 if verification.expires_at > current_time_naive:
                     # Python comment: Marks code usage marking section
                     # Mark code as used
-                    # Python attribute assignment: Marks verification code as used
-                    # Prevents code from being reused for security
-                    verification.used = True
-                    # Python method call: Saves code usage status to database
-                    db.session.commit()
+                    # Python method call: Conditional UPDATE - only one request can use the code
+                    # Prevents code from being reused for security (even by a concurrent request)
+                    # The change is committed by complete_login() together with the other login writes
+                    claimed = EmailVerificationCode.query.filter_by(
+                        id=verification.id,
+                        used=False
+                    ).update({'used': True}, synchronize_session=False)
+                    if not claimed:
+                        log_login_attempt(username, 'email', 'failed', user_id=user.id)
+                        return render_template('login.html', error='Invalid or expired verification code')
                     
-                    # Python function call: Logs in the user and creates session
-                    # login_user() creates Flask-Login session for the user
-                    login_user(user)
-                    # Python function call: Records successful login attempt in database
-                    # log_login_attempt() saves login event for security auditing
-                    log_login_attempt(username, 'email', 'success', user.id)
-                    # Python function call: Track active session for monitoring
-                    # track_session_activity() creates/updates active session record
-                    from auth import track_session_activity
-                    import hashlib
-                    # Generate a unique session ID from Flask session
-                    session_id = hashlib.sha256(str(session.get('_id', id(session))).encode()).hexdigest()[:32]
-                    track_session_activity(user.id, session_id)
-                    # Python dictionary assignment: Stores authentication method in session
-                    # session['auth_method'] stores how user logged in (email, otp, biometric, etc.)
-                    session['auth_method'] = 'email'
-                    # Python dictionary assignment: Stores login timestamp in session (UTC timezone)
-                    # get_utc_time().isoformat() creates ISO format timestamp string
-                    session['login_time'] = get_utc_time().isoformat()
-                    # Python dictionary assignment: Stores user role in session
-                    # session['user_role'] stores role for quick access without database query
-                    session['user_role'] = user.role  # Store role in session
-                    # Python function call: Store device fingerprint for security tracking
-                    # This tracks the device and IP address being used
-                    try:
-                        user_agent = request.headers.get('User-Agent', '')
-                        ip_address = request.remote_addr
-                        device_info = {}  # Will be collected by JavaScript if available
-                        fingerprint_hash = create_device_fingerprint(device_info, user_agent, ip_address)
-                        store_device_fingerprint(user.id, fingerprint_hash, device_info, user_agent, ip_address)
-                    except Exception as e:
-                        print(f"Device fingerprint error: {e}")
-                    
-                    # Python comment: Marks role-based redirect section
-                    # Redirect to role-specific dashboard
-                    # Python conditional: Checks if user is admin
-                    if user.role == 'admin':
-                        # Python return statement: Redirects to admin dashboard
-                        return redirect(url_for('admin_dashboard'))
-                    # Python elif clause: Checks if user is professor
-                    elif user.role == 'professor':
-                        # Python return statement: Redirects to professor dashboard
-                        return redirect(url_for('professor_dashboard'))
-                    # Python else clause: Default case (student)
-                    else:
-                        # Python return statement: Redirects to student dashboard
-                        return redirect(url_for('student_dashboard'))
+                    # Python function call: Logs in the user in one transaction
+                    # complete_login() records the login attempt, active session and device,
+                    # commits them with the used code and returns the role-specific dashboard URL
+                    return redirect(complete_login(user, 'email'))
                 else:
                     # Expired verification code
                     log_login_attempt(username, 'email', 'failed', user_id=user.id if user else None)
@@ -433,45 +522,10 @@ def login():
             # Python conditional: Checks if user exists and OTP code is valid
             # user.verify_otp() validates the TOTP code against user's secret
             if user and user.verify_otp(otp_code):
-                # Python function call: Logs in the user
-                login_user(user)
-                # Python function call: Records successful TOTP login
-                log_login_attempt(username, 'otp', 'success', user.id)
-                # Python function call: Track active session for monitoring
-                from auth import track_session_activity
-                import hashlib
-                session_id = hashlib.sha256(str(id(session)).encode()).hexdigest()[:32]
-                track_session_activity(user.id, session_id)
-                # Python dictionary assignment: Stores OTP auth method in session
-                session['auth_method'] = 'otp'
-                # Python dictionary assignment: Stores login timestamp (UTC timezone)
-                session['login_time'] = get_utc_time().isoformat()
-                # Python dictionary assignment: Stores user role
-                session['user_role'] = user.role  # Store role in session
-                # Python function call: Store device fingerprint for security tracking
-                try:
-                    user_agent = request.headers.get('User-Agent', '')
-                    ip_address = request.remote_addr
-                    device_info = {}
-                    fingerprint_hash = create_device_fingerprint(device_info, user_agent, ip_address)
-                    store_device_fingerprint(user.id, fingerprint_hash, device_info, user_agent, ip_address)
-                except Exception as e:
-                    print(f"Device fingerprint error: {e}")
-                
-                # Python comment: Marks role-based redirect section
-                # Redirect to role-specific dashboard
-                # Python conditional: Checks if user is admin
-                if user.role == 'admin':
-                    # Python return statement: Redirects to admin dashboard
-                    return redirect(url_for('admin_dashboard'))
-                # Python elif clause: Checks if user is professor
-                elif user.role == 'professor':
-                    # Python return statement: Redirects to professor dashboard
-                    return redirect(url_for('professor_dashboard'))
-                # Python else clause: Default case (student)
-                else:
-                    # Python return statement: Redirects to student dashboard
-                    return redirect(url_for('student_dashboard'))
+                # Python function call: Logs in the user in one transaction
+                # verify_otp() marked the code as used; complete_login() commits that change together
+                # with the login attempt, active session and device, and returns the dashboard URL
+                return redirect(complete_login(user, 'otp'))
             # Python else clause: Executes if TOTP verification failed
             else:
                 # Python function call: Records failed TOTP login attempt (wrong OTP code)
@@ -488,6 +542,8 @@ def login():
 # '/api/send-email-code' is the API endpoint URL
 # methods=['POST'] restricts route to POST requests only (API endpoint)
 @app.route('/api/send-email-code', methods=['POST'])
+# Python decorator: Limits verification emails requested per username and client IP
+@rate_limiter.limit('email-code')
 # Python function definition: API endpoint handler for sending email codes
 def send_email_code_route():
     # Python docstring: Documents what the endpoint does
@@ -556,8 +612,6 @@ def send_email_code_route():
     )
     # Python method call: Adds verification code to database session
     db.session.add(verification)
-    # Python method call: Saves verification code to database
-    db.session.commit()
     
     # Python comment: Marks email sending section
     # Check if SendGrid is configured first (works on Render free tier)
@@ -582,6 +636,8 @@ def send_email_code_route():
         print(f"   FROM_EMAIL: {os.environ.get('FROM_EMAIL', 'NOT SET')}")
         print(f"   Code for {username}: {code}")
         print(f"   TIP: Add EMAIL_SERVICE=sendgrid and SENDGRID_API_KEY to Render to enable emails!")
+        # Python method call: Saves verification code to database
+        db.session.commit()
         # Still return success but include code in message
         return jsonify({
             'success': True,
@@ -590,90 +646,61 @@ def send_email_code_route():
             'email_configured': False
         })
     
-    # Try to send email synchronously first (with timeout)
-    # This ensures we can report actual errors to the user
-    import signal
-    import threading
+    # Python comment: Marks email queueing section
+    # Queue the email in the durable outbox and return immediately
+    # The background worker pool delivers it (with retry and backoff);
+    # the UI polls /api/email-status/<message_id> for the delivery result
+    message = email_outbox.enqueue(email, code, username)
+    # Python method call: Saves verification code and outbox message in one transaction
+    db.session.commit()
+    # Python method call: Wakes up a worker to send the message
+    email_outbox.notify()
     
-    email_result = {'status': None, 'error': None, 'success': False}
+    # Python dictionary assignment: Remembers which outbox messages this browser may poll
+    session['email_outbox_ids'] = (session.get('email_outbox_ids', []) + [message.id])[-5:]
     
-    def send_email_with_timeout():
-        """Send email with timeout"""
-        try:
-            result = send_email_code(email, code, username)
-            if result:
-                print(f"[SUCCESS] Email sent successfully to {email}")
-                email_result['status'] = 'success'
-                email_result['success'] = True
-            else:
-                print(f"[WARNING] Email service returned False for {email}")
-                email_result['status'] = 'failed'
-                email_result['error'] = 'Email service returned False'
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            # Log detailed error for debugging in Render logs
-            print(f"[ERROR] ERROR SENDING EMAIL TO {email}:")
-            print(f"   Error: {str(e)}")
-            print(f"   Full traceback:")
-            print(error_details)
-            print(f"   SMTP_SERVER: {os.environ.get('SMTP_SERVER', 'NOT SET')}")
-            print(f"   SMTP_PORT: {os.environ.get('SMTP_PORT', 'NOT SET')}")
-            print(f"   SMTP_USERNAME: {os.environ.get('SMTP_USERNAME', 'NOT SET')}")
-            print(f"   SMTP_PASSWORD: {'SET' if os.environ.get('SMTP_PASSWORD') else 'NOT SET'}")
-            print(f"   FROM_EMAIL: {os.environ.get('FROM_EMAIL', 'NOT SET')}")
-            email_result['status'] = 'failed'
-            email_result['error'] = str(e)
-    
-    # Send email in thread with 15 second timeout
-    email_thread = threading.Thread(target=send_email_with_timeout, daemon=True)
-    email_thread.start()
-    email_thread.join(timeout=15)  # Wait up to 15 seconds
-    
-    # Check result
-    if email_result['status'] is None:
-        # Still sending - return success but note it's in progress
-        return jsonify({
-            'success': True,
-            'message': f'Verification code is being sent to {email}. Please check your inbox and spam folder. If not received within a minute, check Render logs.',
-            'warning': 'Email sending is taking longer than expected. Check Render logs if not received.'
-        })
-    elif email_result['success']:
-        # Success!
-        print(f"[SUCCESS] Email sent successfully to {email}")
-        return jsonify({
-            'success': True,
-            'message': f'Verification code sent successfully to {email}. Please check your inbox and spam folder.',
-            'email_configured': True,
-            'email_sent': True
-        })
-    else:
-        # Failed - return error with code so user can still login
-        error_msg = email_result['error'] or 'Unknown error'
-        print(f"[WARNING] Email failed but code is: {code} (for {username})")
-        print(f"   Error details: {error_msg}")
-        return jsonify({
-            'success': False,
-            'error': f'Failed to send email: {error_msg}. Your verification code is: {code}',
-            'code': code,  # Include code so user can still login
-            'message': f'Email sending failed. Your verification code is: {code}. Please use this code to login. Check Render logs for email errors.',
-            'email_configured': True,
-            'email_sent': False,
-            'email_error': error_msg
-        })
+    # Python return statement: Returns JSON success response with the status URL
+    return jsonify({
+        'success': True,
+        'message': f'Verification code is being sent to {email}. Please check your inbox and spam folder.',
+        'message_id': message.id,
+        'status_url': url_for('email_status', message_id=message.id),
+        'email_configured': True
+    })
 
 
-# WebAuthn and Device Fingerprinting API Routes
+# Python decorator: Registers API route for polling email delivery status
+@app.route('/api/email-status/<int:message_id>')
+# Python function definition: Email delivery status API endpoint handler
+def email_status(message_id):
+    # Python docstring: Documents what the endpoint does
+    """API endpoint to check delivery status of a queued verification email"""
+    # Python conditional: Only the browser that requested the code may poll it
+    if message_id not in session.get('email_outbox_ids', []):
+        return jsonify({'success': False, 'error': 'Message not found'}), 404
+    
+    # Python variable: Loads the outbox message
+    message = email_outbox.get_status(message_id)
+    if not message:
+        return jsonify({'success': False, 'error': 'Message not found'}), 404
+    
+    # Python variable: Builds status response
+    result = {
+        'success': True,
+        'status': message.status,
+        'attempts': message.attempts,
+        'email_sent': message.status == 'sent'
+    }
+    # Python conditional: Delivery gave up - include code so the user can still login
+    if message.status == 'failed':
+        print(f"[WARNING] Email failed but code is: {message.code} (for {message.username})")
+        result['error'] = f'Failed to send email: {message.last_error}'
+        result['code'] = message.code
+    # Python return statement: Returns JSON status response
+    return jsonify(result)
+
 
-# Helper function to create device fingerprint hash
-def create_device_fingerprint(device_info, user_agent, ip_address):
-    """Create a hash from device characteristics"""
-    fingerprint_string = json.dumps({
-        'device_info': device_info,
-        'user_agent': user_agent,
-        'ip': ip_address
-    }, sort_keys=True)
-    return hashlib.sha256(fingerprint_string.encode()).hexdigest()
+# WebAuthn and Device Fingerprinting API Routes
 
 # Helper function to safely decode base64 with padding handling
 def safe_b64decode(data):
@@ -699,6 +726,39 @@ def safe_b64decode(data):
         except:
             raise ValueError(f"Failed to decode base64: {e}")
 
+# Helper function to match a credential against legacy integer-format credential IDs
+def find_legacy_webauthn_credential(user_id, credential_raw_id):
+    """
+    Find a legacy credential whose credential_id was stored as an integer.
+    
+    Early registrations stored the first 8 bytes of the credential ID as a big-endian
+    integer. Such rows have no credential_id_raw, so they are compared in Python;
+    only the user's legacy rows are loaded.
+    
+    Args:
+        user_id: ID of the user authenticating
+        credential_raw_id: Raw credential ID bytes sent by the browser
+    
+    Returns:
+        WebAuthnCredential object, or None if no legacy credential matches
+    """
+    prefix = credential_raw_id[:8]
+    if not prefix:
+        return None
+    legacy_credentials = WebAuthnCredential.query.filter(
+        WebAuthnCredential.user_id == user_id,
+        WebAuthnCredential.credential_id_raw.is_(None)
+    ).all()
+    for cred in legacy_credentials:
+        try:
+            stored_bytes_8 = int(cred.credential_id).to_bytes(8, byteorder='big', signed=False)
+        except (ValueError, OverflowError) as e:
+            print(f"Error matching integer credential: {e}")
+            continue
+        if stored_bytes_8[:len(prefix)] == prefix:
+            return cred
+    return None
+
 # Helper function to serialize WebAuthn registration options
 def serialize_registration_options(options):
     """Convert PublicKeyCredentialCreationOptions to dictionary"""
@@ -778,39 +838,6 @@ def serialize_authentication_options(options):
     
     return result
 
-# Helper function to store or update device fingerprint
-def store_device_fingerprint(user_id, fingerprint_hash, device_info, user_agent, ip_address):
-    """Store or update device fingerprint"""
-    try:
-        fingerprint = DeviceFingerprint.query.filter_by(
-            user_id=user_id,
-            fingerprint_hash=fingerprint_hash
-        ).first()
-        
-        if fingerprint:
-            # Update last seen timestamp
-            fingerprint.last_seen_at = get_est_time()
-            fingerprint.device_info = json.dumps(device_info) if device_info else None
-        else:
-            # Create new fingerprint
-            fingerprint = DeviceFingerprint(
-                user_id=user_id,
-                fingerprint_hash=fingerprint_hash,
-                device_info=json.dumps(device_info) if device_info else None,
-                user_agent=user_agent,
-                ip_address=ip_address,
-                is_trusted=False  # New devices start as untrusted
-            )
-            db.session.add(fingerprint)
-        
-        db.session.commit()
-        return fingerprint
-    except Exception as e:
-        print(f"Error storing device fingerprint: {e}")
-        db.session.rollback()
-        return None
-
-
 # WebAuthn Registration - Start registration process
 @app.route('/api/webauthn/register/begin', methods=['POST'])
 @login_required
@@ -825,7 +852,7 @@ def webauthn_register_begin():
         
         # Get existing credentials for this user
         existing_credentials = WebAuthnCredential.query.filter_by(user_id=user.id).all()
-        existing_credential_ids = [safe_b64decode(cred.credential_id) for cred in existing_credentials]
+        existing_credential_ids = [cred.credential_id_raw or safe_b64decode(cred.credential_id) for cred in existing_credentials]
         
         # Generate registration options
         origin = get_webauthn_origin()
@@ -845,9 +872,8 @@ def webauthn_register_begin():
             ),
         )
         
-        # Store challenge in session
-        session['webauthn_challenge'] = base64.b64encode(registration_options.challenge).decode()
-        session['webauthn_user_id'] = user.id
+        # Store challenge on the server - the session only keeps the handle
+        session['webauthn_challenge_handle'] = challenge_store.issue('registration', registration_options.challenge, user.id)
         
         return jsonify({
             'success': True,
@@ -873,12 +899,11 @@ def webauthn_register_complete():
         if not credential:
             return jsonify({'success': False, 'error': 'Credential data required'}), 400
         
-        # Get challenge from session
-        challenge = session.get('webauthn_challenge')
-        user_id = session.get('webauthn_user_id')
-        
-        if not challenge or not user_id:
+        # Take the challenge out of the store (single use - it cannot be replayed)
+        issued = challenge_store.consume(session.pop('webauthn_challenge_handle', None), 'registration')
+        if not issued:
             return jsonify({'success': False, 'error': 'Registration session expired'}), 400
+        challenge, user_id = issued
         
         user = User.query.get(user_id)
         if not user:
@@ -900,7 +925,7 @@ def webauthn_register_complete():
         origin = get_webauthn_origin()
         verification = verify_registration_response(
             credential=credential_obj,
-            expected_challenge=safe_b64decode(challenge),
+            expected_challenge=challenge,  # Raw challenge bytes from the challenge store
             expected_origin=origin,
             expected_rp_id=RP_ID,
         )
@@ -925,7 +950,9 @@ def webauthn_register_complete():
         credential_record = WebAuthnCredential(
             user_id=user.id,
             credential_id=base64.b64encode(verification.credential_id).decode(),  # Store as base64 string
+            credential_id_raw=verification.credential_id,  # Raw bytes for indexed lookup at login
             public_key=json.dumps(public_key_serializable),
+            public_key_cose=verification.credential_public_key,  # Raw COSE bytes used at login
             counter=verification.sign_count,
             device_name=device_name
         )
@@ -933,10 +960,6 @@ def webauthn_register_complete():
         db.session.add(credential_record)
         db.session.commit()
         
-        # Clear session
-        session.pop('webauthn_challenge', None)
-        session.pop('webauthn_user_id', None)
-        
         return jsonify({
             'success': True,
             'message': 'Biometric credential registered successfully'
@@ -951,6 +974,7 @@ def webauthn_register_complete():
 
 # WebAuthn Authentication - Start authentication
 @app.route('/api/webauthn/authenticate/begin', methods=['POST'])
+@rate_limiter.limit('login')
 def webauthn_authenticate_begin():
     """Start WebAuthn authentication"""
     try:
@@ -981,7 +1005,7 @@ def webauthn_authenticate_begin():
         allow_credentials = []
         for cred in credentials:
             try:
-                cred_id_bytes = safe_b64decode(cred.credential_id)
+                cred_id_bytes = cred.credential_id_raw or safe_b64decode(cred.credential_id)
                 allow_credentials.append(
                     PublicKeyCredentialDescriptor(
                         id=cred_id_bytes,
@@ -1006,9 +1030,8 @@ def webauthn_authenticate_begin():
             timeout=60000,  # 60 second timeout to ensure prompt appears
         )
         
-        # Store challenge and user info in session
-        session['webauthn_challenge'] = base64.b64encode(authentication_options.challenge).decode()
-        session['webauthn_user_id'] = user.id
+        # Store challenge and user on the server - the session only keeps the handle
+        session['webauthn_challenge_handle'] = challenge_store.issue('authentication', authentication_options.challenge, user.id)
         
         return jsonify({
             'success': True,
@@ -1025,6 +1048,7 @@ def webauthn_authenticate_begin():
 @app.route('/api/webauthn/authenticate/complete', methods=['POST'])
 def webauthn_authenticate_complete():
     """Complete WebAuthn authentication"""
+    user_id = None
     try:
         data = request.get_json()
         credential = data.get('credential')
@@ -1033,12 +1057,11 @@ def webauthn_authenticate_complete():
         if not credential:
             return jsonify({'success': False, 'error': 'Credential data required'}), 400
         
-        # Get challenge and user from session
-        challenge = session.get('webauthn_challenge')
-        user_id = session.get('webauthn_user_id')
-        
-        if not challenge or not user_id:
+        # Take the challenge and user out of the store (single use - it cannot be replayed)
+        issued = challenge_store.consume(session.pop('webauthn_challenge_handle', None), 'authentication')
+        if not issued:
             return jsonify({'success': False, 'error': 'Authentication session expired'}), 400
+        challenge, user_id = issued
         
         user = User.query.get(user_id)
         if not user:
@@ -1053,35 +1076,14 @@ def webauthn_authenticate_complete():
         # Ensure raw_id_data is a string before decoding
         credential_raw_id = safe_b64decode(str(raw_id_data))
         
-        # Try to find credential by matching the raw credential ID bytes
-        # Handle both base64-stored and integer-stored credential IDs
-        credential_record = None
-        for cred in WebAuthnCredential.query.filter_by(user_id=user.id).all():
-            try:
-                # Try base64 decode first (new format)
-                stored_id_bytes = safe_b64decode(cred.credential_id)
-                if stored_id_bytes == credential_raw_id:
-                    credential_record = cred
-                    break
-            except:
-                # If that fails, try integer format (old format)
-                try:
-                    stored_int = int(cred.credential_id)
-                    # Convert integer to bytes - the integer was created from first 8 bytes
-                    # So we need to check if the first 8 bytes of credential_raw_id match
-                    stored_bytes_8 = stored_int.to_bytes(8, byteorder='big', signed=False)
-                    if len(credential_raw_id) >= 8:
-                        if stored_bytes_8 == credential_raw_id[:8]:
-                            credential_record = cred
-                            break
-                    # Also try matching the full length if it fits
-                    if len(credential_raw_id) <= 8:
-                        if stored_bytes_8[:len(credential_raw_id)] == credential_raw_id:
-                            credential_record = cred
-                            break
-                except Exception as e:
-                    print(f"Error matching integer credential: {e}")
-                    pass
+        # Find the credential with a single indexed equality lookup on the raw ID bytes
+        credential_record = WebAuthnCredential.query.filter_by(
+            user_id=user.id,
+            credential_id_raw=credential_raw_id
+        ).first()
+        if not credential_record:
+            # Fall back to legacy credentials stored as an integer (first 8 bytes of the ID)
+            credential_record = find_legacy_webauthn_credential(user.id, credential_raw_id)
         
         if not credential_record:
             # Log for debugging
@@ -1127,95 +1129,29 @@ def webauthn_authenticate_complete():
         
         # Verify authentication response
         origin = get_webauthn_origin()
-        public_key_dict = json.loads(credential_record.public_key)
-        
-        # Convert base64 strings back to bytes in the public key
-        # The public key was stored with bytes converted to base64 strings
-        # COSE key format: values can be int, str (base64), or bytes
-        def convert_base64_to_bytes(obj):
-            """Recursively convert base64 strings back to bytes"""
-            if isinstance(obj, bytes):
-                # Already bytes, return as-is
-                return obj
-            elif isinstance(obj, str):
-                # Try to decode as base64 - if it fails, return as-is (might be a regular string)
-                try:
-                    decoded = safe_b64decode(obj)
-                    # Only return decoded if it looks like binary data (not a regular string)
-                    # Base64-encoded bytes typically decode to non-printable characters
-                    if len(decoded) > 0:
-                        return decoded
-                    return obj
-                except (ValueError, TypeError):
-                    # Not base64, return as string
-                    return obj
-            elif isinstance(obj, dict):
-                return {k: convert_base64_to_bytes(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_base64_to_bytes(item) for item in obj]
-            else:
-                # int, float, None, etc. - return as-is
-                return obj
-        
-        public_key = convert_base64_to_bytes(public_key_dict)
-        
-        # Ensure challenge is bytes - it's stored as base64 string in session
-        if isinstance(challenge, bytes):
-            expected_challenge_bytes = challenge
-        elif isinstance(challenge, str):
-            # Challenge is stored as base64 string, decode to bytes
-            expected_challenge_bytes = safe_b64decode(challenge)
-        else:
-            # Convert to string first, then decode
-            expected_challenge_bytes = safe_b64decode(str(challenge))
+        # COSE public key bytes - stored as-is since registration, legacy JSON rows are decoded once and cached
+        public_key = credential_record.get_public_key()
         
         verification = verify_authentication_response(
             credential=credential_obj,
-            expected_challenge=expected_challenge_bytes,
+            expected_challenge=challenge,  # Raw challenge bytes from the challenge store
             expected_origin=origin,
             expected_rp_id=RP_ID,
             credential_public_key=public_key,
             credential_current_sign_count=credential_record.counter,
         )
         
-        # Update credential counter and last used
+        # Update credential counter and last used (committed by complete_login)
         credential_record.counter = verification.new_sign_count
         credential_record.last_used_at = get_est_time()
-        db.session.commit()
-        
-        # Store device fingerprint
-        user_agent = request.headers.get('User-Agent', '')
-        ip_address = request.remote_addr
-        fingerprint_hash = create_device_fingerprint(device_info, user_agent, ip_address)
-        store_device_fingerprint(user.id, fingerprint_hash, device_info, user_agent, ip_address)
-        
-        # Log in the user
-        login_user(user, remember=True)  # Use remember=True to persist session
-        log_login_attempt(user.username, 'biometric', 'success', user.id)
-        # Python function call: Track active session for monitoring
-        from auth import track_session_activity
-        import hashlib
-        session_id = hashlib.sha256(str(id(session)).encode()).hexdigest()[:32]
-        track_session_activity(user.id, session_id)
-        session['auth_method'] = 'biometric'
-        session['login_time'] = get_utc_time().isoformat()
-        session['user_role'] = user.role
         
-        # Clear WebAuthn challenge session (but keep user logged in)
-        session.pop('webauthn_challenge', None)
-        session.pop('webauthn_user_id', None)
+        # Log in the user - the counter update, login attempt, active session and device
+        # fingerprint are committed in one transaction
+        redirect_url = complete_login(user, 'biometric', device_info=device_info, remember=True)  # remember=True persists the session
         
         # Commit session changes
         session.permanent = True
         
-        # Determine redirect URL
-        if user.role == 'admin':
-            redirect_url = url_for('admin_dashboard')
-        elif user.role == 'professor':
-            redirect_url = url_for('professor_dashboard')
-        else:
-            redirect_url = url_for('student_dashboard')
-        
         print(f"Biometric login successful for user {user.username}, redirecting to {redirect_url}")
         
         return jsonify({
@@ -1228,9 +1164,8 @@ def webauthn_authenticate_complete():
         import traceback
         traceback.print_exc()
         db.session.rollback()
-        username = session.get('webauthn_user_id')
-        if username:
-            user = User.query.get(username)
+        if user_id:
+            user = User.query.get(user_id)
             if user:
                 log_login_attempt(user.username, 'biometric', 'failed', user.id)
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1249,7 +1184,7 @@ def store_fingerprint():
         ip_address = request.remote_addr
         
         fingerprint_hash = create_device_fingerprint(device_info, user_agent, ip_address)
-        fingerprint = store_device_fingerprint(
+        fingerprint = device_fingerprints.store(
             current_user.id,
             fingerprint_hash,
             device_info,
@@ -1285,6 +1220,8 @@ def biometric_login():
 # '/api/rfid-login' is the API endpoint URL
 # methods=['POST'] restricts to POST requests only
 @app.route('/api/rfid-login', methods=['POST'])
+# Python decorator: Limits RFID login attempts per username and client IP
+@rate_limiter.limit('login')
 # Python function definition: RFID login API endpoint handler
 def rfid_login():
     # Python docstring: Documents that this is simulated RFID authentication
@@ -1313,31 +1250,10 @@ def rfid_login():
     
     # Python comment: Marks simulated authentication section
     # Simulate RFID authentication (always succeeds for demo)
-    # Python function call: Logs in the user (simulated success)
-    login_user(user)
-    # Python function call: Records successful RFID login attempt
-    log_login_attempt(username, 'rfid', 'success', user.id)
-    # Python dictionary assignment: Stores RFID auth method in session
-    session['auth_method'] = 'rfid'
-    # Python dictionary assignment: Stores login timestamp (EST timezone)
-    session['login_time'] = get_est_time().isoformat()
-    # Python dictionary assignment: Stores user role in session
-    session['user_role'] = user.role  # Store role in session
-    
-    # Python comment: Marks redirect URL determination section
-    # Determine redirect URL based on role
-    # Python conditional: Checks if user is admin
-    if user.role == 'admin':
-        # Python variable: Generates URL for admin dashboard
-        redirect_url = url_for('admin_dashboard')
-    # Python elif clause: Checks if user is professor
-    elif user.role == 'professor':
-        # Python variable: Generates URL for professor dashboard
-        redirect_url = url_for('professor_dashboard')
-    # Python else clause: Default case (student)
-    else:
-        # Python variable: Generates URL for student dashboard
-        redirect_url = url_for('student_dashboard')
+    # Python function call: Logs in the user (simulated success) in one transaction
+    # complete_login() records the login attempt, active session and device, and returns
+    # the URL of the role-specific dashboard
+    redirect_url = complete_login(user, 'rfid')
     
     # Python return statement: Returns JSON success response with redirect URL
     return jsonify({'success': True, 'message': 'RFID authentication successful', 'redirect': redirect_url})
@@ -1395,44 +1311,40 @@ def admin_dashboard():
     # Admin can see all login attempts
     # Python import statement: Imports LoginAttempt model from models module
     from models import LoginAttempt
-    # Python dictionary assignment: Counts total successful logins
-    # LoginAttempt.query.filter_by() filters by status, .count() returns total count
-    user_data['total_logins'] = LoginAttempt.query.filter_by(status='success').count()
+    # Python variable: Reads the maintained totals (one primary key lookup instead of two COUNT(*) scans)
+    totals = site_stats.get('successful_logins', 'total_users')
+    # Python dictionary assignment: Total successful logins
+    user_data['total_logins'] = totals['successful_logins']
     # Python dictionary assignment: Gets 5 most recent successful logins
     # .order_by() sorts by timestamp descending, .limit(5) gets top 5 results
     user_data['recent_logins'] = LoginAttempt.query.filter_by(status='success').order_by(LoginAttempt.timestamp.desc()).limit(5).all()
-    # Python dictionary assignment: Counts total number of users
-    # User.query.count() returns total count of all users in database
-    user_data['total_users'] = User.query.count()
+    # Python dictionary assignment: Total number of users
+    user_data['total_users'] = totals['total_users']
     
     # Python comment: Marks active sessions section
     # Get all currently active sessions (users who are online)
-    # Python import statement: Imports get_active_sessions function from auth module
-    from auth import get_active_sessions
-    from models import ActiveSession
-    # Python dictionary assignment: Gets all active sessions
-    # get_active_sessions() returns list of ActiveSession objects for users currently logged in
-    active_sessions = get_active_sessions()
+    # Python import statement: Imports the session expiration helper from auth module
+    from auth import get_session_expiration_cutoff
+    # Python variable: Gets active sessions with their user and latest device fingerprint
+    # active_sessions_with_devices() returns everything in a single aggregate query
+    # instead of one User and one DeviceFingerprint query per session
+    session_rows = active_sessions_with_devices(get_session_expiration_cutoff())
+    active_sessions = [active_session for active_session, device in session_rows]
     user_data['active_sessions'] = active_sessions
     user_data['active_users_count'] = len(active_sessions)
     
     # Python comment: Marks device fingerprinting section
     # Get device information for active sessions
-    # Python dictionary assignment: Gets device fingerprints for active users
+    # Python dictionary assignment: Maps user_id to the user's most recent device
     user_data['device_info'] = {}
-    for active_session in active_sessions:
-        user_id = active_session.user_id
-        user = User.query.get(user_id)
-        if user:
-            # Get most recent device fingerprint for this user
-            device = DeviceFingerprint.query.filter_by(user_id=user_id).order_by(DeviceFingerprint.last_seen_at.desc()).first()
-            if device:
-                user_data['device_info'][user_id] = {
-                    'ip_address': device.ip_address,
-                    'user_agent': device.user_agent,
-                    'last_seen': device.last_seen_at,
-                    'is_trusted': device.is_trusted
-                }
+    for active_session, device in session_rows:
+        if device:
+            user_data['device_info'][active_session.user_id] = {
+                'ip_address': device.ip_address,
+                'user_agent': device.user_agent,
+                'last_seen': device.last_seen_at,
+                'is_trusted': device.is_trusted
+            }
     
     # Python return statement: Renders admin dashboard template with user data
     # render_template() renders HTML template and passes data dictionary to template
@@ -1466,8 +1378,9 @@ def professor_dashboard():
     # db.session.query() creates custom query, .distinct() removes duplicates, .count() returns count
     user_data['total_students'] = db.session.query(Grade.student_id).filter_by(professor_id=current_user.id).distinct().count()
     # Python dictionary assignment: Gets 5 most recent grades given by this professor
-    # Grade.query.filter_by() filters by professor_id, .order_by() sorts by creation date descending
-    user_data['recent_grades'] = Grade.query.filter_by(professor_id=current_user.id).order_by(Grade.created_at.desc()).limit(5).all()
+    # grade_query() eager-loads student and course so the table renders without per-row queries
+    # .filter_by() filters by professor_id, .order_by() sorts by creation date descending
+    user_data['recent_grades'] = grade_query().filter_by(professor_id=current_user.id).order_by(Grade.created_at.desc()).limit(5).all()
     
     # Python return statement: Renders professor dashboard template with user data
     return render_template('dashboards/professor_dashboard.html', data=user_data)
@@ -1493,8 +1406,9 @@ def student_dashboard():
     # Python comment: Marks student-specific data section
     # Student's grades and courses
     # Python dictionary assignment: Gets all grades for this student
-    # Grade.query.filter_by() filters grades by student_id matching current user's ID
-    user_data['grades'] = Grade.query.filter_by(student_id=current_user.id).all()
+    # grade_query() eager-loads course, course professor and grading professor
+    # .filter_by() filters grades by student_id matching current user's ID
+    user_data['grades'] = grade_query().filter_by(student_id=current_user.id).all()
     # Python dictionary assignment: Extracts courses from grades list
     # List comprehension: [grade.course for grade in ...] gets course object from each grade
     user_data['courses'] = [grade.course for grade in user_data['grades']]
@@ -1591,6 +1505,8 @@ def add_user():
     user = User(username=username, role=role)
     # Python method call: Adds user to database session
     db.session.add(user)
+    # Python method call: Updates the user total in the same transaction
+    site_stats.increment('total_users')
     # Python method call: Saves user to database
     db.session.commit()
     
@@ -1630,6 +1546,8 @@ def edit_user(user_id):
     
     # Python method call: Saves changes to database
     db.session.commit()
+    # Python method call: Drops the cached snapshot so the new role applies on the user's next request
+    user_cache.invalidate(user.id)
     # Python return statement: Returns JSON success response
     return jsonify({'success': True, 'message': f'User {user.username} updated successfully'})
 
@@ -1662,13 +1580,60 @@ def delete_user(user_id):
     # Python method call: Marks user for deletion in database session
     # db.session.delete() stages user for deletion (not yet committed)
     db.session.delete(user)
+    # Python method call: Updates the user total in the same transaction
+    site_stats.increment('total_users', -1)
     # Python method call: Permanently deletes user from database
     db.session.commit()
+    # Python method call: Drops the cached snapshot so the deleted user is logged out
+    user_cache.invalidate(user_id)
     
     # Python return statement: Returns JSON success response
     return jsonify({'success': True, 'message': f'User {username} deleted successfully'})
 
 
+# Python function definition: Reads login log filters from the query string
+def get_login_log_filters():
+    """Get the login log filters (method, status, username) from request arguments"""
+    username = request.args.get('username', '').strip()
+    return {
+        'method': request.args.get('method', '').strip() or None,
+        'status': request.args.get('status', '').strip() or None,
+        'username': normalize_username(username) if username else None
+    }
+
+
+# Python function definition: Converts a LoginAttempt into a JSON-serializable dictionary
+def serialize_login_attempt(log):
+    """Convert a LoginAttempt record to a dictionary for JSON responses"""
+    return {
+        'id': log.id,
+        'username': log.username,
+        'user_id': log.user_id,
+        'method': log.method,
+        'status': log.status,
+        'ip_address': log.ip_address,
+        'user_agent': log.user_agent,
+        'timestamp': log.timestamp.isoformat() if log.timestamp else None
+    }
+
+
+# Python function definition: Converts a Grade into a JSON-serializable dictionary
+def serialize_grade(grade):
+    """Convert a Grade record to a dictionary for JSON responses"""
+    return {
+        'id': grade.id,
+        'student': grade.student.username,
+        'course_id': grade.course_id,
+        'course_code': grade.course.code,
+        'course_name': grade.course.name,
+        'grade_value': grade.grade_value,
+        'percentage': grade.percentage,
+        'professor': grade.professor.username,
+        'created_at': grade.created_at.isoformat() if grade.created_at else None,
+        'updated_at': grade.updated_at.isoformat() if grade.updated_at else None
+    }
+
+
 # Python decorator: Registers route handler for '/admin/login-logs' URL
 @app.route('/admin/login-logs')
 # Python decorator: Requires user to be authenticated
@@ -1681,13 +1646,44 @@ def login_logs():
     if current_user.username != 'admin' or current_user.role != 'admin':
         # Python return statement: Returns 403 Forbidden error
         return "Access Denied", 403
-    # Python import statement: Imports LoginAttempt model
-    from models import LoginAttempt
-    # Python variable: Gets 200 most recent login attempts from database
-    # .order_by() sorts by timestamp descending, .limit(200) gets top 200 results
-    logs = LoginAttempt.query.order_by(LoginAttempt.timestamp.desc()).limit(200).all()
+    # Python variable: Gets filters (method, status, username) from the query string
+    filters = get_login_log_filters()
+    # Python variable: Gets one page of login attempts, newest first
+    # login_attempt_page() uses keyset pagination - the ?cursor= parameter points
+    # just past the last row of the previous page, so every page costs the same
+    logs, next_cursor = login_attempt_page(
+        cursor=request.args.get('cursor'),
+        limit=parse_page_size(request.args.get('limit')),
+        **filters
+    )
     # Python return statement: Renders login logs template with logs data
-    return render_template('login_logs.html', logs=logs)
+    return render_template('login_logs.html', logs=logs, next_cursor=next_cursor, filters=filters)
+
+
+# Python decorator: Registers API route for paginated login logs (JSON)
+@app.route('/api/admin/login-logs')
+# Python decorator: Requires user to be authenticated
+@login_required
+# Python function definition: Login logs JSON API endpoint handler
+def login_logs_api():
+    # Python docstring: Documents what the endpoint does
+    """Paginated login logs as JSON (admin only)"""
+    # Python conditional: Checks if user is not admin
+    if current_user.username != 'admin' or current_user.role != 'admin':
+        # Python return statement: Returns JSON error response with 403 status code
+        return jsonify({'success': False, 'error': 'Access Denied'}), 403
+    # Python variable: Gets one page of login attempts using the same filters as the page
+    logs, next_cursor = login_attempt_page(
+        cursor=request.args.get('cursor'),
+        limit=parse_page_size(request.args.get('limit')),
+        **get_login_log_filters()
+    )
+    # Python return statement: Returns the page and the cursor for the next page
+    return jsonify({
+        'success': True,
+        'logs': [serialize_login_attempt(log) for log in logs],
+        'next_cursor': next_cursor
+    })
 
 
 # Python decorator: Registers route handler for '/admin/grades' URL
@@ -1702,16 +1698,133 @@ def admin_grades():
     if current_user.username != 'admin' or current_user.role != 'admin':
         # Python return statement: Returns 403 Forbidden error
         return "Access Denied", 403
-    # Python variable: Gets all grades ordered by creation date (newest first)
-    # .order_by() sorts by created_at descending
-    grades = Grade.query.order_by(Grade.created_at.desc()).all()
-    # Python variable: Gets all courses from database
-    courses = Course.query.all()
+    # Python variable: Gets optional course filter from the query string
+    course_id = request.args.get('course', type=int)
+    # Python variable: Gets one page of grades ordered by creation date (newest first)
+    # grade_page() uses keyset pagination and eager-loads student, course and professor
+    grades, next_cursor = grade_page(
+        cursor=request.args.get('cursor'),
+        limit=parse_page_size(request.args.get('limit')),
+        course_id=course_id
+    )
+    # Python variable: Gets all courses from database (with professor eager-loaded)
+    courses = course_query().all()
     # Python variable: Gets all users with 'student' role
     # .filter_by() filters users by role='student'
     students = User.query.filter_by(role='student').all()
     # Python return statement: Renders admin grades template with grades, courses, and students
-    return render_template('admin_grades.html', grades=grades, courses=courses, students=students)
+    return render_template('admin_grades.html', grades=grades, courses=courses, students=students,
+                        next_cursor=next_cursor, course_id=course_id)
+
+
+# Python decorator: Registers API route for paginated grades (JSON)
+@app.route('/api/admin/grades')
+# Python decorator: Requires user to be authenticated
+@login_required
+# Python function definition: Grades JSON API endpoint handler
+def admin_grades_api():
+    # Python docstring: Documents what the endpoint does
+    """Paginated grades as JSON (admin only)"""
+    # Python conditional: Checks if user is not admin
+    if current_user.username != 'admin' or current_user.role != 'admin':
+        # Python return statement: Returns JSON error response with 403 status code
+        return jsonify({'success': False, 'error': 'Access Denied'}), 403
+    # Python variable: Gets one page of grades using the same filters as the page
+    grades, next_cursor = grade_page(
+        cursor=request.args.get('cursor'),
+        limit=parse_page_size(request.args.get('limit')),
+        course_id=request.args.get('course', type=int)
+    )
+    # Python return statement: Returns the page and the cursor for the next page
+    return jsonify({
+        'success': True,
+        'grades': [serialize_grade(grade) for grade in grades],
+        'next_cursor': next_cursor
+    })
+
+
+# Python decorator: Registers API route for downloading login logs, sessions or grades
+@app.route('/api/admin/export/<dataset>')
+# Python decorator: Requires user to be authenticated
+@login_required
+# Python function definition: Streaming export endpoint handler
+def admin_export(dataset):
+    # Python docstring: Documents what the endpoint does
+    """Stream a full dataset as CSV or JSON Lines, gzip-compressed if the client accepts it (admin only)"""
+    # Python conditional: Checks if user is not admin
+    if current_user.username != 'admin' or current_user.role != 'admin':
+        # Python return statement: Returns JSON error response with 403 status code
+        return jsonify({'success': False, 'error': 'Access Denied'}), 403
+    # Python variable: Output format - 'csv' (default) or 'jsonl'
+    export_format = request.args.get('format', 'csv')
+    if dataset not in EXPORT_DATASETS or export_format not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'error': 'Unknown dataset or format'}), 404
+    # Python variable: Export query with the same filters as the listing pages
+    if dataset == 'login-logs':
+        statement = EXPORT_DATASETS[dataset](**get_login_log_filters())
+    elif dataset == 'grades':
+        statement = EXPORT_DATASETS[dataset](request.args.get('course', type=int))
+    else:
+        statement = EXPORT_DATASETS[dataset]()
+    # Python variable: Generator producing the file in chunks (rows are read in batches as it is consumed)
+    chunks = export_rows(statement, export_format)
+    headers = {
+        'Content-Disposition': f'attachment; filename="{dataset}.{export_format}"',
+        'Vary': 'Accept-Encoding'
+    }
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        chunks = gzip_chunks(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    # Python return statement: Streams the response (chunked, no Content-Length)
+    return Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[export_format], headers=headers)
+
+
+# Python decorator: Registers API route for the user cache counters (JSON)
+@app.route('/api/admin/user-cache-stats')
+# Python decorator: Requires user to be authenticated
+@login_required
+# Python function definition: User cache statistics endpoint handler
+def user_cache_stats():
+    # Python docstring: Documents what the endpoint does
+    """Hit/miss counters of the user cache in the worker serving the request (admin only)"""
+    # Python conditional: Checks if user is not admin
+    if current_user.username != 'admin' or current_user.role != 'admin':
+        # Python return statement: Returns JSON error response with 403 status code
+        return jsonify({'success': False, 'error': 'Access Denied'}), 403
+    # Python return statement: Returns the counters with the worker's process ID
+    # Each gunicorn worker has its own cache, so repeated calls may hit different workers
+    return jsonify({'success': True, 'pid': os.getpid(), 'user_cache': user_cache.stats()})
+
+
+# Python decorator: Registers API route for login volume over time (JSON)
+@app.route('/api/admin/login-rollups')
+# Python decorator: Requires user to be authenticated
+@login_required
+# Python function definition: Login volume endpoint handler
+def login_rollups_report():
+    # Python docstring: Documents what the endpoint does
+    """Login attempts per hour or day, method and status from the rollup table (admin only)"""
+    # Python conditional: Checks if user is not admin
+    if current_user.username != 'admin' or current_user.role != 'admin':
+        # Python return statement: Returns JSON error response with 403 status code
+        return jsonify({'success': False, 'error': 'Access Denied'}), 403
+    # Python variable: Bucket size - 'hour' (default) or 'day'
+    granularity = request.args.get('granularity', 'hour')
+    if granularity not in ('hour', 'day'):
+        return jsonify({'success': False, 'error': 'granularity must be hour or day'}), 400
+    # Python variable: Number of days to report, clamped to 1-90
+    days = min(max(request.args.get('days', 7, type=int), 1), 90)
+    # Python variable: Start of the reported range (same EST wall clock as the login timestamps)
+    since = get_est_time().replace(tzinfo=None) - timedelta(days=days)
+    if granularity == 'day':
+        since = since.replace(hour=0, minute=0, second=0, microsecond=0)
+    # Python return statement: Returns the buckets - only the small rollup table is read
+    return jsonify({
+        'success': True,
+        'granularity': granularity,
+        'since': since.isoformat(),
+        'buckets': login_rollups.report(since, granularity, request.args.get('method') or None)
+    })
 
 
 # Python decorator: Registers route handler for '/professor/courses' URL
@@ -1782,7 +1895,8 @@ def give_grades():
     # Python variable: Gets all users with 'student' role
     students = User.query.filter_by(role='student').all()
     # Python variable: Gets all grades given by current professor, ordered by creation date
-    grades = Grade.query.filter_by(professor_id=current_user.id).order_by(Grade.created_at.desc()).all()
+    # grade_query() eager-loads student and course for the grades table
+    grades = grade_query().filter_by(professor_id=current_user.id).order_by(Grade.created_at.desc()).all()
     # Python return statement: Renders give grades template with courses, students, and grades
     return render_template('give_grades.html', courses=courses, students=students, grades=grades)
 
@@ -1861,7 +1975,8 @@ def student_grades():
     # Python docstring: Documents what the function does
     """View grades (student only)"""
     # Python variable: Gets all grades for current student
-    grades = Grade.query.filter_by(student_id=current_user.id).all()
+    # grade_query() eager-loads course, course professor and grading professor
+    grades = grade_query().filter_by(student_id=current_user.id).all()
     # Python variable: Calculates GPA (Grade Point Average)
     # sum() adds all percentages, divides by count, defaults to 0 if no grades
     gpa = sum([g.percentage for g in grades]) / len(grades) if grades else 0
@@ -1880,7 +1995,8 @@ def student_courses():
     # Python docstring: Documents what the function does
     """View enrolled courses (student only)"""
     # Python variable: Gets all grades for current student
-    grades = Grade.query.filter_by(student_id=current_user.id).all()
+    # grade_query() eager-loads course, course professor and grading professor
+    grades = grade_query().filter_by(student_id=current_user.id).all()
     # Python variable: Extracts courses from grades list using list comprehension
     # [grade.course for grade in grades] gets course object from each grade
     courses = [grade.course for grade in grades]
@@ -1960,13 +2076,11 @@ def recent_activity():
 def device_security():
     # Python docstring: Documents what the function does
     """Device security page"""
-    # Python import statement: Imports get_active_sessions function from auth module
-    from auth import get_active_sessions
-    # Python variable: Gets all active sessions from authentication system
-    active_sessions = get_active_sessions()
-    # Python variable: Filters active sessions to only current user's sessions
-    # List comprehension: [s for s in ... if ...] filters sessions by user_id
-    user_sessions = [s for s in active_sessions if s.user_id == current_user.id]
+    # Python import statement: Imports get_user_active_sessions function from auth module
+    from auth import get_user_active_sessions
+    # Python variable: Gets only the current user's active sessions
+    # The query is scoped to current_user.id in the database (indexed on user_id, last_activity)
+    user_sessions = get_user_active_sessions(current_user.id)
     
     # Python return statement: Renders device security template with user's devices
     return render_template('device_security.html', devices=user_sessions)
@@ -1992,18 +2106,16 @@ def account_protection():
 def access_history():
     # Python docstring: Documents what the function does
     """View access history page"""
-    # Python import statement: Imports get_active_sessions function from auth module
-    from auth import get_active_sessions
+    # Python import statement: Imports get_user_active_sessions function from auth module
+    from auth import get_user_active_sessions
     # Python import statement: Imports LoginAttempt model from models module
     from models import LoginAttempt
     
     # Python variable: Gets 50 most recent login attempts for current user
     # .filter_by() filters by user_id, .order_by() sorts by timestamp descending, .limit(50) gets top 50
     login_attempts = LoginAttempt.query.filter_by(user_id=current_user.id).order_by(LoginAttempt.timestamp.desc()).limit(50).all()
-    # Python variable: Gets all active sessions
-    active_sessions = get_active_sessions()
-    # Python variable: Filters active sessions to only current user's sessions
-    user_sessions = [s for s in active_sessions if s.user_id == current_user.id]
+    # Python variable: Gets only the current user's active sessions (scoped in the database)
+    user_sessions = get_user_active_sessions(current_user.id)
     
     # Python return statement: Renders access history template with login attempts and active sessions
     return render_template('access_history.html', 
@@ -2166,39 +2278,101 @@ def user_info():
     })
 
 
-# Initialize database lazily (only when first request comes in)
-# This speeds up cold starts on Render free tier
-def initialize_database():
-    """Initialize database tables and sample data"""
-    try:
-        with app.app_context():
-            # Create all database tables defined in models
-            db.create_all()
-            # Create sample users and data if database is empty
-            create_sample_data()
-    except Exception as e:
-        # Log error but don't crash - database might already exist
-        print(f"Database initialization note: {e}")
+# Python constant: Key of the PostgreSQL advisory lock held while the schema and sample data are created
+DATABASE_INIT_LOCK_ID = 7242001
 
-# Track if database has been initialized
-_db_initialized = False
 
-# Initialize database on first request (lazy initialization for faster cold starts)
+# Initialize database once at startup (never on the request path)
+# Called by the gunicorn on_starting hook (gunicorn.conf.py), the `flask init-db` command
+# and `python app.py`, before any worker starts serving requests
+def initialize_database():
+    """
+    Create database tables, add new columns to existing tables and create sample data.
+
+    Safe to run repeatedly and from several processes at once: db.create_all()
+    only creates missing tables, upgrade_schema() only adds missing columns,
+    create_sample_data() only seeds an empty database, and on PostgreSQL a
+    session advisory lock makes concurrent boots run one after another.
+    """
+    with app.app_context():
+        # Python context manager: Dedicated connection that holds the advisory lock during initialization
+        with db.engine.connect() as lock_connection:
+            use_lock = db.engine.dialect.name == 'postgresql'
+            if use_lock:
+                lock_connection.execute(text('SELECT pg_advisory_lock(:key)'), {'key': DATABASE_INIT_LOCK_ID})
+            try:
+                # Create all database tables defined in models (existing tables are skipped)
+                db.create_all()
+                # Add columns that existing tables are missing (every query on those models selects them)
+                upgrade_schema()
+                try:
+                    # Create sample users and data if database is empty
+                    create_sample_data()
+                except IntegrityError:
+                    # Another process seeded the database at the same time
+                    db.session.rollback()
+                    print("Sample data already created by another process")
+                # Recount the dashboard totals (creates them on a new database)
+                site_stats.reconcile()
+            finally:
+                if use_lock:
+                    lock_connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': DATABASE_INIT_LOCK_ID})
+
+
+# Python decorator: Registers the `flask init-db` command
+@app.cli.command('init-db')
+# Python function definition: CLI command that creates the tables and sample data
+def init_db_command():
+    """Create database tables and sample data."""
+    initialize_database()
+    print("Database initialized")
+
+
+# Python decorator: Registers the `flask backfill-login-rollups` command
+@app.cli.command('backfill-login-rollups')
+# Python decorator: Optional start date of the rebuilt range
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d', '%Y-%m-%d %H:%M']), default=None,
+              help='First hour to rebuild (default: all history)')
+# Python function definition: CLI command that rebuilds the hourly login rollups
+def backfill_login_rollups_command(since):
+    """Rebuild the hourly login rollups from the login_attempt table."""
+    attempts, buckets = login_rollups.backfill(since=since)
+    print(f"Counted {attempts} login attempts into {buckets} hourly buckets")
+
+
+# Python decorator: Registers the `flask archive-login-attempts` command
+@app.cli.command('archive-login-attempts')
+# Python decorator: Optional retention window overriding LOGIN_RETENTION_DAYS
+@click.option('--days', type=int, default=None, help='Keep this many days (default: LOGIN_RETENTION_DAYS)')
+# Python function definition: CLI command that archives every login attempt outside the retention window
+def archive_login_attempts_command(days):
+    """Move login attempts older than the retention window to the archive."""
+    if days is not None:
+        login_retention.retention_days = days
+    if login_retention.cutoff() is None:
+        print("Retention is disabled (set LOGIN_RETENTION_DAYS or pass --days)")
+        return
+    archived = login_retention.archive()
+    print(f"Archived {archived} login attempts older than {login_retention.cutoff()} to {login_retention.target}")
+
+
+# Runs before every request: starts background workers and tracks session activity
 @app.before_request
 def ensure_database_initialized():
-    """Ensure database is initialized before handling requests"""
-    global _db_initialized
-    if not _db_initialized:
-        initialize_database()
-        _db_initialized = True
+    """Start background workers and record session activity before handling requests"""
+    # Start background maintenance jobs and email workers in this worker (no-op once running)
+    maintenance_scheduler.start()
+    email_outbox.start()
     
     # Track session activity for authenticated users (updates last_activity timestamp)
     if current_user.is_authenticated:
         try:
             from auth import track_session_activity
-            import hashlib
-            # Generate session ID from Flask session
-            session_id = hashlib.sha256(str(id(session)).encode()).hexdigest()[:32]
+            # Session ID created by complete_login() and kept in the session cookie
+            # Sessions from before it was stored get a new ID (and a new ActiveSession row) once
+            session_id = session.get('session_id')
+            if not session_id:
+                session_id = session['session_id'] = secrets.token_hex(16)
             track_session_activity(current_user.id, session_id)
         except Exception as e:
             # Don't break the request if session tracking fails
@@ -2343,4 +2517,6 @@ if __name__ == '__main__':
     # port=port uses the port number from environment or default
     # debug mode: Only enable in development (not in production)
     debug_mode = os.environ.get("FLASK_DEBUG", "False").lower() == "true"
+    # Python function call: Creates tables and sample data before the dev server starts
+    initialize_database()
     app.run(host='0.0.0.0', port=port, debug=debug_mode)
@@ -0,0 +1,236 @@
+# ------------------------------------------------------------------------------------
+# audit_log.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for writing login attempt
+# audit records in batches from a bounded in-memory queue, so failed attempts
+# do not each cost a database transaction on the request path.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    auth.py - log_login_attempt() hands records to the queue
+#    models.py - LoginAttempt model
+#    site_stats.py - Successful login total updated with the records
+#    login_rollups.py - Hourly counts updated with the records
+#    config.py - Durability mode, queue size and flush settings
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statements: Standard library modules used by the queue
+# atexit: Writes queued records when the worker process exits
+# threading: Lock, wake-up event and background flush thread
+import atexit
+import threading
+
+# Python import statement: Imports contextlib.nullcontext for optional app contexts
+from contextlib import nullcontext
+
+# Python import statement: Imports has_app_context to detect if we are inside a request
+from flask import has_app_context
+
+# Python import statement: Imports the LoginAttempt model and db instance
+from models import LoginAttempt, db
+
+# Python import statement: Imports the maintained dashboard totals
+from site_stats import site_stats
+
+# Python import statement: Imports the hourly login rollups
+from login_rollups import login_rollups
+
+
+class AuditLogQueue:
+    """
+    Bounded write-behind queue for LoginAttempt records.
+
+    AUDIT_LOG_MODE decides which records are written immediately:
+    'sync' writes every record in the request's own transaction (no queue),
+    'async' queues every record, and 'mixed' (default) writes successful
+    logins immediately and queues failed attempts. Queued records are written
+    with one multi-row INSERT every AUDIT_LOG_FLUSH_INTERVAL seconds, as soon
+    as AUDIT_LOG_BATCH_SIZE records are waiting, and on worker shutdown.
+
+    The queue holds at most AUDIT_LOG_QUEUE_SIZE records. When it is full the
+    request that adds the next record flushes the queue itself, so a burst of
+    failed logins slows down the requests producing it instead of growing
+    memory or losing records.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        # Serializes flushes so records are inserted in the order they were queued
+        self._flush_lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        # Column values of LoginAttempt rows waiting to be inserted
+        self._pending = []
+        self._flush_thread = None
+        self._app = None
+        self.mode = 'mixed'
+        self.queue_size = 10000
+        self.batch_size = 200
+        self.flush_interval = 2
+        self.written = 0
+        self.overflow_flushes = 0
+        self.dropped = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configure the queue for a Flask application and register the shutdown flush.
+
+        Args:
+            app: Flask application instance
+        """
+        mode = app.config.get('AUDIT_LOG_MODE', 'mixed')
+        if mode not in ('sync', 'async', 'mixed'):
+            raise ValueError(f"Unknown AUDIT_LOG_MODE: {mode}")
+        self._app = app
+        self.mode = mode
+        self.queue_size = app.config.get('AUDIT_LOG_QUEUE_SIZE', 10000)
+        self.batch_size = app.config.get('AUDIT_LOG_BATCH_SIZE', 200)
+        self.flush_interval = app.config.get('AUDIT_LOG_FLUSH_INTERVAL', 2)
+        app.extensions['audit_log'] = self
+        atexit.register(self.shutdown)
+
+    def record(self, values, commit=True):
+        """
+        Write or queue one login attempt.
+
+        Args:
+            values: Dictionary of LoginAttempt column values
+                    (username, method, status, user_id, ip_address, user_agent, timestamp)
+            commit: False to add a synchronously written record to the current
+                    database session without committing it
+        """
+        if self.mode == 'sync' or (self.mode == 'mixed' and values['status'] == 'success'):
+            db.session.add(LoginAttempt(**values))
+            if values['status'] == 'success':
+                site_stats.increment('successful_logins')
+            login_rollups.add([values])
+            if commit:
+                db.session.commit()
+            return
+
+        with self._lock:
+            overflow = len(self._pending) >= self.queue_size
+            if not overflow:
+                self._pending.append(values)
+                flush_due = len(self._pending) >= self.batch_size
+        if overflow:
+            # Back-pressure: the producing request empties the queue before adding more
+            with self._lock:
+                self.overflow_flushes += 1
+            self.flush()
+            with self._lock:
+                if len(self._pending) < self.queue_size:
+                    self._pending.append(values)
+                else:
+                    # The flush failed and the queue is still full
+                    self.dropped += 1
+                    print(f"[WARNING] Audit log queue full, dropped login attempt for {values['username']}")
+            return
+        self._ensure_flush_thread()
+        if flush_due:
+            self._wake_event.set()
+
+    def flush(self):
+        """
+        Insert all queued records with a single multi-row INSERT.
+
+        Returns:
+            Number of records written
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = []
+            if not pending:
+                return 0
+            try:
+                with self._app_context():
+                    with db.engine.begin() as connection:
+                        connection.execute(LoginAttempt.__table__.insert(), pending)
+                        # Keep the dashboard total in the same transaction as the rows
+                        site_stats.increment(
+                            'successful_logins',
+                            sum(1 for values in pending if values['status'] == 'success'),
+                            connection=connection
+                        )
+                        login_rollups.add(pending, connection=connection)
+                with self._lock:
+                    self.written += len(pending)
+                return len(pending)
+            except Exception as e:
+                print(f"Error writing login attempts: {e}")
+                # Put the records back in front of newer ones, up to the queue size
+                with self._lock:
+                    restored = pending + self._pending
+                    self.dropped += max(0, len(restored) - self.queue_size)
+                    self._pending = restored[:self.queue_size]
+                return 0
+
+    def stats(self):
+        """
+        Get the queue counters for this worker process.
+
+        Returns:
+            Dictionary with mode, queued, written, overflow_flushes and dropped
+        """
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'queued': len(self._pending),
+                'written': self.written,
+                'overflow_flushes': self.overflow_flushes,
+                'dropped': self.dropped
+            }
+
+    def shutdown(self):
+        """Stop the background flush thread and write any queued records."""
+        self._stop_event.set()
+        self._wake_event.set()
+        self.flush()
+
+    def _app_context(self):
+        # Reuse the current request's app context, or push one for background flushes
+        if has_app_context() or self._app is None:
+            return nullcontext()
+        return self._app.app_context()
+
+    def _ensure_flush_thread(self):
+        # Started lazily so each gunicorn worker runs its own flusher after forking
+        if self._flush_thread is not None and self._flush_thread.is_alive():
+            return
+        with self._lock:
+            if self._flush_thread is not None and self._flush_thread.is_alive():
+                return
+            self._flush_thread = threading.Thread(
+                target=self._run_flush_loop,
+                name='audit-log-flush',
+                daemon=True
+            )
+            self._flush_thread.start()
+
+    def _run_flush_loop(self):
+        while not self._stop_event.is_set():
+            self._wake_event.wait(self.flush_interval)
+            self._wake_event.clear()
+            self.flush()
+
+
+# Shared queue instance, initialized with the app in app.py
+audit_log = AuditLogQueue()
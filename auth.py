@@ -22,6 +22,7 @@
 # ------------------
 #    app.py - Main Flask application that uses these authentication utilities
 #    models.py - Database models used for authentication
+#    audit_log.py - Batched writer for login attempt records
 #
 # ------------------------------------------------------------------------------------
 
@@ -40,11 +41,18 @@ from functools import wraps
 from flask_login import current_user
 
 # Python import statement: Imports database models and db instance
-# LoginAttempt: Model for logging login attempts
 # ActiveSession: Model for tracking active user sessions
 # User: User model for authentication
 # db: SQLAlchemy database instance
-from models import LoginAttempt, ActiveSession, User, db
+from models import ActiveSession, User, db
+
+# Python import statement: Imports the write-behind buffer for session activity
+# session_activity_buffer: Batches last_activity updates instead of committing per request
+from session_activity import session_activity_buffer
+
+# Python import statement: Imports the batched audit log queue
+# audit_log: Writes failed login attempts in batches instead of one transaction each
+from audit_log import audit_log
 
 # Python import statement: Imports datetime and timedelta classes
 # datetime: For creating timestamps
@@ -59,6 +67,9 @@ import pytz
 # EST: Eastern Standard Time timezone object
 EST = pytz.timezone('US/Eastern')
 
+# Session timeout constant: Sessions expire after this much inactivity
+SESSION_TIMEOUT = timedelta(hours=2)
+
 
 def normalize_username(username):
     """
@@ -97,41 +108,40 @@ def get_utc_time():
     return datetime.utcnow()
 
 
-def log_login_attempt(username, method, status, user_id=None):
+def log_login_attempt(username, method, status, user_id=None, commit=True):
     """
     Log a login attempt to the database.
+    Depending on AUDIT_LOG_MODE, the record is committed immediately or queued
+    and written in a batch by audit_log (by default only failed attempts are queued).
     
     Args:
         username: Username that attempted login
         method: Authentication method used ('otp', 'email', 'biometric', 'rfid', 'password')
         status: 'success' or 'failed'
         user_id: User ID if user exists, None for failed attempts with non-existent users
+        commit: False to leave the commit to the caller (used by the login transaction)
     """
     try:
         # Get IP address and user agent from request if available
         ip_address = request.remote_addr if request else None
         user_agent = request.headers.get('User-Agent') if request else None
         
-        # Normalize username to lowercase
-        normalized_username = normalize_username(username)
-        
-        # Create login attempt record using SQLAlchemy
-        login_attempt = LoginAttempt(
-            username=normalized_username,
-            method=method,
-            status=status,
-            user_id=user_id,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            timestamp=get_est_time()
-        )
-        
-        db.session.add(login_attempt)
-        db.session.commit()
+        # Column values for the LoginAttempt row, captured now so queued records keep
+        # the time and client of the attempt
+        audit_log.record({
+            'username': normalize_username(username),
+            'method': method,
+            'status': status,
+            'user_id': user_id,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'timestamp': get_est_time()
+        }, commit=commit)
     except Exception as e:
         # Log error but don't break the application
         print(f"Error logging login attempt: {e}")
-        db.session.rollback()
+        if commit:
+            db.session.rollback()
 
 
 
@@ -139,12 +149,19 @@ def track_session_activity(user_id, session_id):
     """
     Track or update active session activity.
     Creates new session if it doesn't exist, or updates last_activity timestamp.
+    Updates for sessions already known to this worker are buffered and written
+    in batches by session_activity_buffer instead of committing on every request.
     
     Args:
         user_id: User ID for the session
         session_id: Flask session ID
     """
     try:
+        # Known session - buffer the last_activity update (no database round trip)
+        if session_activity_buffer.is_known(session_id):
+            session_activity_buffer.record(session_id, get_utc_time())
+            return
+        
         # Check if session exists
         active_session = ActiveSession.query.filter_by(session_id=session_id).first()
         
@@ -167,42 +184,86 @@ def track_session_activity(user_id, session_id):
             active_session.last_activity = get_utc_time()
         
         db.session.commit()
+        session_activity_buffer.mark_known(session_id)
     except Exception as e:
         print(f"Error tracking session activity: {e}")
         db.session.rollback()
 
+def get_session_expiration_cutoff():
+    """
+    Get the last_activity cutoff for active sessions.
+    Sessions with last_activity before this time have expired.
+    
+    Returns:
+        Naive UTC datetime (SESSION_TIMEOUT ago)
+    """
+    return get_utc_time() - SESSION_TIMEOUT
+
+
 def get_active_sessions():
     """
-    Get all active sessions, removing expired ones.
-    Sessions expire after 2 hours of inactivity.
+    Get all active sessions.
+    Sessions expire after 2 hours of inactivity; expired rows are excluded here
+    and deleted separately by reap_expired_sessions() in the background.
     Uses UTC timezone for consistency.
     
     Returns:
         List of ActiveSession objects that are still active
     """
     try:
-        # Calculate expiration time (2 hours ago) in UTC
-        expiration_time = get_utc_time() - timedelta(hours=2)
-        # Convert to naive datetime for comparison (SQLite doesn't store timezone)
-        expiration_time_naive = expiration_time
-        
-        # Find and delete expired sessions
-        expired_sessions = ActiveSession.query.filter(
-            ActiveSession.last_activity < expiration_time_naive
-        ).all()
-        
-        for session in expired_sessions:
-            db.session.delete(session)
-        
-        db.session.commit()
-        
-        # Return all remaining active sessions, ordered by last activity (most recent first)
-        return ActiveSession.query.order_by(ActiveSession.last_activity.desc()).all()
+        # Return all active sessions, ordered by last activity (most recent first)
+        # Uses the last_activity index for both the filter and the ordering
+        return ActiveSession.query.filter(
+            ActiveSession.last_activity >= get_session_expiration_cutoff()
+        ).order_by(ActiveSession.last_activity.desc()).all()
     except Exception as e:
         print(f"Error getting active sessions: {e}")
         db.session.rollback()
         return []
 
+
+def get_user_active_sessions(user_id):
+    """
+    Get the active sessions of a single user.
+    Scoped in the database (uses the (user_id, last_activity) index) instead of
+    loading every active session in the system and filtering in Python.
+    
+    Args:
+        user_id: User ID whose sessions to return
+    
+    Returns:
+        List of the user's ActiveSession objects, most recent activity first
+    """
+    try:
+        return ActiveSession.query.filter(
+            ActiveSession.user_id == user_id,
+            ActiveSession.last_activity >= get_session_expiration_cutoff()
+        ).order_by(ActiveSession.last_activity.desc()).all()
+    except Exception as e:
+        print(f"Error getting user active sessions: {e}")
+        db.session.rollback()
+        return []
+
+
+def reap_expired_sessions():
+    """
+    Delete all expired sessions with a single bulk DELETE.
+    Run periodically by the maintenance scheduler instead of on read paths.
+    
+    Returns:
+        Number of sessions deleted
+    """
+    try:
+        deleted = ActiveSession.query.filter(
+            ActiveSession.last_activity < get_session_expiration_cutoff()
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+    except Exception as e:
+        print(f"Error reaping expired sessions: {e}")
+        db.session.rollback()
+        return 0
+
 # decorator functions to ensure proper role authentication
 def role_required(*roles):
     def decorator(func):
@@ -0,0 +1,205 @@
+# ------------------------------------------------------------------------------------
+# challenge_store.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for keeping WebAuthn
+# challenges on the server with an expiry time, so the session cookie only
+# carries a short opaque handle and each challenge can be used only once.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    app.py - WebAuthn begin/complete endpoints that issue and consume challenges
+#    models.py - WebAuthnChallenge model used by the SQL backend
+#    config.py - Backend and TTL settings
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statements: Standard library modules used by the challenge store
+# secrets: Generates unguessable challenge handles
+# threading: Lock for the in-memory backend
+# time: Monotonic clock for in-memory expiry
+import secrets
+import threading
+import time
+
+# Python import statement: Imports timedelta for SQL expiry timestamps
+from datetime import timedelta
+
+# Python import statement: Imports the WebAuthnChallenge model and db instance
+from models import WebAuthnChallenge, db
+
+# Python import statement: Imports the UTC time helper
+from auth import get_utc_time
+
+
+class MemoryChallengeBackend:
+    """
+    Challenge backend that keeps challenges in this process's memory.
+
+    Fast, but challenges are not shared between gunicorn workers, so it is only
+    suitable for a single worker (e.g. the development server).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # handle -> (purpose, challenge, user_id, expires_at)
+        self._challenges = {}
+
+    def save(self, handle, purpose, challenge, user_id, ttl):
+        with self._lock:
+            self._challenges[handle] = (purpose, challenge, user_id, time.monotonic() + ttl)
+
+    def pop(self, handle):
+        with self._lock:
+            entry = self._challenges.pop(handle, None)
+        if entry is None or entry[3] <= time.monotonic():
+            return None
+        return entry[:3]
+
+    def purge_expired(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [handle for handle, entry in self._challenges.items() if entry[3] <= now]
+            for handle in expired:
+                del self._challenges[handle]
+        return len(expired)
+
+
+class SQLChallengeBackend:
+    """
+    Challenge backend that stores challenges in the webauthn_challenge table.
+
+    Shared by all workers and instances using the same database. A challenge is
+    consumed with a DELETE, and only the request whose DELETE removed the row
+    may use it.
+    """
+
+    def save(self, handle, purpose, challenge, user_id, ttl):
+        db.session.add(WebAuthnChallenge(
+            handle=handle,
+            purpose=purpose,
+            challenge=challenge,
+            user_id=user_id,
+            expires_at=get_utc_time() + timedelta(seconds=ttl)
+        ))
+        db.session.commit()
+
+    def pop(self, handle):
+        row = db.session.query(
+            WebAuthnChallenge.purpose,
+            WebAuthnChallenge.challenge,
+            WebAuthnChallenge.user_id,
+            WebAuthnChallenge.expires_at
+        ).filter(WebAuthnChallenge.handle == handle).first()
+        if row is None:
+            return None
+        deleted = WebAuthnChallenge.query.filter(
+            WebAuthnChallenge.handle == handle
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        # Another request consumed it first, or it has expired
+        if not deleted or row.expires_at <= get_utc_time():
+            return None
+        return row.purpose, row.challenge, row.user_id
+
+    def purge_expired(self):
+        deleted = WebAuthnChallenge.query.filter(
+            WebAuthnChallenge.expires_at <= get_utc_time()
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+
+class ChallengeStore:
+    """
+    Single-use WebAuthn challenge store with expiry.
+
+    issue() saves a challenge and returns an opaque handle to keep in the
+    session cookie. consume() returns the challenge once and deletes it, so a
+    challenge cannot be replayed. Challenges older than WEBAUTHN_CHALLENGE_TTL
+    seconds are rejected and removed by purge_expired(). The backend is chosen
+    with WEBAUTHN_CHALLENGE_BACKEND ('sql' or 'memory').
+    """
+
+    def __init__(self, app=None):
+        self.backend = SQLChallengeBackend()
+        self.ttl = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configure the challenge store for a Flask application.
+
+        Args:
+            app: Flask application instance
+        """
+        backend = app.config.get('WEBAUTHN_CHALLENGE_BACKEND', 'sql')
+        if backend == 'memory':
+            self.backend = MemoryChallengeBackend()
+        elif backend == 'sql':
+            self.backend = SQLChallengeBackend()
+        else:
+            raise ValueError(f"Unknown WEBAUTHN_CHALLENGE_BACKEND: {backend}")
+        self.ttl = app.config.get('WEBAUTHN_CHALLENGE_TTL', 300)
+        app.extensions['challenge_store'] = self
+
+    def issue(self, purpose, challenge, user_id):
+        """
+        Store a new challenge.
+
+        Args:
+            purpose: 'registration' or 'authentication'
+            challenge: Challenge bytes sent to the browser
+            user_id: ID of the user the ceremony is for
+
+        Returns:
+            Opaque handle to store in the session
+        """
+        handle = secrets.token_urlsafe(24)
+        self.backend.save(handle, purpose, challenge, user_id, self.ttl)
+        return handle
+
+    def consume(self, handle, purpose):
+        """
+        Take a challenge out of the store (single use).
+
+        Args:
+            handle: Handle returned by issue()
+            purpose: Expected purpose - a registration challenge cannot complete an authentication
+
+        Returns:
+            Tuple of (challenge bytes, user_id), or None if unknown, expired, used or for another purpose
+        """
+        if not handle:
+            return None
+        entry = self.backend.pop(handle)
+        if entry is None or entry[0] != purpose:
+            return None
+        return entry[1], entry[2]
+
+    def purge_expired(self):
+        """
+        Delete expired challenges (run periodically by the maintenance scheduler).
+
+        Returns:
+            Number of challenges deleted
+        """
+        return self.backend.purge_expired()
+
+
+# Shared challenge store instance, initialized with the app in app.py
+challenge_store = ChallengeStore()
@@ -76,4 +76,115 @@ class Config:
         }
     else:
         # No special engine options needed for SQLite
-        SQLALCHEMY_ENGINE_OPTIONS = {}
\ No newline at end of file
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+    
+    # Class variables: Write-behind buffer settings for session activity tracking
+    # last_activity updates are merged in memory and written in one batched UPDATE
+    # SESSION_ACTIVITY_FLUSH_INTERVAL: Seconds between background flushes
+    # SESSION_ACTIVITY_FLUSH_SIZE: Number of pending sessions that forces an early flush
+    # SESSION_ACTIVITY_KNOWN_SESSIONS: Session ids remembered per worker as existing rows (least recently used are evicted)
+    SESSION_ACTIVITY_FLUSH_INTERVAL = int(os.environ.get('SESSION_ACTIVITY_FLUSH_INTERVAL', '30'))
+    SESSION_ACTIVITY_FLUSH_SIZE = int(os.environ.get('SESSION_ACTIVITY_FLUSH_SIZE', '500'))
+    SESSION_ACTIVITY_KNOWN_SESSIONS = int(os.environ.get('SESSION_ACTIVITY_KNOWN_SESSIONS', '10000'))
+    
+    # Class variable: Seconds between runs of the background expired session reaper
+    # Expired ActiveSession rows are deleted with one bulk DELETE (0 disables the reaper)
+    SESSION_REAPER_INTERVAL = int(os.environ.get('SESSION_REAPER_INTERVAL', '300'))
+    
+    # Class variables: Email outbox worker pool settings
+    # EMAIL_OUTBOX_WORKERS: Number of background threads sending queued emails per process
+    # EMAIL_OUTBOX_MAX_ATTEMPTS: Delivery attempts before a message is marked failed
+    # EMAIL_OUTBOX_BACKOFF_BASE: Seconds before the first retry (doubles on each retry)
+    # EMAIL_OUTBOX_POLL_INTERVAL: Seconds an idle worker waits before checking for due retries
+    # EMAIL_OUTBOX_CLAIM_TIMEOUT: Seconds after which a message stuck in 'sending' is retried
+    # EMAIL_OUTBOX_BATCH_SIZE: Most messages sent in one SendGrid API call (SendGrid allows up to 1000)
+    # EMAIL_OUTBOX_RETENTION: Seconds sent and failed messages (which contain the code) are kept
+    # EMAIL_OUTBOX_PURGE_INTERVAL: Seconds between purges of old sent and failed messages (0 disables)
+    EMAIL_OUTBOX_WORKERS = int(os.environ.get('EMAIL_OUTBOX_WORKERS', '4'))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+    EMAIL_OUTBOX_BACKOFF_BASE = int(os.environ.get('EMAIL_OUTBOX_BACKOFF_BASE', '5'))
+    EMAIL_OUTBOX_POLL_INTERVAL = int(os.environ.get('EMAIL_OUTBOX_POLL_INTERVAL', '5'))
+    EMAIL_OUTBOX_CLAIM_TIMEOUT = int(os.environ.get('EMAIL_OUTBOX_CLAIM_TIMEOUT', '300'))
+    EMAIL_OUTBOX_BATCH_SIZE = min(int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', '50')), 1000)
+    EMAIL_OUTBOX_RETENTION = int(os.environ.get('EMAIL_OUTBOX_RETENTION', '900'))
+    EMAIL_OUTBOX_PURGE_INTERVAL = int(os.environ.get('EMAIL_OUTBOX_PURGE_INTERVAL', '300'))
+    
+    # User cache settings (per-worker cache of the logged-in user used by load_user)
+    # USER_CACHE_SIZE: Most user snapshots kept per worker (least recently used are evicted)
+    # USER_CACHE_TTL: Seconds a snapshot is reused before it is reloaded (0 disables the cache)
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '1024'))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', '60'))
+    
+    # WebAuthn challenge store settings
+    # WEBAUTHN_CHALLENGE_BACKEND: 'sql' (shared by all workers) or 'memory' (single worker only)
+    # WEBAUTHN_CHALLENGE_TTL: Seconds a begin/complete ceremony may take before the challenge expires
+    # WEBAUTHN_CHALLENGE_PURGE_INTERVAL: Seconds between purges of expired challenges (0 disables)
+    WEBAUTHN_CHALLENGE_BACKEND = os.environ.get('WEBAUTHN_CHALLENGE_BACKEND', 'sql').lower()
+    WEBAUTHN_CHALLENGE_TTL = int(os.environ.get('WEBAUTHN_CHALLENGE_TTL', '300'))
+    WEBAUTHN_CHALLENGE_PURGE_INTERVAL = int(os.environ.get('WEBAUTHN_CHALLENGE_PURGE_INTERVAL', '600'))
+    
+    # TOTP (authenticator app) verification settings
+    # TOTP_VALID_WINDOW: Extra 30-second time steps accepted before/after the current one for clock drift
+    # TOTP_CACHE_SIZE: TOTP instances and recently used codes kept per worker
+    TOTP_VALID_WINDOW = int(os.environ.get('TOTP_VALID_WINDOW', '0'))
+    TOTP_CACHE_SIZE = int(os.environ.get('TOTP_CACHE_SIZE', '1024'))
+    
+    # Rate limits for login and code-issuing endpoints, as 'requests/seconds' (empty disables a limit)
+    # RATE_LIMIT_ENABLED: Set to false to turn all rate limits off
+    # RATE_LIMIT_LOGIN_USER / _IP: Login attempts (form, RFID, WebAuthn) per username / per client IP
+    # RATE_LIMIT_EMAIL_CODE_USER / _IP: Verification emails requested per username / per client IP
+    # RATE_LIMIT_BACKEND: 'sql' (shared by all workers and instances, one upsert per key and a commit
+    #   per request) or 'memory' (counted per worker, no database access - recommended for a single instance)
+    # RATE_LIMIT_PROXY_COUNT: Reverse proxies in front of the app that append to X-Forwarded-For
+    #   (defaults to 1 on Render, detected by the RENDER / RENDER_EXTERNAL_URL variables it sets, otherwise 0)
+    # RATE_LIMIT_PURGE_INTERVAL: Seconds between purges of expired counters (0 disables)
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ['true', 'on', '1']
+    RATE_LIMIT_LOGIN_USER = os.environ.get('RATE_LIMIT_LOGIN_USER', '10/300')
+    RATE_LIMIT_LOGIN_IP = os.environ.get('RATE_LIMIT_LOGIN_IP', '100/300')
+    RATE_LIMIT_EMAIL_CODE_USER = os.environ.get('RATE_LIMIT_EMAIL_CODE_USER', '5/600')
+    RATE_LIMIT_EMAIL_CODE_IP = os.environ.get('RATE_LIMIT_EMAIL_CODE_IP', '30/600')
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'sql').lower()
+    RATE_LIMIT_PROXY_COUNT = int(os.environ.get(
+        'RATE_LIMIT_PROXY_COUNT',
+        '1' if os.environ.get('RENDER') or os.environ.get('RENDER_EXTERNAL_URL') else '0'
+    ))
+    RATE_LIMIT_PURGE_INTERVAL = int(os.environ.get('RATE_LIMIT_PURGE_INTERVAL', '600'))
+    
+    # Login attempt audit log settings
+    # AUDIT_LOG_MODE: 'mixed' (successes committed immediately, failures batched), 'sync' or 'async'
+    # AUDIT_LOG_QUEUE_SIZE: Most queued records per worker (a full queue is flushed by the next request)
+    # AUDIT_LOG_BATCH_SIZE: Queued records that trigger an immediate background flush
+    # AUDIT_LOG_FLUSH_INTERVAL: Seconds between background flushes
+    AUDIT_LOG_MODE = os.environ.get('AUDIT_LOG_MODE', 'mixed').lower()
+    AUDIT_LOG_QUEUE_SIZE = int(os.environ.get('AUDIT_LOG_QUEUE_SIZE', '10000'))
+    AUDIT_LOG_BATCH_SIZE = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', '200'))
+    AUDIT_LOG_FLUSH_INTERVAL = int(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', '2'))
+    
+    # Device fingerprint tracking settings
+    # DEVICE_FINGERPRINT_TOUCH_INTERVAL: Seconds a stored device is not written again (last_seen_at precision, 0 writes every time)
+    # DEVICE_FINGERPRINT_CACHE_SIZE: Recently seen devices remembered per worker
+    DEVICE_FINGERPRINT_TOUCH_INTERVAL = int(os.environ.get('DEVICE_FINGERPRINT_TOUCH_INTERVAL', '300'))
+    DEVICE_FINGERPRINT_CACHE_SIZE = int(os.environ.get('DEVICE_FINGERPRINT_CACHE_SIZE', '4096'))
+    
+    # Class variable: Seconds between recounts of the admin dashboard totals (0 disables)
+    # The totals are kept up to date incrementally; the recount only corrects drift
+    SITE_STATS_RECONCILE_INTERVAL = int(os.environ.get('SITE_STATS_RECONCILE_INTERVAL', '3600'))
+    
+    # Class variable: Lock file deciding which worker runs single-worker maintenance jobs when the
+    # database is not PostgreSQL (default: maintenance.lock in the instance folder)
+    MAINTENANCE_LOCK_FILE = os.environ.get('MAINTENANCE_LOCK_FILE')
+    
+    # Login attempt retention - older attempts are moved out of the login_attempt table
+    # LOGIN_RETENTION_DAYS: Days of login attempts kept in login_attempt (0 keeps everything)
+    # LOGIN_ARCHIVE_TARGET: 'table' (login_attempt_archive, partitioned by month on PostgreSQL)
+    #   or 'file' (gzip-compressed JSONL, one file per month)
+    # LOGIN_ARCHIVE_DIR: Directory for archive files (default: instance/login_archive)
+    # LOGIN_RETENTION_BATCH_SIZE: Rows moved per transaction
+    # LOGIN_RETENTION_MAX_BATCHES: Batches per scheduled run (the rest is moved on the next run)
+    # LOGIN_RETENTION_INTERVAL: Seconds between scheduled runs (0 disables the job)
+    LOGIN_RETENTION_DAYS = int(os.environ.get('LOGIN_RETENTION_DAYS', '0'))
+    LOGIN_ARCHIVE_TARGET = os.environ.get('LOGIN_ARCHIVE_TARGET', 'table').lower()
+    LOGIN_ARCHIVE_DIR = os.environ.get('LOGIN_ARCHIVE_DIR', '')
+    LOGIN_RETENTION_BATCH_SIZE = int(os.environ.get('LOGIN_RETENTION_BATCH_SIZE', '1000'))
+    LOGIN_RETENTION_MAX_BATCHES = int(os.environ.get('LOGIN_RETENTION_MAX_BATCHES', '100'))
+    LOGIN_RETENTION_INTERVAL = int(os.environ.get('LOGIN_RETENTION_INTERVAL', '3600'))
@@ -0,0 +1,214 @@
+# ------------------------------------------------------------------------------------
+# device_fingerprint.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for hashing device
+# characteristics and recording the devices each user logs in from, skipping
+# the database write for devices that were seen recently.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    app.py - Device fingerprint API endpoint
+#    login_service.py - Records the device as part of every successful login
+#    models.py - DeviceFingerprint model and upsert helper
+#    config.py - Touch interval and cache size settings
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statements: Standard library modules used for fingerprints
+# hashlib: SHA-256 hash of the device characteristics
+# json: Canonical serialization of the device characteristics
+# threading: Lock for the recently seen cache
+# time: Monotonic clock for the recently seen cache
+import hashlib
+import json
+import threading
+import time
+
+# Python import statement: Imports OrderedDict (least recently used cache order) and namedtuple
+from collections import OrderedDict, namedtuple
+
+# Python import statement: Imports the DeviceFingerprint model, db instance and upsert helper
+from models import DeviceFingerprint, db, upsert_insert
+
+# Python import statement: Imports the EST time helper used for last_seen_at
+from auth import get_est_time
+
+
+# Stored device returned by DeviceFingerprintService.store()
+FingerprintRecord = namedtuple('FingerprintRecord', ['id', 'is_trusted'])
+
+
+def create_device_fingerprint(device_info, user_agent, ip_address):
+    """
+    Create a hash from device characteristics.
+
+    Args:
+        device_info: Dictionary of browser-reported device details (may be empty)
+        user_agent: User-Agent header
+        ip_address: Client IP address
+
+    Returns:
+        64-character hex SHA-256 digest
+    """
+    fingerprint_string = json.dumps({
+        'device_info': device_info,
+        'user_agent': user_agent,
+        'ip': ip_address
+    }, sort_keys=True)
+    return hashlib.sha256(fingerprint_string.encode()).hexdigest()
+
+
+class DeviceFingerprintService:
+    """
+    Records device fingerprints with as few database writes as possible.
+
+    Each worker remembers the (user_id, fingerprint_hash) pairs it stored in
+    the last DEVICE_FINGERPRINT_TOUCH_INTERVAL seconds (LRU, at most
+    DEVICE_FINGERPRINT_CACHE_SIZE entries). Seeing such a device again does
+    not touch the database, so last_seen_at is accurate to within that
+    interval. Otherwise the row is written with one INSERT ... ON CONFLICT
+    (fingerprint_hash) DO UPDATE statement on SQLite and PostgreSQL, instead
+    of a SELECT followed by an INSERT or UPDATE.
+
+    fingerprint_hash is unique across all users. A device already stored
+    for another user is left unchanged, and store() returns None for it.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        # (user_id, fingerprint_hash) -> (FingerprintRecord, expires_at)
+        self._recent = OrderedDict()
+        self.touch_interval = 300
+        self.cache_size = 4096
+        self.writes = 0
+        self.skipped = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configure the service for a Flask application.
+
+        Args:
+            app: Flask application instance
+        """
+        self.touch_interval = app.config.get('DEVICE_FINGERPRINT_TOUCH_INTERVAL', 300)
+        self.cache_size = app.config.get('DEVICE_FINGERPRINT_CACHE_SIZE', 4096)
+        app.extensions['device_fingerprints'] = self
+
+    def store(self, user_id, fingerprint_hash, device_info, user_agent, ip_address, commit=True):
+        """
+        Store a device fingerprint or update its last_seen_at.
+
+        Args:
+            user_id: User ID the device belongs to
+            fingerprint_hash: Hash from create_device_fingerprint()
+            device_info: Dictionary of browser-reported device details (may be empty)
+            user_agent: User-Agent header
+            ip_address: Client IP address
+            commit: False to leave the commit to the caller (e.g. the login transaction)
+
+        Returns:
+            FingerprintRecord (id, is_trusted), or None if it could not be stored
+        """
+        key = (user_id, fingerprint_hash)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._recent.get(key)
+            if entry is not None and entry[1] > now:
+                self._recent.move_to_end(key)
+                self.skipped += 1
+                return entry[0]
+
+        try:
+            values = {
+                'user_id': user_id,
+                'fingerprint_hash': fingerprint_hash,
+                'device_info': json.dumps(device_info) if device_info else None,
+                'user_agent': user_agent,
+                'ip_address': ip_address,
+                'is_trusted': False,  # New devices start as untrusted
+                'last_seen_at': get_est_time()
+            }
+            insert = upsert_insert(DeviceFingerprint)
+            if insert is not None:
+                record = self._upsert(insert, values)
+            else:
+                record = self._select_and_write(values)
+            if commit:
+                db.session.commit()
+        except Exception as e:
+            print(f"Error storing device fingerprint: {e}")
+            if commit:
+                db.session.rollback()
+            return None
+
+        with self._lock:
+            self.writes += 1
+            # Devices owned by another user (record None) are cached too, so they are not retried
+            if self.touch_interval > 0:
+                self._recent[key] = (record, now + self.touch_interval)
+                self._recent.move_to_end(key)
+                while len(self._recent) > self.cache_size:
+                    self._recent.popitem(last=False)
+        return record
+
+    def forget(self, user_id, fingerprint_hash):
+        """
+        Drop a device from the recently seen cache, e.g. after its write was rolled back.
+
+        Args:
+            user_id: User ID the device belongs to
+            fingerprint_hash: Hash from create_device_fingerprint()
+        """
+        with self._lock:
+            self._recent.pop((user_id, fingerprint_hash), None)
+
+    def _upsert(self, insert, values):
+        table = DeviceFingerprint.__table__
+        statement = insert.values(**values).on_conflict_do_update(
+            index_elements=[table.c.fingerprint_hash],
+            set_={
+                'last_seen_at': insert.excluded.last_seen_at,
+                'device_info': insert.excluded.device_info
+            },
+            # Never take over a device row that belongs to another user
+            where=table.c.user_id == insert.excluded.user_id
+        ).returning(table.c.id, table.c.is_trusted)
+        # SAVEPOINT: a failed upsert must not abort the caller's transaction (e.g. the login commit on PostgreSQL)
+        with db.session.begin_nested():
+            row = db.session.execute(statement).first()
+        return FingerprintRecord(row.id, row.is_trusted) if row is not None else None
+
+    def _select_and_write(self, values):
+        # Databases without ON CONFLICT - SELECT, then INSERT or UPDATE inside a SAVEPOINT
+        with db.session.begin_nested():
+            fingerprint = DeviceFingerprint.query.filter_by(
+                user_id=values['user_id'],
+                fingerprint_hash=values['fingerprint_hash']
+            ).first()
+            if fingerprint:
+                fingerprint.last_seen_at = values['last_seen_at']
+                fingerprint.device_info = values['device_info']
+            else:
+                fingerprint = DeviceFingerprint(**values)
+                db.session.add(fingerprint)
+        return FingerprintRecord(fingerprint.id, fingerprint.is_trusted)
+
+
+# Shared service instance, initialized with the app in app.py
+device_fingerprints = DeviceFingerprintService()
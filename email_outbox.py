@@ -0,0 +1,284 @@
+# ------------------------------------------------------------------------------------
+# email_outbox.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for queueing verification
+# emails in a durable outbox table and delivering them with a background worker
+# pool, with retry and exponential backoff.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    app.py - Send code and delivery status endpoints
+#    email_service.py - Email transports used to deliver messages
+#    models.py - EmailOutbox model
+#    config.py - Worker pool and retry settings
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statements: Standard library modules used by the worker pool
+# atexit: Stops the workers when the process exits
+# threading: Worker threads and wake-up signalling
+import atexit
+import threading
+
+# Python import statement: Imports timedelta for retry backoff calculations
+from datetime import timedelta
+
+# Python import statement: Imports SQL helpers for claiming messages
+from sqlalchemy import and_, or_
+
+# Python import statement: Imports the EmailOutbox model and db instance
+from models import EmailOutbox, db
+
+# Python import statement: Imports the UTC time helper
+from auth import get_utc_time
+
+# Python import statement: Imports the email sending functions
+# send_email_code: Sends a verification code via SendGrid or SMTP
+# send_email_batch_via_sendgrid: Sends several codes in one SendGrid API call
+# get_sendgrid_api_key: SendGrid API key, or None when SendGrid is not configured
+from email_service import send_email_code, send_email_batch_via_sendgrid, get_sendgrid_api_key
+
+
+class EmailOutboxWorker:
+    """
+    Bounded pool of background threads that deliver queued EmailOutbox messages.
+
+    Messages are claimed with a conditional UPDATE (status 'pending' -> 'sending'),
+    so several threads and several gunicorn workers can share one outbox without
+    sending a message twice. Failed deliveries are retried with exponential
+    backoff until EMAIL_OUTBOX_MAX_ATTEMPTS is reached. Messages claimed by a
+    worker that died are picked up again after EMAIL_OUTBOX_CLAIM_TIMEOUT seconds.
+    When SendGrid is configured, a worker claims up to EMAIL_OUTBOX_BATCH_SIZE
+    due messages and sends them in a single SendGrid API call.
+
+    Sent and failed messages still hold the plaintext verification code, so
+    purge_finished() deletes them EMAIL_OUTBOX_RETENTION seconds after their
+    last delivery attempt (run periodically by the maintenance scheduler).
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._app = None
+        self.worker_count = 4
+        self.max_attempts = 5
+        self.backoff_base = 5
+        self.poll_interval = 5
+        self.claim_timeout = 300
+        self.batch_size = 50
+        self.retention = 900
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configure the worker pool for a Flask application.
+
+        Args:
+            app: Flask application instance
+        """
+        self._app = app
+        self.worker_count = app.config.get('EMAIL_OUTBOX_WORKERS', 4)
+        self.max_attempts = app.config.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+        self.backoff_base = app.config.get('EMAIL_OUTBOX_BACKOFF_BASE', 5)
+        self.poll_interval = app.config.get('EMAIL_OUTBOX_POLL_INTERVAL', 5)
+        self.claim_timeout = app.config.get('EMAIL_OUTBOX_CLAIM_TIMEOUT', 300)
+        self.batch_size = app.config.get('EMAIL_OUTBOX_BATCH_SIZE', 50)
+        self.retention = app.config.get('EMAIL_OUTBOX_RETENTION', 900)
+        app.extensions['email_outbox'] = self
+        atexit.register(self.stop)
+
+    def enqueue(self, email_address, code, username):
+        """
+        Add a message to the outbox in the current database session.
+        The caller commits (together with the verification code) and then calls notify().
+
+        Args:
+            email_address: Recipient email address
+            code: Verification code to send
+            username: Username the code belongs to
+
+        Returns:
+            The new EmailOutbox object
+        """
+        message = EmailOutbox(
+            email=email_address,
+            username=username,
+            code=code,
+            status='pending',
+            attempts=0,
+            next_attempt_at=get_utc_time()
+        )
+        db.session.add(message)
+        return message
+
+    def notify(self):
+        """Start the workers if needed and wake one up to deliver new messages."""
+        self.start()
+        self._wake_event.set()
+
+    def start(self):
+        """Start the worker threads if they are not already running."""
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.worker_count:
+                thread = threading.Thread(
+                    target=self._run_worker,
+                    name=f'email-outbox-{len(self._threads)}',
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        """Signal the worker threads to stop after their current message."""
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def get_status(self, message_id):
+        """
+        Get the delivery status of a queued message.
+
+        Args:
+            message_id: EmailOutbox ID returned when the message was queued
+
+        Returns:
+            EmailOutbox object, or None if not found
+        """
+        return db.session.get(EmailOutbox, message_id)
+
+    def purge_finished(self):
+        """
+        Delete sent and failed messages older than EMAIL_OUTBOX_RETENTION seconds
+        (run periodically by the maintenance scheduler).
+
+        next_attempt_at is the time of the last delivery attempt, so the
+        (status, next_attempt_at) index serves the DELETE.
+
+        Returns:
+            Number of messages deleted
+        """
+        deleted = EmailOutbox.query.filter(
+            EmailOutbox.status.in_(['sent', 'failed']),
+            EmailOutbox.next_attempt_at < get_utc_time() - timedelta(seconds=self.retention)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def _run_worker(self):
+        while not self._stop_event.is_set():
+            try:
+                with self._app.app_context():
+                    delivered = self._process_next()
+            except Exception as e:
+                print(f"Email outbox worker error: {e}")
+                delivered = False
+            if not delivered:
+                # Nothing due - sleep until new mail is queued or the poll interval passes
+                self._wake_event.wait(self.poll_interval)
+                self._wake_event.clear()
+
+    def _process_next(self):
+        api_key = get_sendgrid_api_key()
+        messages = self._claim(self.batch_size if api_key else 1)
+        if not messages:
+            return False
+        if len(messages) > 1:
+            self._deliver_batch(messages, api_key)
+        else:
+            self._deliver(messages[0])
+        return True
+
+    def _claim(self, limit):
+        now = get_utc_time()
+        stale_before = now - timedelta(seconds=self.claim_timeout)
+        due = or_(
+            and_(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now),
+            and_(EmailOutbox.status == 'sending', EmailOutbox.locked_at < stale_before)
+        )
+        # Remember each candidate's state as read - a claim only succeeds if it is unchanged
+        candidates = [
+            (message.id, message.status, message.locked_at)
+            for message in EmailOutbox.query.filter(due).order_by(EmailOutbox.next_attempt_at).limit(limit)
+        ]
+        claimed_ids = []
+        for message_id, status, locked_at in candidates:
+            # Conditional UPDATE - only one worker can move a message to 'sending'
+            claimed = EmailOutbox.query.filter(
+                EmailOutbox.id == message_id,
+                EmailOutbox.status == status,
+                EmailOutbox.locked_at == locked_at
+            ).update({'status': 'sending', 'locked_at': now}, synchronize_session=False)
+            if claimed:
+                claimed_ids.append(message_id)
+        db.session.commit()
+        if not claimed_ids:
+            return []
+        return EmailOutbox.query.filter(EmailOutbox.id.in_(claimed_ids)).order_by(EmailOutbox.id).all()
+
+    def _deliver(self, message):
+        try:
+            if not send_email_code(message.email, message.code, message.username):
+                raise Exception('Email service returned False')
+            self._mark_sent(message)
+        except Exception as e:
+            self._record_failure(message, e)
+        message.attempts += 1
+        message.locked_at = None
+        db.session.commit()
+
+    def _deliver_batch(self, messages, api_key):
+        try:
+            send_email_batch_via_sendgrid(
+                [(message.email, message.code, message.username) for message in messages],
+                api_key
+            )
+        except Exception as e:
+            # Batch rejected - deliver one by one so a bad address only fails its own message
+            print(f"[WARNING] SendGrid batch of {len(messages)} failed, sending individually: {e}")
+            for message in messages:
+                self._deliver(message)
+            return
+        for message in messages:
+            self._mark_sent(message)
+            message.attempts += 1
+            message.locked_at = None
+        db.session.commit()
+
+    def _mark_sent(self, message):
+        message.status = 'sent'
+        message.sent_at = get_utc_time()
+        message.last_error = None
+        print(f"[SUCCESS] Email sent successfully to {message.email}")
+
+    def _record_failure(self, message, error):
+        message.last_error = str(error)
+        if message.attempts + 1 >= self.max_attempts:
+            message.status = 'failed'
+            print(f"[ERROR] Giving up on email to {message.email} after {message.attempts + 1} attempts: {error}")
+        else:
+            # Exponential backoff: base, 2*base, 4*base, ... seconds
+            delay = self.backoff_base * (2 ** message.attempts)
+            message.status = 'pending'
+            message.next_attempt_at = get_utc_time() + timedelta(seconds=delay)
+            print(f"[WARNING] Email to {message.email} failed, retrying in {delay}s: {error}")
+
+
+# Shared worker pool instance, initialized with the app in app.py
+email_outbox = EmailOutboxWorker()
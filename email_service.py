@@ -49,6 +49,14 @@ import smtplib
 # Used for handling socket timeout exceptions
 import socket
 
+# Python import statements: Standard library modules used by the SMTP connection pool
+# atexit: Closes pooled connections when the process exits
+# threading: Locks and per-thread connections shared between sender threads
+# time: Monotonic clock for idle connection timeouts
+import atexit
+import threading
+import time
+
 # Python import statement: Imports MIMEText class for creating plain text email messages
 # MIMEText is used to create email body content
 from email.mime.text import MIMEText
@@ -61,88 +69,183 @@ from email.mime.multipart import MIMEMultipart
 # Header handles UTF-8 encoding for non-ASCII characters in email subjects
 from email.header import Header
 
-# Python import statement: Imports urllib for HTTP requests (used for SendGrid API)
-# urllib.request and urllib.error are used to make HTTP POST requests to SendGrid
-try:
-    import urllib.request
-    import urllib.error
-    import urllib.parse
-    import json
-except ImportError:
-    pass  # Will use SMTP fallback if urllib not available
+# Python import statement: Imports Jinja2 classes for the email templates
+# Environment: Parses and compiles each template once and caches the compiled version
+# FileSystemLoader: Loads templates from templates/email
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 
+# Python import statements: Imports modules for the SendGrid HTTP API
+# http.client: Persistent keep-alive HTTPS connections to SendGrid
+# json: Serializes the SendGrid request payload
+# urllib.parse: Splits the SendGrid API URL into scheme, host and path
+import http.client
+import json
+import urllib.parse
 
-# Python function definition: Function to send email via SendGrid API (works on Render free tier)
-def send_email_via_sendgrid(email_address, code, username, api_key):
+
+class SendGridClient:
     """
-    Send verification code via SendGrid API.
-    This works on Render free tier since it uses HTTP API instead of SMTP.
+    Keep-alive HTTP client for the SendGrid v3 mail send API.
+
+    Each thread keeps its own open connection (http.client connections are not
+    thread-safe), so consecutive sends skip the TCP and TLS setup. A connection
+    the server closed between requests is reopened and the request is sent once
+    more; timeouts are not retried, since the message may already be accepted.
     """
-    from_email = os.environ.get('FROM_EMAIL', 'noreply@campuskey.com')
-    subject = "CAMPUSKEY Verification Code"
-    
-    # HTML email template (same as SMTP version)
-    html_body = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    </head>
-    <body style="margin: 0; padding: 0; font-family: 'Google Sans', Roboto, Arial, sans-serif; background-color: #202124; color: #e8eaed;">
-        <table width="100%" cellpadding="0" cellspacing="0" style="background-color: #202124; padding: 20px;">
-            <tr>
-                <td align="center">
-                    <table width="600" cellpadding="0" cellspacing="0" style="background-color: #202124; max-width: 600px;">
-                        <tr>
-                            <td style="background-color: #1a73e8; padding: 24px 32px; text-align: center;">
-                                <h1 style="margin: 0; color: #ffffff; font-size: 22px; font-weight: 400; letter-spacing: 0.25px;">CAMPUSKEY Verification Code</h1>
-                            </td>
-                        </tr>
-                        <tr>
-                            <td style="background-color: #202124; padding: 32px; color: #e8eaed; font-size: 14px; line-height: 20px;">
-                                <p style="margin: 0 0 16px 0; color: #e8eaed;">Dear CAMPUSKEY User,</p>
-                                <p style="margin: 0 0 16px 0; color: #e8eaed;">
-                                    We received a request to access your CAMPUSKEY Account
-                                    <span style="color: #8ab4f8; text-decoration: underline;">{email_address}</span>
-                                    through your email address. Your CAMPUSKEY verification code is:
-                                </p>
-                                <div style="margin: 24px 0; text-align: center;">
-                                    <div style="font-size: 36px; font-weight: 400; color: #e8eaed; letter-spacing: 8px; font-family: 'Courier New', monospace;">
-                                        {code}
-                                    </div>
-                                </div>
-                                <p style="margin: 16px 0; color: #e8eaed;">
-                                    If you did not request this code, it is possible that someone else is trying to access the CAMPUSKEY Account
-                                    <span style="color: #8ab4f8; text-decoration: underline;">{email_address}</span>.
-                                    Do not forward or give this code to anyone.
-                                </p>
-                                <p style="margin: 24px 0 0 0; color: #e8eaed;">Sincerely yours,</p>
-                                <p style="margin: 4px 0 0 0; color: #e8eaed;">The CAMPUSKEY Security Team</p>
-                            </td>
-                        </tr>
-                    </table>
-                </td>
-            </tr>
-        </table>
-    </body>
-    </html>
+
+    def __init__(self, base_url='https://api.sendgrid.com', timeout=15):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.scheme = parsed.scheme
+        self.host = parsed.netloc
+        self.path = parsed.path.rstrip('/') + '/v3/mail/send'
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def send(self, payload, api_key):
+        """
+        POST a mail send payload to SendGrid.
+
+        Args:
+            payload: SendGrid v3 mail send request as a dictionary
+            api_key: SendGrid API key
+
+        Returns:
+            True when SendGrid accepted the request (HTTP 202)
+
+        Raises:
+            Exception: If SendGrid rejected the request or could not be reached
+        """
+        body = json.dumps(payload).encode('utf-8')
+        headers = {
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {api_key}'
+        }
+        for attempt in range(2):
+            connection = getattr(self._local, 'connection', None)
+            reused = connection is not None
+            if connection is None:
+                connection = self._local.connection = self._open_connection()
+            try:
+                connection.request('POST', self.path, body=body, headers=headers)
+                response = connection.getresponse()
+                # Read the whole body so the connection can be reused
+                response_body = response.read().decode('utf-8', 'replace')
+            except ConnectionError:
+                # Keep-alive connection was closed by the server - reconnect once
+                self.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                self.close()
+                raise
+            if response.will_close:
+                self.close()
+            if response.status == 202:  # SendGrid returns 202 for accepted
+                return True
+            raise Exception(f"SendGrid API error: {response.status} - {response_body}")
+
+    def close(self):
+        """Close this thread's connection."""
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            connection.close()
+
+    def _open_connection(self):
+        if self.scheme == 'http':
+            return http.client.HTTPConnection(self.host, timeout=self.timeout)
+        return http.client.HTTPSConnection(self.host, timeout=self.timeout)
+
+
+# Python object creation: Shared SendGrid client used by the SendGrid send functions
+sendgrid_client = SendGridClient()
+
+
+# Python function definition: Gets the SendGrid API key when SendGrid is the configured email service
+def get_sendgrid_api_key():
     """
-    
-    text_body = f"""Dear CAMPUSKEY User,
+    Get the SendGrid API key if EMAIL_SERVICE is 'sendgrid'.
 
-We received a request to access your CAMPUSKEY Account {email_address} through your email address. Your CAMPUSKEY verification code is:
+    Returns:
+        API key string, or None if SendGrid is not configured
+    """
+    if os.environ.get('EMAIL_SERVICE', '').lower() == 'sendgrid':
+        return os.environ.get('SENDGRID_API_KEY') or None
+    return None
 
-{code}
 
-If you did not request this code, it is possible that someone else is trying to access the CAMPUSKEY Account {email_address}. Do not forward or give this code to anyone.
+# Python object creation: Jinja2 environment for the email templates in templates/email
+# auto_reload=False: Templates are compiled on first use and never re-checked on disk
+# autoescape: HTML templates escape the email address and code, text templates do not
+email_templates = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'email')),
+    autoescape=select_autoescape(['html']),
+    auto_reload=False,
+    trim_blocks=True,
+    cache_size=-1
+)
 
-Sincerely yours,
-The CAMPUSKEY Security Team
-"""
-    
-    # SendGrid API v3 endpoint
-    url = "https://api.sendgrid.com/v3/mail/send"
+# Python constant: Subject line of the verification code email
+VERIFICATION_SUBJECT = "CAMPUSKEY Verification Code"
+
+
+# Python function definition: Renders the verification email bodies from the cached templates
+def render_verification_email(email_address, code):
+    """
+    Render the plain text and HTML bodies of the verification code email.
+
+    Both transports (SendGrid and SMTP) use this function. The templates are
+    compiled once per process, so each call only fills in the email address
+    and code.
+
+    Args:
+        email_address: Recipient email address (or a SendGrid substitution tag)
+        code: Verification code (or a SendGrid substitution tag)
+
+    Returns:
+        Tuple of (text_body, html_body)
+    """
+    text_body = email_templates.get_template('verification_code.txt').render(email_address=email_address, code=code)
+    html_body = email_templates.get_template('verification_code.html').render(email_address=email_address, code=code)
+    return text_body, html_body
+
+
+# Python function definition: Builds a multipart MIME message for SMTP delivery
+def build_mime_message(from_email, to_email, subject, text_body, html_body):
+    """
+    Build a multipart/alternative email with plain text and HTML versions.
+
+    Args:
+        from_email: Sender address
+        to_email: Recipient address
+        subject: Subject line
+        text_body: Plain text version
+        html_body: HTML version
+
+    Returns:
+        MIMEMultipart message
+    """
+    # 'alternative' allows both HTML and plain text versions
+    msg = MIMEMultipart('alternative')
+    msg['From'] = from_email
+    msg['To'] = to_email
+    # Header() ensures proper encoding for special characters
+    msg['Subject'] = Header(subject, 'utf-8')
+    msg.attach(MIMEText(text_body, 'plain', 'utf-8'))
+    msg.attach(MIMEText(html_body, 'html', 'utf-8'))
+    return msg
+
+
+# Python function definition: Function to send email via SendGrid API (works on Render free tier)
+def send_email_via_sendgrid(email_address, code, username, api_key):
+    """
+    Send verification code via SendGrid API.
+    This works on Render free tier since it uses HTTP API instead of SMTP.
+    """
+    from_email = os.environ.get('FROM_EMAIL', 'noreply@campuskey.com')
+    subject = VERIFICATION_SUBJECT
+    text_body, html_body = render_verification_email(email_address, code)
     
     # Prepare email data
     email_data = {
@@ -163,7 +266,7 @@ The CAMPUSKEY Security Team
         ]
     }
     
-    # Make HTTP request to SendGrid
+    # Make HTTP request to SendGrid over the keep-alive connection
     try:
         print(f"\n{'='*60}")
         print(f"SENDING EMAIL VIA SENDGRID API")
@@ -172,28 +275,246 @@ The CAMPUSKEY Security Team
         print(f"   To: {email_address}")
         print(f"   Subject: {subject}")
         
-        data = json.dumps(email_data).encode('utf-8')
-        req = urllib.request.Request(url, data=data)
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {api_key}')
-        
-        with urllib.request.urlopen(req, timeout=15) as response:
-            if response.status == 202:  # SendGrid returns 202 for accepted
-                print(f"[SUCCESS] Email sent successfully via SendGrid!")
-                print(f"{'='*60}\n")
-                return True
-            else:
-                raise Exception(f"SendGrid API returned status {response.status}")
-                
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode('utf-8')
-        print(f"[ERROR] SendGrid API error: {e.code} - {error_body}")
-        raise Exception(f"SendGrid API error: {e.code} - {error_body}")
+        sendgrid_client.send(email_data, api_key)
+        print(f"[SUCCESS] Email sent successfully via SendGrid!")
+        print(f"{'='*60}\n")
+        return True
     except Exception as e:
         print(f"[ERROR] SendGrid request failed: {str(e)}")
         raise
 
 
+# Python function definition: Function to send several verification codes in one SendGrid API call
+def send_email_batch_via_sendgrid(messages, api_key):
+    """
+    Send several verification codes in a single SendGrid API request.
+
+    Every recipient gets its own personalization, and the shared email body
+    contains substitution tags that SendGrid replaces with that recipient's
+    email address and code. SendGrid accepts up to 1000 personalizations per request.
+
+    Args:
+        messages: List of (email_address, code, username) tuples
+        api_key: SendGrid API key
+
+    Returns:
+        True when SendGrid accepted the batch
+    """
+    from_email = os.environ.get('FROM_EMAIL', 'noreply@campuskey.com')
+    subject = VERIFICATION_SUBJECT
+    text_body, html_body = render_verification_email('-email-', '-code-')
+    
+    email_data = {
+        "personalizations": [
+            {
+                "to": [{"email": email_address}],
+                "subject": subject,
+                "substitutions": {"-email-": email_address, "-code-": code}
+            }
+            for email_address, code, username in messages
+        ],
+        "from": {"email": from_email},
+        "content": [
+            {
+                "type": "text/plain",
+                "value": text_body
+            },
+            {
+                "type": "text/html",
+                "value": html_body
+            }
+        ]
+    }
+    
+    print(f"Sending {len(messages)} verification emails via SendGrid in one request...")
+    sendgrid_client.send(email_data, api_key)
+    print(f"[SUCCESS] {len(messages)} emails sent successfully via SendGrid!")
+    return True
+
+
+class SMTPConnectionPool:
+    """
+    Thread-safe pool of authenticated SMTP connections.
+
+    Opening an SMTP connection costs a TCP connect, a TLS handshake and a login,
+    plus a walk through the 465/587 fallback list when a port is blocked. The pool
+    keeps up to max_size logged-in connections open between messages and lends
+    each one to a single sender at a time. It remembers which port and method
+    worked last and tries that first. Connections that sat idle longer than
+    idle_timeout, sent max_messages messages, or were dropped by the server are
+    closed and replaced.
+    """
+
+    def __init__(self, max_size=4, idle_timeout=60, max_messages=100, timeout=15):
+        self._lock = threading.Lock()
+        # Idle connections: dictionaries with server, last_used and messages
+        self._idle = []
+        # (server, port, username, password) the idle connections were opened with
+        self._settings = None
+        # (port, method) that last connected and authenticated successfully
+        self._preferred = None
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_messages = max_messages
+        self.timeout = timeout
+        atexit.register(self.close_all)
+
+    def send(self, settings, from_email, to_addresses, message_text):
+        """
+        Send a message over a pooled connection.
+
+        A pooled connection the server has closed in the meantime is discarded
+        and the message is sent once more over a new connection. A timeout is
+        not retried: it can fire after the server accepted DATA, and sending
+        again would deliver the code twice.
+
+        Args:
+            settings: Tuple of (smtp_server, smtp_port, smtp_username, smtp_password)
+            from_email: Sender address
+            to_addresses: List of recipient addresses
+            message_text: Serialized MIME message
+
+        Returns:
+            Dictionary of refused recipients (empty on success), as smtplib.sendmail
+        """
+        for attempt in range(2):
+            connection, reused = self._acquire(settings)
+            try:
+                result = connection['server'].sendmail(from_email, to_addresses, message_text)
+            except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                self._close(connection)
+                # smtplib reports a reply that timed out as SMTPServerDisconnected
+                timed_out = isinstance(e.__context__, socket.timeout)
+                if reused and attempt == 0 and not timed_out:
+                    print("[WARNING] Pooled SMTP connection was closed by the server, reconnecting...")
+                    continue
+                raise
+            except Exception:
+                self._close(connection)
+                raise
+            connection['messages'] += 1
+            self._release(settings, connection)
+            return result
+
+    def close_all(self):
+        """Close all idle connections."""
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+        for connection in idle:
+            self._close(connection)
+
+    def _acquire(self, settings):
+        stale = []
+        connection = None
+        with self._lock:
+            if settings != self._settings:
+                # SMTP configuration changed - drop connections opened with the old settings
+                stale, self._idle = self._idle, []
+                self._settings = settings
+                self._preferred = None
+            now = time.monotonic()
+            while self._idle:
+                # Most recently used first - it is the least likely to have been dropped
+                candidate = self._idle.pop()
+                if now - candidate['last_used'] > self.idle_timeout:
+                    stale.append(candidate)
+                    continue
+                connection = candidate
+                break
+        for old_connection in stale:
+            self._close(old_connection)
+        if connection is not None:
+            return connection, True
+        return self._connect(settings), False
+
+    def _release(self, settings, connection):
+        with self._lock:
+            keep = (
+                settings == self._settings
+                and connection['messages'] < self.max_messages
+                and len(self._idle) < self.max_size
+            )
+            if keep:
+                connection['last_used'] = time.monotonic()
+                self._idle.append(connection)
+        if not keep:
+            self._close(connection)
+
+    def _connect(self, settings):
+        smtp_server, smtp_port, smtp_username, smtp_password = settings
+
+        # Strategy: Try the configured port first (SSL on 465, STARTTLS otherwise),
+        # then the other standard port as fallback
+        # Port 587 (TLS) is often blocked on Render free tier
+        if smtp_port == 465:
+            ports_to_try = [(465, 'SSL'), (587, 'TLS')]
+        else:
+            ports_to_try = [(smtp_port, 'TLS'), (465, 'SSL')]
+        with self._lock:
+            preferred = self._preferred
+        if preferred in ports_to_try:
+            # Skip straight to the port/method that worked last time
+            ports_to_try.remove(preferred)
+            ports_to_try.insert(0, preferred)
+
+        last_error = None
+        for port, method in ports_to_try:
+            server = None
+            try:
+                print(f"Attempting {method} connection on port {port}...")
+                print(f"   Connecting to {smtp_server}:{port} (timeout: {self.timeout}s)...")
+                if method == 'SSL':
+                    server = smtplib.SMTP_SSL(smtp_server, port, timeout=self.timeout)
+                else:
+                    server = smtplib.SMTP(smtp_server, port, timeout=self.timeout)
+                    server.starttls()
+                server.login(smtp_username, smtp_password)
+                print(f"[SUCCESS] {method} connection successful on port {port}")
+            except Exception as e:
+                last_error = e
+                print(f"[WARNING] {method} connection failed on port {port}: {str(e)}")
+                print(f"   Error type: {type(e).__name__}")
+                if isinstance(e, smtplib.SMTPAuthenticationError):
+                    print(f"   Tip: Make sure you're using a Gmail App Password (not regular password)")
+                    print(f"   Tip: Verify SMTP_USERNAME matches the email that created the App Password")
+                elif isinstance(e, socket.timeout) or "101" in str(e) or "unreachable" in str(e).lower():
+                    print(f"   Tip: This might mean Render is blocking port {port}")
+                if server:
+                    try:
+                        server.quit()
+                    except Exception:
+                        pass
+                continue
+
+            with self._lock:
+                self._preferred = (port, method)
+            return {'server': server, 'last_used': time.monotonic(), 'messages': 0}
+
+        tried = ' and '.join(f"{port} ({method})" for port, method in ports_to_try)
+        raise Exception(f"Failed to connect to SMTP server. Tried ports {tried}. Last error: {last_error}")
+
+    def _close(self, connection):
+        try:
+            connection['server'].quit()
+        except Exception:
+            try:
+                connection['server'].close()
+            except Exception:
+                pass
+
+
+# Python object creation: Shared SMTP connection pool used by send_email_code
+# SMTP_POOL_SIZE: Idle connections kept open per process
+# SMTP_POOL_IDLE_TIMEOUT: Seconds an idle connection is kept before it is closed
+# SMTP_POOL_MAX_MESSAGES: Messages sent over one connection before it is replaced
+smtp_pool = SMTPConnectionPool(
+    max_size=int(os.environ.get('SMTP_POOL_SIZE', '4')),
+    idle_timeout=int(os.environ.get('SMTP_POOL_IDLE_TIMEOUT', '60')),
+    max_messages=int(os.environ.get('SMTP_POOL_MAX_MESSAGES', '100'))
+)
+
+
 # Python function definition: Function to generate a random 6-digit verification code
 def generate_verification_code():
     # Python docstring: Documents what the function does
@@ -213,10 +534,9 @@ def send_email_code(email_address, code, username):
     Tries SendGrid API first (works on Render free tier), then SMTP, then console fallback.
     """
     # Check if SendGrid is configured (works on Render free tier)
-    email_service = os.environ.get('EMAIL_SERVICE', '').lower()
-    sendgrid_api_key = os.environ.get('SENDGRID_API_KEY')
+    sendgrid_api_key = get_sendgrid_api_key()
     
-    if email_service == 'sendgrid' and sendgrid_api_key:
+    if sendgrid_api_key:
         try:
             return send_email_via_sendgrid(email_address, code, username, sendgrid_api_key)
         except Exception as e:
@@ -249,95 +569,11 @@ def send_email_code(email_address, code, username):
     
     # Python variable: Sets email subject line
     # This appears in the recipient's email client
-    subject = "CAMPUSKEY Verification Code"
-    
-    # Python comment: Marks HTML email template section
-    # HTML email template matching Google style
-    # Python f-string: Multi-line string with variable interpolation
-    # f""" allows embedding {variables} in the HTML template
-    html_body = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    </head>
-    <body style="margin: 0; padding: 0; font-family: 'Google Sans', Roboto, Arial, sans-serif; background-color: #202124; color: #e8eaed;">
-        <table width="100%" cellpadding="0" cellspacing="0" style="background-color: #202124; padding: 20px;">
-            <tr>
-                <td align="center">
-                    <table width="600" cellpadding="0" cellspacing="0" style="background-color: #202124; max-width: 600px;">
-                        <!-- Blue Banner Header -->
-                        <tr>
-                            <td style="background-color: #1a73e8; padding: 24px 32px; text-align: center;">
-                                <h1 style="margin: 0; color: #ffffff; font-size: 22px; font-weight: 400; letter-spacing: 0.25px;">CAMPUSKEY Verification Code</h1>
-                            </td>
-                        </tr>
-                        
-                        <!-- Email Body -->
-                        <tr>
-                            <td style="background-color: #202124; padding: 32px; color: #e8eaed; font-size: 14px; line-height: 20px;">
-                                <p style="margin: 0 0 16px 0; color: #e8eaed;">Dear CAMPUSKEY User,</p>
-                                
-                                <p style="margin: 0 0 16px 0; color: #e8eaed;">
-                                    We received a request to access your CAMPUSKEY Account
-                                    <span style="color: #8ab4f8; text-decoration: underline;">{email_address}</span>
-                                    through your email address. Your CAMPUSKEY verification code is:
-                                </p>
-                                
-                                <!-- Verification Code Display -->
-                                <div style="margin: 24px 0; text-align: center;">
-                                    <div style="font-size: 36px; font-weight: 400; color: #e8eaed; letter-spacing: 8px; font-family: 'Courier New', monospace;">
-                                        {code}
-                                    </div>
-                                </div>
-                                
-                                <p style="margin: 16px 0; color: #e8eaed;">
-                                    If you did not request this code, it is possible that someone else is trying to access the CAMPUSKEY Account
-                                    <span style="color: #8ab4f8; text-decoration: underline;">{email_address}</span>.
-                                    Do not forward or give this code to anyone.
-                                </p>
-                                
-                                <p style="margin: 24px 0 0 0; color: #e8eaed;">Sincerely yours,</p>
-                                <p style="margin: 4px 0 0 0; color: #e8eaed;">The CAMPUSKEY Security Team</p>
-                            </td>
-                        </tr>
-                        
-                        <!-- Footer -->
-                        <tr>
-                            <td style="padding: 16px 32px; text-align: center;">
-                                <p style="margin: 0; color: #9aa0a6; font-size: 12px; line-height: 16px;">
-                                    This email can't receive replies. For more information, visit the
-                                    <a href="#" style="color: #8ab4f8; text-decoration: underline;">CAMPUSKEY Help Center</a>.
-                                </p>
-                            </td>
-                        </tr>
-                    </table>
-                </td>
-            </tr>
-        </table>
-    </body>
-    </html>
-    """
+    subject = VERIFICATION_SUBJECT
     
-    # Python comment: Marks plain text email version section
-    # Plain text version for email clients that don't support HTML
-    # Python f-string: Multi-line plain text email template
+    # Python function call: Renders the HTML and plain text bodies from the cached templates
     # Plain text ensures email is readable even if HTML rendering fails
-    text_body = f"""Dear CAMPUSKEY User,
-
-We received a request to access your CAMPUSKEY Account {email_address} through your email address. Your CAMPUSKEY verification code is:
-
-{code}
-
-If you did not request this code, it is possible that someone else is trying to access the CAMPUSKEY Account {email_address}. Do not forward or give this code to anyone.
-
-Sincerely yours,
-The CAMPUSKEY Security Team
-
----
-This email can't receive replies. For more information, visit the CAMPUSKEY Help Center.
-        """
+    text_body, html_body = render_verification_email(email_address, code)
     
     # Python comment: Marks SMTP email sending section
     # If SMTP is configured, try to send email
@@ -359,173 +595,19 @@ This email can't receive replies. For more information, visit the CAMPUSKEY Help
             print(f"   Password: {'SET (' + str(len(smtp_password)) + ' chars)' if smtp_password else 'NOT SET'}")
             print(f"{'='*60}\n")
             
-            # Python object creation: Creates multipart email message
-            # 'alternative' allows both HTML and plain text versions
-            msg = MIMEMultipart('alternative')
-            # Python attribute assignment: Sets sender email address
-            msg['From'] = from_email
-            # Python attribute assignment: Sets recipient email address
-            msg['To'] = email_address
-            # Python attribute assignment: Sets email subject with UTF-8 encoding
-            # Header() ensures proper encoding for special characters
-            msg['Subject'] = Header(subject, 'utf-8')
-            
-            # Python comment: Marks email body attachment section
-            # Add both plain text and HTML versions
-            # Python object creation: Creates plain text email part
-            # MIMEText() creates email body with specified content type and encoding
-            part1 = MIMEText(text_body, 'plain', 'utf-8')
-            # Python object creation: Creates HTML email part
-            part2 = MIMEText(html_body, 'html', 'utf-8')
-            
-            # Python method call: Attaches plain text version to email message
-            msg.attach(part1)
-            # Python method call: Attaches HTML version to email message
-            msg.attach(part2)
-            
-            # Python object creation: Creates SMTP connection to email server
-            # Try SSL connection first (port 465), then fall back to TLS (port 587)
-            # This handles Render's network restrictions better
-            server = None
-            connection_error = None
-            
-            # Try connecting - prioritize SSL port 465 for Render compatibility
-            # Port 587 (TLS) is often blocked on Render free tier
-            server = None
-            connection_successful = False
-            
-            # Strategy: Try SSL (465) first, then TLS (587) as fallback
-            ports_to_try = []
-            if smtp_port == 465:
-                ports_to_try = [(465, 'SSL'), (587, 'TLS')]  # Try SSL first, then TLS
-            else:
-                ports_to_try = [(587, 'TLS'), (465, 'SSL')]  # Try TLS first, then SSL fallback
-            
-            last_error = None
-            for port, method in ports_to_try:
-                server = None
-                try:
-                    print(f"Attempting {method} connection on port {port}...")
-                    print(f"   Connecting to {smtp_server}:{port} (timeout: 15s)...")
-                    
-                    if method == 'SSL':
-                        # SSL connection (port 465) - more reliable on Render
-                        try:
-                            server = smtplib.SMTP_SSL(smtp_server, port, timeout=15)
-                            print(f"   [SUCCESS] SSL connection established!")
-                        except Exception as conn_e:
-                            print(f"   [ERROR] SSL connection failed: {str(conn_e)}")
-                            raise
-                    else:
-                        # TLS connection (port 587)
-                        try:
-                            server = smtplib.SMTP(smtp_server, port, timeout=15)
-                            print(f"   [SUCCESS] TCP connection established, starting TLS...")
-                            server.starttls()
-                            print(f"   [SUCCESS] TLS handshake completed!")
-                        except Exception as conn_e:
-                            print(f"   [ERROR] TLS connection failed: {str(conn_e)}")
-                            raise
-                    
-                    # Authenticate
-                    print(f"   Authenticating with SMTP server...")
-                    print(f"   Username: {smtp_username}")
-                    try:
-                        server.login(smtp_username, smtp_password)
-                        print(f"   [SUCCESS] Authentication successful!")
-                        print(f"[SUCCESS] {method} connection successful on port {port}")
-                        connection_successful = True
-                        break
-                    except smtplib.SMTPAuthenticationError as auth_e:
-                        print(f"   [ERROR] Authentication failed: {str(auth_e)}")
-                        print(f"   Tip: Make sure you're using a Gmail App Password (16 chars)")
-                        print(f"   Tip: Verify SMTP_USERNAME matches the email that created the App Password")
-                        raise
-                    except Exception as auth_e:
-                        print(f"   [ERROR] Authentication error: {str(auth_e)}")
-                        raise
-                        
-                except socket.timeout as e:
-                    last_error = e
-                    error_msg = f"Connection timeout after 15 seconds"
-                    print(f"[WARNING] {method} connection timed out on port {port}: {error_msg}")
-                    print(f"   Tip: This might mean Render is blocking port {port}")
-                    if server:
-                        try:
-                            server.quit()
-                        except:
-                            pass
-                    server = None
-                    continue
-                except (OSError, ConnectionError) as e:
-                    last_error = e
-                    error_msg = str(e)
-                    print(f"[WARNING] {method} connection failed on port {port}: {error_msg}")
-                    print(f"   Error type: {type(e).__name__}")
-                    if "101" in error_msg or "unreachable" in error_msg.lower():
-                        print(f"   Tip: Network unreachable - Render may be blocking this port")
-                    if server:
-                        try:
-                            server.quit()
-                        except:
-                            pass
-                    server = None
-                    continue
-                except smtplib.SMTPAuthenticationError as e:
-                    last_error = e
-                    error_msg = str(e)
-                    print(f"[WARNING] {method} authentication failed on port {port}: {error_msg}")
-                    print(f"   Tip: Make sure you're using a Gmail App Password (not regular password)")
-                    print(f"   Tip: Verify SMTP_USERNAME matches the email that created the App Password")
-                    if server:
-                        try:
-                            server.quit()
-                        except:
-                            pass
-                    server = None
-                    continue
-                except (TimeoutError, smtplib.SMTPException) as e:
-                    last_error = e
-                    error_msg = str(e)
-                    print(f"[WARNING] {method} connection failed on port {port}: {error_msg}")
-                    print(f"   Error type: {type(e).__name__}")
-                    if server:
-                        try:
-                            server.quit()
-                        except:
-                            pass
-                    server = None
-                    continue
-                except Exception as e:
-                    last_error = e
-                    error_msg = str(e)
-                    print(f"[WARNING] {method} connection failed on port {port}: {error_msg}")
-                    print(f"   Unexpected error type: {type(e).__name__}")
-                    import traceback
-                    print(f"   Traceback: {traceback.format_exc()}")
-                    if server:
-                        try:
-                            server.quit()
-                        except:
-                            pass
-                    server = None
-                    continue
-            
-            # If all connections failed, raise error
-            if not connection_successful:
-                raise Exception(f"Failed to connect to SMTP server. Tried ports 465 (SSL) and 587 (TLS). Last error: {last_error}")
+            # Python function call: Creates multipart email message with plain text and HTML versions
+            msg = build_mime_message(from_email, email_address, subject, text_body, html_body)
             
-            # Connection successful, continue with sending email
-            # Python method call: Converts email message to string format
-            # as_string() serializes the MIME message for sending
-            text = msg.as_string()
-            # Python method call: Sends email to recipient
-            # sendmail() sends the email and returns dictionary of failed recipients
-            # Empty dictionary {} means success, non-empty means some failures
-            result = server.sendmail(from_email, [email_address], text)
-            # Python method call: Closes SMTP connection
-            # quit() properly closes the connection to the server
-            server.quit()
+            # Python method call: Sends the message over a pooled, already authenticated connection
+            # smtp_pool reuses an open connection when one is idle, otherwise it connects
+            # (SSL on 465 / TLS on 587, starting with whichever worked last time) and logs in
+            # sendmail() result is a dictionary of failed recipients - empty {} means success
+            result = smtp_pool.send(
+                (smtp_server, smtp_port, smtp_username, smtp_password),
+                from_email,
+                [email_address],
+                msg.as_string()
+            )
             
             # Python conditional: Checks if email sending failed
             # result is empty dict {} on success, non-empty dict on failure
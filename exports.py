@@ -0,0 +1,220 @@
+# ------------------------------------------------------------------------------------
+# exports.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for exporting login logs,
+# active sessions and grades as CSV or JSON Lines, streamed from the database
+# in batches so memory use does not depend on the number of rows.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    app.py - Admin export endpoint
+#    models.py - Models exported here
+#    auth.py - Session expiry cutoff
+#    templates/login_logs.html - Login log export links
+#    templates/admin_grades.html - Grade export links
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statements: Standard library modules used for encoding exports
+# csv: CSV rows with quoting of commas, quotes and newlines
+# io: In-memory buffer the CSV writer writes a chunk into
+# json: JSON Lines rows
+# zlib: Incremental gzip compression of the response
+import csv
+import io
+import json
+import zlib
+
+# Python import statement: Imports datetime to format timestamp values
+from datetime import datetime
+
+# Python import statement: Imports SQL expression helpers
+from sqlalchemy import select
+
+# Python import statement: Imports aliased to join the user table twice (student and professor)
+from sqlalchemy.orm import aliased
+
+# Python import statement: Imports the exported models and db instance
+from models import ActiveSession, Course, Grade, LoginAttempt, User, db
+
+# Python import statement: Imports the session expiry cutoff shared with the sessions page
+from auth import get_session_expiration_cutoff
+
+
+# Export format -> response content type
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson'
+}
+
+# Rows fetched from the database per round trip
+EXPORT_BATCH_SIZE = 1000
+
+# Bytes collected before a chunk is encoded and sent
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# First characters that make spreadsheet applications treat a CSV cell as a formula
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def login_attempt_export(method=None, status=None, username=None):
+    """
+    Build the login log export query, newest first.
+
+    Args:
+        method: Optional authentication method filter ('otp', 'email', ...)
+        status: Optional status filter ('success' or 'failed')
+        username: Optional (already normalized) username filter
+
+    Returns:
+        SELECT statement over the exported columns
+    """
+    statement = select(
+        LoginAttempt.id, LoginAttempt.timestamp, LoginAttempt.username, LoginAttempt.user_id,
+        LoginAttempt.method, LoginAttempt.status, LoginAttempt.ip_address, LoginAttempt.user_agent
+    )
+    if method:
+        statement = statement.where(LoginAttempt.method == method)
+    if status:
+        statement = statement.where(LoginAttempt.status == status)
+    if username:
+        statement = statement.where(LoginAttempt.username == username)
+    return statement.order_by(LoginAttempt.timestamp.desc(), LoginAttempt.id.desc())
+
+
+def session_export():
+    """
+    Build the active session export query, most recent activity first.
+
+    Sessions idle for longer than SESSION_TIMEOUT are left out, as on the
+    active sessions page (the rows stay until the background reaper deletes them).
+
+    Returns:
+        SELECT statement over the exported columns
+    """
+    return select(
+        ActiveSession.id, User.username, User.role, ActiveSession.login_time, ActiveSession.last_activity,
+        ActiveSession.ip_address, ActiveSession.user_agent
+    ).join(User, User.id == ActiveSession.user_id).where(
+        ActiveSession.last_activity >= get_session_expiration_cutoff()
+    ).order_by(
+        ActiveSession.last_activity.desc(), ActiveSession.id.desc()
+    )
+
+
+def grade_export(course_id=None):
+    """
+    Build the grade export query, newest first.
+
+    Args:
+        course_id: Optional course filter
+
+    Returns:
+        SELECT statement over the exported columns
+    """
+    student = aliased(User)
+    professor = aliased(User)
+    statement = select(
+        Grade.id, student.username.label('student'), Course.code.label('course_code'),
+        Course.name.label('course_name'), Grade.grade_value, Grade.percentage,
+        professor.username.label('professor'), Grade.created_at, Grade.updated_at
+    ).join(student, student.id == Grade.student_id).join(
+        Course, Course.id == Grade.course_id
+    ).join(professor, professor.id == Grade.professor_id)
+    if course_id:
+        statement = statement.where(Grade.course_id == course_id)
+    return statement.order_by(Grade.created_at.desc(), Grade.id.desc())
+
+
+# Dataset name used in the export URL -> function building its query
+EXPORT_DATASETS = {
+    'login-logs': login_attempt_export,
+    'sessions': session_export,
+    'grades': grade_export
+}
+
+
+def _format_value(value):
+    # Timestamps as ISO 8601 strings in both formats
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv_safe(value):
+    # Usernames and user agents come from the login form - a leading quote keeps
+    # spreadsheet applications from running them as formulas (CSV injection)
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def export_rows(statement, export_format):
+    """
+    Run an export query and yield the encoded output in chunks.
+
+    Rows are fetched EXPORT_BATCH_SIZE at a time with yield_per (a server-side
+    cursor on PostgreSQL) and never loaded as ORM objects, so memory use stays
+    flat whatever the number of rows. In CSV output, text values starting with
+    a formula character are prefixed with a single quote.
+
+    Args:
+        statement: SELECT statement from one of the EXPORT_DATASETS functions
+        export_format: 'csv' or 'jsonl'
+
+    Yields:
+        Text chunks of about EXPORT_CHUNK_SIZE bytes
+    """
+    result = db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    columns = list(result.keys())
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == 'csv' else None
+    if writer:
+        writer.writerow(columns)
+    try:
+        for row in result:
+            values = [_format_value(value) for value in row]
+            if writer:
+                writer.writerow([_csv_safe(value) for value in values])
+            else:
+                buffer.write(json.dumps(dict(zip(columns, values))) + '\n')
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        # Release the cursor if the client disconnects part way through
+        result.close()
+
+
+def gzip_chunks(chunks):
+    """
+    Compress text chunks into a gzip stream as they are produced.
+
+    Args:
+        chunks: Iterable of text chunks
+
+    Yields:
+        Compressed bytes (each chunk is flushed so the client receives data steadily)
+    """
+    # wbits=31: zlib produces a gzip header and trailer
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
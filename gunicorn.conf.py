@@ -0,0 +1,53 @@
+# ------------------------------------------------------------------------------------
+# gunicorn.conf.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes the gunicorn server hooks that prepare
+# the database once, before any worker process starts serving requests.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    Procfile - Starts gunicorn (this file is loaded automatically from the working directory)
+#    app.py - initialize_database() called by the on_starting hook
+#
+# ------------------------------------------------------------------------------------
+
+
+# Python function definition: gunicorn hook that runs once in the master process before workers are forked
+def on_starting(server):
+    """
+    Create database tables, add new columns and create sample data before the workers start.
+
+    A failure stops gunicorn instead of starting workers against an old schema.
+
+    Args:
+        server: gunicorn Arbiter instance
+    """
+    # Python import statement: Imports the app inside the hook so gunicorn can load this file without it
+    from app import app, initialize_database
+    from models import db
+
+    try:
+        initialize_database()
+    except Exception as e:
+        # Stop the boot: workers running against a schema that is missing model
+        # columns would fail every request that loads those models
+        server.log.error(f"Database initialization failed: {e}")
+        raise
+    finally:
+        # Close the master's pooled connections so forked workers do not share database sockets
+        with app.app_context():
+            db.engine.dispose()
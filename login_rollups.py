@@ -0,0 +1,223 @@
+# ------------------------------------------------------------------------------------
+# login_rollups.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for counting login
+# attempts per hour, method and status as they are logged, so login volume
+# reports read a small rollup table instead of scanning every attempt.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    audit_log.py - Adds attempts to the rollups as they are written
+#    app.py - Admin rollup endpoint and backfill command
+#    models.py - LoginRollup model and upsert helper
+#    templates/dashboards/admin_dashboard.html - Login volume chart
+#    retention.py - Archives old attempts (their buckets are kept)
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statement: Imports Counter for aggregating attempts into buckets
+from collections import Counter
+
+# Python import statement: Imports timedelta for the default end of the backfill range
+from datetime import timedelta
+
+# Python import statement: Imports SQL expression helpers
+from sqlalchemy import func, update, insert, select, literal_column
+
+# Python import statement: Imports the models, db instance and upsert helper
+from models import LoginRollup, LoginAttempt, db, upsert_insert
+
+
+def hour_bucket(timestamp):
+    """
+    Get the start of the hour a login attempt belongs to.
+
+    Buckets use the same wall-clock time as LoginAttempt.timestamp (US/Eastern,
+    stored without a time zone).
+
+    Args:
+        timestamp: datetime of the attempt (time zone aware or naive)
+
+    Returns:
+        Naive datetime at the start of the hour
+    """
+    return timestamp.replace(tzinfo=None, minute=0, second=0, microsecond=0)
+
+
+def hour_bucket_sql(column):
+    """
+    Build the SQL expression for the start of the hour of a timestamp column.
+
+    Args:
+        column: DateTime column (e.g. LoginAttempt.timestamp)
+
+    Returns:
+        SQL expression equal to hour_bucket() of the column value, or None if
+        the database has no supported way to truncate to the hour
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        # Literal rather than a bound parameter so the GROUP BY matches the select list
+        return func.date_trunc(literal_column("'hour'"), column)
+    if dialect == 'sqlite':
+        # Same text format SQLAlchemy stores DateTime values in on SQLite
+        return func.strftime('%Y-%m-%d %H:00:00.000000', column)
+    return None
+
+
+class LoginRollups:
+    """
+    Hourly counts of login attempts by method and status.
+
+    add() is called in the same transaction that writes the LoginAttempt rows
+    and adds them to their buckets with INSERT ... ON CONFLICT DO UPDATE SET
+    attempts = attempts + excluded.attempts, so concurrent writers never lose
+    counts.
+    Reports (hourly or daily) read only the rollup table. backfill() rebuilds
+    the buckets for existing history from login_attempt.
+    """
+
+    def add(self, attempts, connection=None):
+        """
+        Add login attempts to their hourly buckets (not committed here).
+
+        Args:
+            attempts: Iterable of LoginAttempt column value dictionaries
+                      (timestamp, method and status are used)
+            connection: Connection to use instead of db.session (e.g. a bulk insert's connection)
+        """
+        counts = Counter(
+            (hour_bucket(values['timestamp']), values['method'], values['status'])
+            for values in attempts
+        )
+        if counts:
+            self._add_counts(counts, connection or db.session)
+
+    def report(self, since, granularity='hour', method=None):
+        """
+        Read login counts from the rollups.
+
+        Args:
+            since: datetime - first bucket to include
+            granularity: 'hour' or 'day'
+            method: Only include this login method (None for all)
+
+        Returns:
+            List of dictionaries (start, method, status, count) ordered by start
+        """
+        query = db.session.query(
+            LoginRollup.bucket_start, LoginRollup.method, LoginRollup.status, LoginRollup.attempts
+        ).filter(LoginRollup.bucket_start >= hour_bucket(since))
+        if method:
+            query = query.filter(LoginRollup.method == method)
+
+        totals = Counter()
+        for row in query.order_by(LoginRollup.bucket_start):
+            start = row.bucket_start
+            if granularity == 'day':
+                start = start.replace(hour=0)
+            totals[(start, row.method, row.status)] += row.attempts
+        return [
+            {'start': start.isoformat(), 'method': method, 'status': status, 'count': count}
+            for (start, method, status), count in sorted(totals.items())
+        ]
+
+    def backfill(self, since=None, until=None, batch_size=10000):
+        """
+        Rebuild the rollups from login_attempt for a time range.
+
+        Buckets in the range are replaced, not added to, so the command can be
+        run again safely. The buckets are deleted and re-aggregated with one
+        INSERT ... SELECT ... GROUP BY in the same transaction, so attempts
+        committed while the command runs are either counted by the rebuild or
+        added on top of it, never lost. The current and previous hours are
+        excluded by default because audit_log.py can still be flushing queued
+        attempts into them, and hours before the oldest attempt left in
+        login_attempt are kept because their attempts were archived.
+
+        Args:
+            since: First hour to rebuild (None for all history)
+            until: End of the range, exclusive (default: start of the previous hour)
+            batch_size: Rows fetched per round trip while scanning login_attempt
+                        (only on databases without a SQL hour truncation)
+
+        Returns:
+            Tuple of (attempts counted, buckets written)
+        """
+        if until is None:
+            # Imported here because auth.py imports this module through audit_log.py
+            from auth import get_est_time
+            until = hour_bucket(get_est_time()) - timedelta(hours=1)
+        # Never rebuild hours that were archived (retention.py archives whole hours, oldest first)
+        oldest = db.session.query(func.min(LoginAttempt.timestamp)).scalar()
+        if oldest is None:
+            return 0, 0
+        since = max(hour_bucket(since), hour_bucket(oldest)) if since is not None else hour_bucket(oldest)
+        if since >= until:
+            return 0, 0
+        in_range = (LoginAttempt.timestamp >= since, LoginAttempt.timestamp < until)
+        rollups = LoginRollup.query.filter(LoginRollup.bucket_start >= since, LoginRollup.bucket_start < until)
+
+        rollups.delete(synchronize_session=False)
+        bucket = hour_bucket_sql(LoginAttempt.timestamp)
+        if bucket is not None:
+            aggregate = select(bucket, LoginAttempt.method, LoginAttempt.status, func.count()).where(
+                *in_range
+            ).group_by(bucket, LoginAttempt.method, LoginAttempt.status)
+            db.session.execute(insert(LoginRollup).from_select(
+                ['bucket_start', 'method', 'status', 'attempts'], aggregate
+            ))
+        else:
+            # Stream the attempts - memory use depends on the number of buckets, not rows
+            counts = Counter()
+            query = db.session.query(LoginAttempt.timestamp, LoginAttempt.method, LoginAttempt.status)
+            for timestamp, method, status in query.filter(*in_range).yield_per(batch_size):
+                counts[(hour_bucket(timestamp), method, status)] += 1
+            if counts:
+                self._add_counts(counts, db.session)
+        attempts, buckets = db.session.query(
+            func.coalesce(func.sum(LoginRollup.attempts), 0), func.count()
+        ).filter(LoginRollup.bucket_start >= since, LoginRollup.bucket_start < until).one()
+        db.session.commit()
+        return attempts, buckets
+
+    def _add_counts(self, counts, executor):
+        rows = [
+            {'bucket_start': bucket_start, 'method': method, 'status': status, 'attempts': count}
+            for (bucket_start, method, status), count in counts.items()
+        ]
+        table = LoginRollup.__table__
+        insert = upsert_insert(LoginRollup)
+        if insert is not None:
+            executor.execute(insert.on_conflict_do_update(
+                index_elements=[table.c.bucket_start, table.c.method, table.c.status],
+                set_={'attempts': table.c.attempts + insert.excluded.attempts}
+            ), rows)
+            return
+        # Databases without ON CONFLICT - UPDATE, then INSERT the buckets that do not exist yet
+        for row in rows:
+            updated = executor.execute(update(table).where(
+                table.c.bucket_start == row['bucket_start'],
+                table.c.method == row['method'],
+                table.c.status == row['status']
+            ).values(attempts=table.c.attempts + row['attempts'])).rowcount
+            if not updated:
+                executor.execute(table.insert(), row)
+
+
+# Shared rollup instance used by audit_log.py and app.py
+login_rollups = LoginRollups()
@@ -0,0 +1,117 @@
+# ------------------------------------------------------------------------------------
+# login_service.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for completing a
+# successful login (email code, authenticator app, biometric or RFID) with all
+# of its database writes committed in a single transaction.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    app.py - Login routes that call complete_login()
+#    auth.py - Login attempt logging
+#    device_fingerprint.py - Device tracking
+#    session_activity.py - Active session tracking
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statement: Imports secrets to generate unguessable session IDs
+import secrets
+
+# Python import statement: Imports Flask request, session and URL helpers
+from flask import request, session, url_for
+
+# Python import statement: Imports login_user to create the Flask-Login session
+from flask_login import login_user
+
+# Python import statement: Imports the ActiveSession model and db instance
+from models import ActiveSession, db
+
+# Python import statements: Imports the helpers for each login write
+from auth import log_login_attempt, get_utc_time
+from device_fingerprint import create_device_fingerprint, device_fingerprints
+from session_activity import session_activity_buffer
+
+
+def dashboard_url(role):
+    """
+    Get the dashboard URL for a role.
+
+    Args:
+        role: User role ('admin', 'professor' or 'student')
+
+    Returns:
+        URL of the role-specific dashboard
+    """
+    if role == 'admin':
+        return url_for('admin_dashboard')
+    elif role == 'professor':
+        return url_for('professor_dashboard')
+    return url_for('student_dashboard')
+
+
+def complete_login(user, method, device_info=None, remember=False):
+    """
+    Finish a successful login.
+
+    Writes the success login attempt, a new ActiveSession row and the device
+    fingerprint, and commits them together with any changes the caller made
+    while verifying the credential (used email code, OTP counter, WebAuthn
+    sign count). The user is only logged in once that commit succeeded; if
+    it fails, everything is rolled back and the exception is raised.
+
+    Args:
+        user: User model instance that authenticated
+        method: Authentication method ('email', 'otp', 'biometric' or 'rfid')
+        device_info: Dictionary of browser-reported device details, if any
+        remember: True to set Flask-Login's remember-me cookie
+
+    Returns:
+        URL of the user's dashboard to redirect to
+    """
+    # Random per-login ID that identifies this session's ActiveSession row on later requests
+    session_id = secrets.token_hex(16)
+    user_agent = request.headers.get('User-Agent', '')
+    ip_address = request.remote_addr
+    now = get_utc_time()
+    fingerprint_hash = create_device_fingerprint(device_info or {}, user_agent, ip_address)
+
+    try:
+        log_login_attempt(user.username, method, 'success', user.id, commit=False)
+        db.session.add(ActiveSession(
+            user_id=user.id,
+            session_id=session_id,
+            login_time=now,
+            last_activity=now,
+            ip_address=ip_address,
+            user_agent=user_agent
+        ))
+        device_fingerprints.store(user.id, fingerprint_hash, device_info, user_agent, ip_address, commit=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        # The device write was rolled back too - do not treat it as recently stored
+        device_fingerprints.forget(user.id, fingerprint_hash)
+        raise
+
+    # Later requests only need to update last_activity (buffered)
+    session_activity_buffer.mark_known(session_id)
+    login_user(user, remember=remember)
+    session['session_id'] = session_id
+    session['auth_method'] = method
+    session['login_time'] = now.isoformat()
+    session['user_role'] = user.role
+    return dashboard_url(user.role)
@@ -0,0 +1,250 @@
+# ------------------------------------------------------------------------------------
+# maintenance.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for running periodic
+# background maintenance jobs (such as expired session cleanup) outside of
+# the request path.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    app.py - Main Flask application that registers and starts the jobs
+#    auth.py - Session reaper job
+#    config.py - Job interval settings
+#    site_stats.py - Dashboard total recount (single-worker job)
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statements: Standard library modules used by the scheduler
+# atexit: Stops the scheduler thread when the worker process exits
+# os: Single-worker lock file in the instance folder
+# threading: Background thread, stop event and lock
+# time: Monotonic clock for scheduling job runs
+import atexit
+import os
+import threading
+import time
+
+# Python import statement: Imports fcntl for the single-worker lock file (not available on Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Python import statement: Imports text for the PostgreSQL advisory lock queries
+from sqlalchemy import text
+
+# Python import statement: Imports the db instance whose engine holds the advisory lock
+from models import db
+
+
+# Python constant: Key of the PostgreSQL advisory lock held by the worker that runs single-worker jobs
+SINGLE_WORKER_LOCK_ID = 7242002
+
+
+class MaintenanceScheduler:
+    """
+    Runs registered maintenance jobs periodically in a background thread.
+
+    Each job runs inside a Flask application context at its own interval.
+    The thread is started lazily (see start()) so every gunicorn worker runs
+    its own scheduler after forking. Jobs must be idempotent, since several
+    workers may run the same job around the same time.
+
+    Jobs added with single_worker=True only run in one worker, the one
+    holding the single-worker lock. It keeps the lock until it exits, and
+    another worker takes it over on its next run. On PostgreSQL the lock is a
+    session advisory lock on a dedicated connection, so it also covers several
+    instances. On other databases (SQLite) it is an exclusive flock on
+    MAINTENANCE_LOCK_FILE, which covers the gunicorn workers of one host;
+    where fcntl is not available (Windows development server) every
+    scheduler runs the jobs.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        # List of job dictionaries: name, func, interval, next_run
+        self._jobs = []
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._app = None
+        # Connection holding the single-worker advisory lock (PostgreSQL)
+        self._lock_connection = None
+        # Open lock file holding the single-worker flock (other databases)
+        self._lock_path = None
+        self._lock_file = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configure the scheduler for a Flask application.
+
+        Args:
+            app: Flask application instance
+        """
+        self._app = app
+        self._lock_path = app.config.get('MAINTENANCE_LOCK_FILE') or os.path.join(app.instance_path, 'maintenance.lock')
+        app.extensions['maintenance_scheduler'] = self
+        atexit.register(self.stop)
+
+    def add_job(self, name, func, interval, single_worker=False):
+        """
+        Register a periodic job.
+
+        Args:
+            name: Job name used in log messages
+            func: Callable taking no arguments, run inside an app context
+            interval: Seconds between runs (0 or less disables the job)
+            single_worker: Run the job in one worker only (see the class docstring)
+        """
+        if interval <= 0:
+            return
+        with self._lock:
+            self._jobs.append({
+                'name': name,
+                'func': func,
+                'interval': interval,
+                'single_worker': single_worker,
+                'next_run': time.monotonic() + interval
+            })
+
+    def start(self):
+        """Start the background thread if it is not already running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if not self._jobs or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(
+                target=self._run_loop,
+                name='maintenance-scheduler',
+                daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after the current job finishes."""
+        self._stop_event.set()
+        self._release_worker_lock()
+
+    def run_job(self, name):
+        """
+        Run a registered job immediately in the current thread.
+
+        Args:
+            name: Name passed to add_job
+
+        Returns:
+            The job's return value
+        """
+        for job in self._jobs:
+            if job['name'] == name:
+                with self._app.app_context():
+                    return job['func']()
+        raise KeyError(f"Unknown maintenance job: {name}")
+
+    def _run_loop(self):
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            with self._lock:
+                due_jobs = [job for job in self._jobs if job['next_run'] <= now]
+                for job in due_jobs:
+                    job['next_run'] = now + job['interval']
+            for job in due_jobs:
+                try:
+                    with self._app.app_context():
+                        if job['single_worker'] and not self._holds_worker_lock():
+                            continue
+                        job['func']()
+                except Exception as e:
+                    # Log error but keep the scheduler running
+                    print(f"Maintenance job {job['name']} failed: {e}")
+            with self._lock:
+                next_run = min(job['next_run'] for job in self._jobs)
+            self._stop_event.wait(max(next_run - time.monotonic(), 0.1))
+
+    def _holds_worker_lock(self):
+        if self._stop_event.is_set():
+            # Released by stop() - not taken again while the worker exits
+            return False
+        if db.engine.dialect.name == 'postgresql':
+            return self._holds_advisory_lock()
+        return self._holds_file_lock()
+
+    def _holds_file_lock(self):
+        if self._lock_file is not None:
+            return True
+        if fcntl is None:
+            return True
+        os.makedirs(os.path.dirname(self._lock_path), exist_ok=True)
+        lock_file = open(self._lock_path, 'a')
+        try:
+            # Held until the file is closed - by stop() or when the worker process exits
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _holds_advisory_lock(self):
+        engine = db.engine
+        if self._lock_connection is not None:
+            try:
+                # The lock lasts as long as the connection - check it is still open
+                self._lock_connection.execute(text('SELECT 1'))
+                self._lock_connection.commit()
+                return True
+            except Exception:
+                self._lock_connection.invalidate()
+                self._lock_connection.close()
+                self._lock_connection = None
+        connection = engine.connect()
+        try:
+            acquired = connection.execute(
+                text('SELECT pg_try_advisory_lock(:key)'), {'key': SINGLE_WORKER_LOCK_ID}
+            ).scalar()
+            # Session-level lock: it outlives the transaction, which is ended so the
+            # connection does not sit idle in a transaction
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._lock_connection = connection
+        return True
+
+    def _release_worker_lock(self):
+        lock_file, self._lock_file = self._lock_file, None
+        if lock_file is not None:
+            lock_file.close()
+        connection, self._lock_connection = self._lock_connection, None
+        if connection is None:
+            return
+        try:
+            connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': SINGLE_WORKER_LOCK_ID})
+            connection.commit()
+        except Exception:
+            # The lock goes with the connection
+            connection.invalidate()
+        connection.close()
+
+
+# Shared scheduler instance, initialized with the app in app.py
+maintenance_scheduler = MaintenanceScheduler()
@@ -23,6 +23,7 @@
 #    app.py - Main Flask application that provides application context
 #    models.py - Database models that define the schema
 #    config.py - Configuration settings for database connection
+#    schema_upgrade.py - Column upgrade shared with the application startup
 #
 # ------------------------------------------------------------------------------------
 
@@ -45,6 +46,162 @@ from app import app
 # db is the database object that handles all database operations
 from models import db
 
+# Python import statement: Imports text for running raw DDL statements
+from sqlalchemy import text
+
+# Python import statement: Imports the admin dashboard totals
+from site_stats import site_stats
+
+# Python import statement: Imports the column upgrade also run at every startup
+# upgrade_schema: Adds the columns listed in schema_upgrade.added_columns() and backfills them
+from schema_upgrade import upgrade_schema
+
+
+def is_partitioned(table):
+    """
+    Check if a model table is created as a partitioned table on PostgreSQL.
+    
+    Args:
+        table: SQLAlchemy Table object
+    
+    Returns:
+        True if the table declares postgresql_partition_by
+    """
+    return bool(table.dialect_options['postgresql'].get('partition_by'))
+
+
+def drop_invalid_index(connection, index_name):
+    """
+    Drop an index left INVALID by a failed CREATE INDEX CONCURRENTLY (PostgreSQL).
+    
+    A concurrent build that fails (duplicate key, deadlock, cancel) leaves the
+    index behind marked invalid: the planner never uses it, a unique one still
+    checks every write, and IF NOT EXISTS would skip it on the next run. It is
+    dropped (also concurrently) so the caller builds it again.
+    
+    Args:
+        connection: Autocommit connection
+        index_name: Unquoted index name
+    
+    Returns:
+        True if an invalid index was dropped
+    """
+    valid = connection.execute(text(
+        'SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:index_name)'
+    ), {'index_name': index_name}).scalar()
+    if valid is None or valid:
+        return False
+    preparer = db.engine.dialect.identifier_preparer
+    connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {preparer.quote(index_name)}'))
+    print(f"  ! Dropped invalid index {index_name} left by an earlier failed build")
+    return True
+
+
+def create_index_online(index):
+    """
+    Create a model index on an existing table without taking the table offline.
+    
+    PostgreSQL uses CREATE INDEX CONCURRENTLY, which does not block reads or
+    writes while the index is built (it must run outside a transaction, so the
+    connection is switched to autocommit). PostgreSQL does not allow
+    CONCURRENTLY on a partitioned table, so those get a plain CREATE INDEX.
+    An invalid index left by an earlier failed concurrent build is dropped
+    and built again. SQLite has no concurrent build, but CREATE INDEX IF NOT EXISTS only takes
+    a short write lock on the table.
+    
+    Args:
+        index: SQLAlchemy Index object taken from a model's table
+    """
+    dialect = db.engine.dialect.name
+    preparer = db.engine.dialect.identifier_preparer
+    unique = 'UNIQUE ' if index.unique else ''
+    columns = ', '.join(preparer.quote(column.name) for column in index.columns)
+    table_name = preparer.quote(index.table.name)
+    index_name = preparer.quote(index.name)
+    
+    concurrently = dialect == 'postgresql' and not is_partitioned(index.table)
+    if concurrently:
+        statement = f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {table_name} ({columns})'
+    else:
+        statement = f'CREATE {unique}INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})'
+    
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        if concurrently:
+            drop_invalid_index(connection, index.name)
+        connection.execute(text(statement))
+    print(f"  ✓ Index {index.name} on {index.table.name}")
+
+
+def create_partitioned_index(index):
+    """
+    Create a model index on an existing partitioned table (PostgreSQL).
+    
+    The index is created ON ONLY the parent table (instant, no partition is
+    scanned), then built with CREATE INDEX CONCURRENTLY on each partition and
+    attached to the parent. Once every partition is attached the parent index
+    becomes valid, and partitions created later get the index automatically.
+    The parent index stays invalid until then, so only the partition indexes
+    are checked for an invalid leftover of a failed build.
+    On other databases the table is not partitioned and a plain
+    CREATE INDEX IF NOT EXISTS is used.
+    
+    Args:
+        index: SQLAlchemy Index object taken from a partitioned model's table
+    """
+    if db.engine.dialect.name != 'postgresql':
+        create_index_online(index)
+        return
+    preparer = db.engine.dialect.identifier_preparer
+    unique = 'UNIQUE ' if index.unique else ''
+    columns = ', '.join(preparer.quote(column.name) for column in index.columns)
+    table_name = index.table.name
+    
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.execute(text(
+            f'CREATE {unique}INDEX IF NOT EXISTS {preparer.quote(index.name)} '
+            f'ON ONLY {preparer.quote(table_name)} ({columns})'
+        ))
+        # Partitions that do not have an index attached to the parent index yet
+        # (partitions created after the parent index already have one)
+        partitions = connection.execute(text(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = CAST(:table_name AS regclass) '
+            'AND NOT EXISTS ('
+            '  SELECT 1 FROM pg_inherits attached '
+            '  JOIN pg_index ON pg_index.indexrelid = attached.inhrelid '
+            '  WHERE attached.inhparent = CAST(:index_name AS regclass) AND pg_index.indrelid = child.oid'
+            ') ORDER BY child.relname'
+        ), {'table_name': table_name, 'index_name': index.name}).scalars().all()
+        for partition in partitions:
+            # e.g. ix_login_attempt_archive_username_timestamp_2026_09 (PostgreSQL names are at most 63 characters)
+            partition_index = f"{index.name}{partition[len(table_name):]}"[:63]
+            # A failed build of this partition's index cannot be attached - build it again
+            drop_invalid_index(connection, partition_index)
+            connection.execute(text(
+                f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {preparer.quote(partition_index)} '
+                f'ON {preparer.quote(partition)} ({columns})'
+            ))
+            connection.execute(text(
+                f'ALTER INDEX {preparer.quote(index.name)} ATTACH PARTITION {preparer.quote(partition_index)}'
+            ))
+    print(f"  ✓ Index {index.name} on {table_name} ({len(partitions)} partitions indexed)")
+
+
+def remove_duplicate_active_sessions():
+    """
+    Remove duplicate active_session rows so the unique session_id index can be built.
+    Keeps the newest row (highest id) for each session_id.
+    """
+    result = db.session.execute(text(
+        'DELETE FROM active_session WHERE id NOT IN '
+        '(SELECT MAX(id) FROM active_session GROUP BY session_id)'
+    ))
+    db.session.commit()
+    if result.rowcount:
+        print(f"  ✓ Removed {result.rowcount} duplicate active sessions")
+
+
 # Python context manager: Creates Flask application context
 # app.app_context() is required to access database outside of request handlers
 # This allows running database operations in standalone scripts
@@ -56,8 +213,32 @@ with app.app_context():
     # Database method: Creates all database tables defined in models
     # db.create_all() reads model definitions and creates missing tables
     # Safe to run multiple times - only creates tables that don't exist
+    # Note: create_all() does not add indexes to tables that already exist
     db.create_all()
     
+    # Python comment: Marks the column migration section
+    # Add new columns to existing tables and fill them from existing data
+    print("Adding missing columns...")
+    upgrade_schema()
+    
+    # Python comment: Marks the index migration section
+    # Create indexes declared on models that are missing from existing tables
+    # IF NOT EXISTS makes this safe to run multiple times
+    print("Creating missing indexes...")
+    remove_duplicate_active_sessions()
+    for table in db.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            # Partitioned tables (login_attempt_archive on PostgreSQL) are indexed partition by partition
+            if is_partitioned(table):
+                create_partitioned_index(index)
+            else:
+                create_index_online(index)
+    
+    # Python comment: Marks the statistics section
+    # Create or correct the admin dashboard totals from the current table contents
+    print("Recounting dashboard statistics...")
+    site_stats.reconcile()
+    
     # Python print statement: Outputs success message with checkmark emoji
     # Confirms that database schema update completed successfully
     print("✓ Database schema updated successfully!")
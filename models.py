@@ -42,6 +42,16 @@ from datetime import datetime
 # Used for OTP-based authentication (like Google Authenticator)
 import pyotp
 
+# Import base64 and json - Python modules for decoding stored WebAuthn credential data
+import base64
+import json
+
+# Import lru_cache - Caches decoded legacy WebAuthn public keys
+from functools import lru_cache
+
+# Import dialect-specific INSERT constructs - Support INSERT ... ON CONFLICT (upsert)
+from sqlalchemy.dialects import postgresql, sqlite
+
 
 # Create SQLAlchemy database instance
 # This is a central object that will be initialized with the Flask app
@@ -50,6 +60,26 @@ import pyotp
 db = SQLAlchemy()
 
 
+# Helper function - Returns an INSERT that supports ON CONFLICT for the current database
+# Both SQLite and PostgreSQL support INSERT ... ON CONFLICT DO UPDATE / DO NOTHING (upsert)
+def upsert_insert(model):
+    """
+    Create an INSERT statement with on_conflict_do_update()/on_conflict_do_nothing().
+    
+    Args:
+        model: Model class to insert into
+    
+    Returns:
+        Dialect INSERT construct, or None if the database has no native upsert
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
+    return None
+
+
 # User model - Represents a user account in the system (admin, professor, or student)
 # Inherits from UserMixin (for Flask-Login) and db.Model (for SQLAlchemy)
 # UserMixin provides: is_authenticated, is_active, is_anonymous, get_id() methods
@@ -100,6 +130,11 @@ class User(UserMixin, db.Model):
     # Used by verify_otp() method to verify TOTP codes from authenticator apps
     otp_secret = db.Column(db.String(32), default=pyotp.random_base32)
     
+    # Last accepted OTP time step - TOTP counter (Unix time // 30) of the last code used to log in
+    # db.Integer: Codes from this time step or earlier are rejected, so a code cannot be replayed
+    # nullable=True: NULL until the user logs in with an OTP code
+    otp_last_counter = db.Column(db.Integer, nullable=True)
+    
     # Created timestamp - Records when the user account was created
     # db.DateTime: Stores date and time values
     # default=datetime.utcnow: Automatically sets to current UTC time when record is created
@@ -111,14 +146,16 @@ class User(UserMixin, db.Model):
     # self: Reference to the User instance calling this method
     # token: The OTP code to verify (usually 6 digits from authenticator app)
     # Returns: Boolean - True if token is valid, False if invalid or expired
-    # Uses pyotp library to create a TOTP instance with user's secret and verify the token
+    # Uses the shared TOTP service (cached TOTP instances, configurable drift window)
     # TOTP codes are time-based and expire after a short period (usually 30 seconds)
+    # Each code is accepted only once - a replayed code returns False
     def verify_otp(self, token):
-        # Create TOTP instance using user's stored secret key
-        # TOTP generates codes based on current time and secret key
-        # verify() checks if the provided token matches the current valid code
-        # Returns True if valid, False if invalid or expired
-        return pyotp.TOTP(self.otp_secret).verify(token)
+        # Import inside the method because totp_service imports this module
+        from totp_service import totp_service
+        # verify() checks the token against the current time step (plus allowed drift)
+        # and records it as used on this user's row in the current database session
+        # Returns True if valid and unused, False if invalid, expired or already used
+        return totp_service.verify(self, token)
 
 
 # LoginAttempt model - Logs all login attempts (successful and failed) for security auditing
@@ -199,6 +236,21 @@ class LoginAttempt(db.Model):
     # lazy=True: Related objects are loaded only when accessed (lazy loading for performance)
     # This relationship is optional (user_id can be null for failed attempts)
     user = db.relationship('User', backref=db.backref('login_attempts', lazy=True))
+    
+    # Composite indexes - Support the admin and activity pages on a large audit table
+    # ix_login_attempt_status_timestamp: filter_by(status=...) ordered by timestamp DESC
+    #   (admin dashboard, admin panel recent successful logins)
+    # ix_login_attempt_user_id_timestamp: filter_by(user_id=...) ordered by timestamp DESC
+    #   (recent activity, access history)
+    # Existing databases get these indexes from migrate_db.py
+    # ix_login_attempt_timestamp_id: keyset pagination of the login logs page
+    # ix_login_attempt_username_timestamp: login logs filtered by username
+    __table_args__ = (
+        db.Index('ix_login_attempt_status_timestamp', 'status', 'timestamp'),
+        db.Index('ix_login_attempt_user_id_timestamp', 'user_id', 'timestamp'),
+        db.Index('ix_login_attempt_timestamp_id', 'timestamp', 'id'),
+        db.Index('ix_login_attempt_username_timestamp', 'username', 'timestamp'),
+    )
 
 
 # ActiveSession model - Tracks active user sessions for security monitoring
@@ -266,6 +318,16 @@ class ActiveSession(db.Model):
     # lazy=True: Related objects are loaded only when accessed (lazy loading for performance)
     # Used to get user information from session and list all active sessions for a user
     user = db.relationship('User', backref=db.backref('active_sessions', lazy=True))
+    
+    # Indexes for session tracking and cleanup
+    # ix_active_session_session_id: unique lookup by session_id on every tracked request
+    # ix_active_session_last_activity: active session listing and the expired session reaper
+    # ix_active_session_user_id_last_activity: a single user's sessions (device security, access history)
+    __table_args__ = (
+        db.Index('ix_active_session_session_id', 'session_id', unique=True),
+        db.Index('ix_active_session_last_activity', 'last_activity'),
+        db.Index('ix_active_session_user_id_last_activity', 'user_id', 'last_activity'),
+    )
 
 
 # EmailVerificationCode model - Stores email verification codes sent to users for login authentication
@@ -473,6 +535,11 @@ class Grade(db.Model):
     # This allows: grade.professor (access User/professor who assigned the grade)
     # Used to get professor information from grade and identify who assigned each grade
     professor = db.relationship('User', foreign_keys=[professor_id])
+    
+    # Index for keyset pagination of the admin grades page (created_at DESC, id DESC)
+    __table_args__ = (
+        db.Index('ix_grade_created_at_id', 'created_at', 'id'),
+    )
 
 
 # WebAuthnCredential model - Stores WebAuthn (biometric) credentials for users
@@ -491,11 +558,21 @@ class WebAuthnCredential(db.Model):
     # nullable=False: Required field
     credential_id = db.Column(db.Text, unique=True, nullable=False)
     
+    # Raw credential ID - The credential ID bytes exactly as the browser sends them in rawId
+    # db.LargeBinary: Binary column (BLOB / BYTEA) compared with a single indexed equality lookup
+    # nullable=True: NULL for legacy credentials stored as an integer (first 8 bytes only)
+    credential_id_raw = db.Column(db.LargeBinary, nullable=True)
+    
     # Public key - The public key portion of the credential (stored as JSON/text)
     # db.Text: Stores the public key data
     # nullable=False: Required field
     public_key = db.Column(db.Text, nullable=False)
     
+    # COSE public key - The credential public key as the raw COSE bytes from registration
+    # db.LargeBinary: Passed to WebAuthn verification as-is, without JSON or base64 decoding
+    # nullable=True: NULL for credentials registered before this column existed (see migrate_db.py)
+    public_key_cose = db.Column(db.LargeBinary, nullable=True)
+    
     # Counter - Anti-replay counter for WebAuthn
     # db.Integer: Stores the signature count
     # default=0: Starts at 0
@@ -518,6 +595,66 @@ class WebAuthnCredential(db.Model):
     
     # Relationship to User model - Allows accessing User from WebAuthnCredential
     user = db.relationship('User', backref=db.backref('webauthn_credentials', lazy=True))
+    
+    # Indexes - Authentication looks up the credential by its raw ID
+    __table_args__ = (
+        db.Index('ix_webauthn_credential_credential_id_raw', 'credential_id_raw', unique=True),
+    )
+    
+    @staticmethod
+    def decode_credential_id(credential_id):
+        """
+        Convert a stored credential_id string to the raw credential ID bytes.
+        
+        Args:
+            credential_id: Base64 (standard or URL-safe, padding optional) credential ID
+        
+        Returns:
+            Raw credential ID bytes, or None for legacy integer credential IDs
+        """
+        if not credential_id or credential_id.isdigit():
+            return None
+        padded = credential_id + '=' * (-len(credential_id) % 4)
+        try:
+            return base64.b64decode(padded, validate=True)
+        except ValueError:
+            return base64.urlsafe_b64decode(padded)
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def decode_public_key(public_key):
+        """
+        Convert a stored JSON public_key value to COSE public key bytes.
+        
+        Registration used to store the COSE bytes as a JSON-encoded base64 string.
+        Results are cached, so a credential that has not been migrated yet is
+        only decoded once per worker.
+        
+        Args:
+            public_key: JSON text from the public_key column
+        
+        Returns:
+            COSE public key bytes, or None if the value is not a base64 string
+        """
+        value = json.loads(public_key)
+        if not isinstance(value, str) or not value:
+            return None
+        padded = value + '=' * (-len(value) % 4)
+        try:
+            return base64.b64decode(padded, validate=True)
+        except ValueError:
+            return base64.urlsafe_b64decode(padded)
+    
+    def get_public_key(self):
+        """
+        Get the COSE public key bytes used to verify this credential's assertions.
+        
+        Returns:
+            COSE public key bytes
+        """
+        if self.public_key_cose is not None:
+            return self.public_key_cose
+        return self.decode_public_key(self.public_key)
 
 
 # DeviceFingerprint model - Stores device fingerprints for security tracking
@@ -569,3 +706,159 @@ class DeviceFingerprint(db.Model):
     
     # Relationship to User model - Allows accessing User from DeviceFingerprint
     user = db.relationship('User', backref=db.backref('device_fingerprints', lazy=True))
+    
+    # Index for finding a user's most recent device (admin dashboard session overview)
+    __table_args__ = (
+        db.Index('ix_device_fingerprint_user_id_last_seen_at', 'user_id', 'last_seen_at'),
+    )
+
+
+# EmailOutbox model - Durable queue of verification emails waiting to be sent
+# Inherits from db.Model to become a database table
+# Rows are written by /api/send-email-code and delivered by the background
+# worker pool in email_outbox.py, with retry and exponential backoff
+class EmailOutbox(db.Model):
+    # Primary key - Unique identifier for each queued message (returned to the UI for polling)
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Recipient email address
+    # db.String(120): Standard email length (same as EmailVerificationCode.email)
+    email = db.Column(db.String(120), nullable=False)
+    
+    # Username the verification code belongs to
+    username = db.Column(db.String(80), nullable=False)
+    
+    # The 6-digit verification code to deliver
+    code = db.Column(db.String(6), nullable=False)
+    
+    # Delivery status - 'pending', 'sending', 'sent' or 'failed'
+    # 'pending': Waiting for a worker (new, or scheduled for retry)
+    # 'sending': Claimed by a worker
+    # 'sent': Delivered successfully
+    # 'failed': Gave up after EMAIL_OUTBOX_MAX_ATTEMPTS attempts
+    status = db.Column(db.String(10), nullable=False, default='pending')
+    
+    # Number of delivery attempts made so far
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Earliest time the next delivery attempt may run (UTC, used for backoff)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    # When a worker claimed the message (UTC) - stale claims are retried
+    locked_at = db.Column(db.DateTime, nullable=True)
+    
+    # Error message from the most recent failed attempt
+    last_error = db.Column(db.Text, nullable=True)
+    
+    # Created timestamp - When the message was queued
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Sent timestamp - When the message was delivered
+    sent_at = db.Column(db.DateTime, nullable=True)
+    
+    # Index for workers looking up the next due messages
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+
+# WebAuthnChallenge model - Pending WebAuthn challenges issued by the begin endpoints
+# Inherits from db.Model to become a database table
+# Used by the SQL backend of challenge_store.py so the session cookie only holds a
+# short handle and all workers can complete a ceremony started on another worker
+class WebAuthnChallenge(db.Model):
+    # Primary key - Opaque random handle stored in the user's session
+    handle = db.Column(db.String(64), primary_key=True)
+    
+    # Ceremony the challenge was issued for - 'registration' or 'authentication'
+    purpose = db.Column(db.String(20), nullable=False)
+    
+    # Challenge bytes sent to the browser
+    challenge = db.Column(db.LargeBinary, nullable=False)
+    
+    # User the ceremony is for (no foreign key - rows are short-lived and purged)
+    user_id = db.Column(db.Integer, nullable=False)
+    
+    # Expiry time (UTC) - expired challenges are rejected and purged periodically
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    # Index for the periodic purge of expired challenges
+    __table_args__ = (
+        db.Index('ix_webauthn_challenge_expires_at', 'expires_at'),
+    )
+
+
+# Python class definition: RateLimitCounter model - One fixed-window request counter for one rate limit key
+# Used by the SQL backend of rate_limiter.py so all workers share the same counts
+class RateLimitCounter(db.Model):
+    # Rate limit key - scope plus username or IP, e.g. 'login:user:alice' or 'login:ip:10.0.0.1'
+    key = db.Column(db.String(160), primary_key=True)
+    
+    # Start of the counter's window (Unix time, a multiple of the limit period)
+    window_start = db.Column(db.Integer, primary_key=True)
+    
+    # Requests counted in this window
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Unix time after which the window no longer affects the limit and the row is purged
+    expires_at = db.Column(db.Integer, nullable=False)
+    
+    # Index for the periodic purge of expired counters
+    __table_args__ = (
+        db.Index('ix_rate_limit_counter_expires_at', 'expires_at'),
+    )
+
+
+# Python class definition: SiteStatistic model - One maintained total shown on the admin dashboard
+# Updated incrementally by site_stats.py and recounted periodically to correct drift
+class SiteStatistic(db.Model):
+    # Statistic name - e.g. 'total_users' or 'successful_logins'
+    name = db.Column(db.String(50), primary_key=True)
+    
+    # Current total
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+# Python class definition: LoginRollup model - Number of login attempts in one hour for one method and status
+# Maintained by login_rollups.py as attempts are logged; used for login volume reports
+class LoginRollup(db.Model):
+    # Start of the hour (same wall-clock time as LoginAttempt.timestamp)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    
+    # Authentication method - 'otp', 'email', 'biometric' or 'rfid'
+    method = db.Column(db.String(20), primary_key=True)
+    
+    # Attempt result - 'success' or 'failed'
+    status = db.Column(db.String(20), primary_key=True)
+    
+    # Number of attempts in this hour
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+
+# LoginAttemptArchive model - Login attempts moved out of login_attempt by retention.py
+# Same columns as LoginAttempt; rows keep their original ID
+# On PostgreSQL the table is partitioned by month on timestamp (partitions are created by retention.py),
+# so old archive months can be detached or dropped without touching the rest
+class LoginAttemptArchive(db.Model):
+    # Original LoginAttempt ID - part of the primary key together with timestamp
+    # (PostgreSQL requires the partition column in the primary key)
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    
+    # When the login attempt occurred (partition key, never null in the archive)
+    timestamp = db.Column(db.DateTime, primary_key=True)
+    
+    # Copied LoginAttempt columns (no foreign key, so archived rows survive user deletion)
+    user_id = db.Column(db.Integer)
+    username = db.Column(db.String(80), nullable=False)
+    method = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(10), nullable=False)
+    ip_address = db.Column(db.String(45))
+    user_agent = db.Column(db.Text)
+    
+    # Index for looking up a user's archived attempts
+    # (migrate_db.py builds it partition by partition on PostgreSQL - CONCURRENTLY is not allowed on the parent)
+    # postgresql_partition_by: Creates the table as a range-partitioned table on PostgreSQL (ignored elsewhere)
+    __table_args__ = (
+        db.Index('ix_login_attempt_archive_username_timestamp', 'username', 'timestamp'),
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
+    )
@@ -0,0 +1,260 @@
+# ------------------------------------------------------------------------------------
+# queries.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for reusable database query
+# helpers that load related records up front for listing pages.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    app.py - Main Flask application routes that use these queries
+#    models.py - Database models queried here
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statements: Standard library modules for encoding page cursors
+# base64: URL-safe encoding of cursor values for query parameters
+# json: Serializes cursor values before encoding
+import base64
+import json
+
+# Python import statement: Imports datetime for cursor timestamp values
+from datetime import datetime
+
+# Python import statement: Imports SQL boolean operators for keyset conditions
+from sqlalchemy import and_, or_
+
+# Python import statement: Imports loader options from SQLAlchemy
+# joinedload: Loads related objects in the same SELECT using a LEFT OUTER JOIN
+# contains_eager: Populates a relationship from a JOIN already present in the query
+from sqlalchemy.orm import contains_eager, joinedload
+
+# Python import statement: Imports database models used by the query helpers
+# Course: Database model representing academic courses
+# Grade: Database model representing student grades
+# LoginAttempt: Database model for the login audit log
+# ActiveSession, DeviceFingerprint: Models joined for the admin session overview
+# db: SQLAlchemy database instance
+from models import Course, Grade, LoginAttempt, ActiveSession, DeviceFingerprint, db
+
+# Default and maximum number of rows returned by one page of a paginated view
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def grade_query():
+    """
+    Get a Grade query that eager-loads everything grade templates display.
+
+    Loads grade.student, grade.professor, grade.course and grade.course.professor
+    in the same SELECT, so rendering a list of N grades costs one query instead
+    of up to 3N+1 lazy loads. Filters and ordering can be chained as usual.
+
+    Returns:
+        SQLAlchemy query for Grade with relationships eager-loaded
+    """
+    return Grade.query.options(
+        joinedload(Grade.student),
+        joinedload(Grade.professor),
+        joinedload(Grade.course).joinedload(Course.professor)
+    )
+
+
+def course_query():
+    """
+    Get a Course query that eager-loads the course professor.
+
+    Returns:
+        SQLAlchemy query for Course with course.professor eager-loaded
+    """
+    return Course.query.options(joinedload(Course.professor))
+
+
+def encode_cursor(timestamp, row_id):
+    """
+    Encode the sort key of the last row on a page as an opaque cursor string.
+
+    Args:
+        timestamp: Datetime sort value of the row (None is encoded as null)
+        row_id: Primary key of the row (tie-breaker for equal timestamps)
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps([timestamp.isoformat() if timestamp else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor created by encode_cursor.
+
+    Args:
+        cursor: Cursor string from a query parameter
+
+    Returns:
+        Tuple of (timestamp, row_id) - timestamp is None for a row without one -
+        or None if the cursor is empty or invalid
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(timestamp) if timestamp is not None else None), int(row_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_page_size(value):
+    """
+    Parse a page size query parameter, clamped to 1..MAX_PAGE_SIZE.
+
+    Args:
+        value: Raw query parameter value (may be None)
+
+    Returns:
+        Page size as an integer
+    """
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+
+
+def keyset_page(query, timestamp_column, id_column, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Fetch one page of a query in (timestamp DESC, id DESC) order using keyset pagination.
+
+    Instead of OFFSET, the next page starts strictly after the last row of the
+    previous page (the cursor), so the database seeks straight to it through the
+    index and page N costs the same as page 1.
+
+    Rows with a NULL timestamp come after all the others, newest id first.
+    They are fetched by a second query (timestamp IS NULL) once the dated rows
+    run out, so both queries keep using the (timestamp, id) index; an ORDER BY
+    with NULLS LAST would not match it on PostgreSQL.
+
+    Args:
+        query: Filtered SQLAlchemy query (without ordering or limit)
+        timestamp_column: Column used as the primary sort key
+        id_column: Primary key column used as the tie-breaker
+        cursor: Cursor string from the previous page, or None for the first page
+        limit: Number of rows per page
+
+    Returns:
+        Tuple of (rows, next_cursor); next_cursor is None on the last page
+    """
+    position = decode_cursor(cursor)
+    rows = []
+    # Fetch one extra row to know whether another page exists
+    if position is None or position[0] is not None:
+        dated = query.filter(timestamp_column.isnot(None))
+        if position is not None:
+            timestamp, row_id = position
+            dated = dated.filter(or_(
+                timestamp_column < timestamp,
+                and_(timestamp_column == timestamp, id_column < row_id)
+            ))
+        rows = dated.order_by(timestamp_column.desc(), id_column.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        # Dated rows ran out (or the cursor is already past them) - continue with the NULL timestamps
+        undated = query.filter(timestamp_column.is_(None))
+        if position is not None and position[0] is None:
+            undated = undated.filter(id_column < position[1])
+        rows += undated.order_by(id_column.desc()).limit(limit + 1 - len(rows)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, timestamp_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
+
+
+def login_attempt_page(cursor=None, limit=DEFAULT_PAGE_SIZE, method=None, status=None, username=None):
+    """
+    Get one page of login attempts, newest first.
+
+    Args:
+        cursor: Cursor from the previous page, or None for the first page
+        limit: Number of rows per page
+        method: Optional authentication method filter ('otp', 'email', ...)
+        status: Optional status filter ('success' or 'failed')
+        username: Optional (already normalized) username filter
+
+    Returns:
+        Tuple of (login attempts, next_cursor)
+    """
+    query = LoginAttempt.query
+    if method:
+        query = query.filter(LoginAttempt.method == method)
+    if status:
+        query = query.filter(LoginAttempt.status == status)
+    if username:
+        query = query.filter(LoginAttempt.username == username)
+    return keyset_page(query, LoginAttempt.timestamp, LoginAttempt.id, cursor, limit)
+
+
+def grade_page(cursor=None, limit=DEFAULT_PAGE_SIZE, course_id=None):
+    """
+    Get one page of grades, newest first, with relationships eager-loaded.
+
+    Args:
+        cursor: Cursor from the previous page, or None for the first page
+        limit: Number of rows per page
+        course_id: Optional course filter
+
+    Returns:
+        Tuple of (grades, next_cursor)
+    """
+    query = grade_query()
+    if course_id:
+        query = query.filter(Grade.course_id == course_id)
+    return keyset_page(query, Grade.created_at, Grade.id, cursor, limit)
+
+
+def active_sessions_with_devices(expiration_cutoff):
+    """
+    Get active sessions with their user and the user's latest device in one query.
+
+    The latest device is picked with a correlated subquery (the newest
+    DeviceFingerprint for the session's user by last_seen_at), which works on
+    both SQLite and PostgreSQL. session.user is populated from the same JOIN,
+    so the admin dashboard needs no per-session queries.
+
+    Args:
+        expiration_cutoff: Sessions with last_activity before this time are excluded
+
+    Returns:
+        List of (ActiveSession, DeviceFingerprint or None) tuples, most recent activity first
+    """
+    latest_device_id = (
+        db.session.query(DeviceFingerprint.id)
+        .filter(DeviceFingerprint.user_id == ActiveSession.user_id)
+        .order_by(DeviceFingerprint.last_seen_at.desc(), DeviceFingerprint.id.desc())
+        .limit(1)
+        .correlate(ActiveSession)
+        .scalar_subquery()
+    )
+    return (
+        db.session.query(ActiveSession, DeviceFingerprint)
+        .join(ActiveSession.user)
+        .outerjoin(DeviceFingerprint, DeviceFingerprint.id == latest_device_id)
+        .options(contains_eager(ActiveSession.user))
+        .filter(ActiveSession.last_activity >= expiration_cutoff)
+        .order_by(ActiveSession.last_activity.desc())
+        .all()
+    )
@@ -0,0 +1,459 @@
+# ------------------------------------------------------------------------------------
+# rate_limiter.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for throttling login and
+# code-issuing endpoints with sliding-window counters keyed by username and
+# client IP, so brute-force attempts are rejected before they reach the
+# login logic, the login attempt log or the email outbox.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    app.py - Login, send code, RFID and WebAuthn endpoints that are rate limited
+#    models.py - RateLimitCounter model used by the SQL backend
+#    config.py - Limits, backend and proxy settings
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statements: Standard library modules used by the rate limiter
+# math: Rounds Retry-After up to whole seconds
+# threading: Lock for the in-memory state
+# time: Wall clock for shared windows, monotonic clock for the local block cache
+import math
+import threading
+import time
+
+# Python import statement: Imports wraps to keep the view function's name and docstring
+from functools import wraps
+
+# Python import statement: Imports Flask request helpers
+from flask import request, jsonify, make_response
+
+# Python import statement: Imports select for the previous window's count
+from sqlalchemy import select
+
+# Python import statement: Imports IntegrityError raised when two workers create the same counter
+from sqlalchemy.exc import IntegrityError
+
+# Python import statement: Imports the RateLimitCounter model, db instance and upsert helper
+from models import RateLimitCounter, db, upsert_insert
+
+# Python import statement: Imports the username normalization helper
+from auth import normalize_username
+
+
+def parse_limit(value):
+    """
+    Parse a limit setting such as '10/300' (10 requests per 300 seconds).
+
+    Args:
+        value: Limit string, or None/'' to disable the limit
+
+    Returns:
+        Tuple of (limit, period_seconds), or None if disabled
+    """
+    if not value:
+        return None
+    count, _, period = str(value).partition('/')
+    limit, period = int(count), int(period or 60)
+    if limit <= 0 or period <= 0:
+        return None
+    return limit, period
+
+
+class MemoryRateLimitBackend:
+    """
+    Rate limit backend that keeps counters in this process's memory.
+
+    No database access at all, but each gunicorn worker counts separately, so
+    the effective limit is multiplied by the number of workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> (period, {window_start: count}) for the current and previous window
+        self._counters = {}
+
+    def hit(self, hits):
+        """
+        Count one request against each key.
+
+        Args:
+            hits: List of (key, window_start, period) tuples
+
+        Returns:
+            List of (previous window count, current window count including this request)
+        """
+        results = []
+        with self._lock:
+            for key, window_start, period in hits:
+                windows = self._counters.setdefault(key, (period, {}))[1]
+                windows[window_start] = windows.get(window_start, 0) + 1
+                # Only the current and previous window are ever read
+                for start in [start for start in windows if start < window_start - period]:
+                    del windows[start]
+                results.append((windows.get(window_start - period, 0), windows[window_start]))
+        return results
+
+    def release(self, hits):
+        """
+        Take back requests counted by hit() (the request was rejected).
+
+        Args:
+            hits: The list passed to hit()
+        """
+        with self._lock:
+            for key, window_start, period in hits:
+                windows = self._counters.get(key, (period, {}))[1]
+                if windows.get(window_start):
+                    windows[window_start] -= 1
+
+    def purge_expired(self, now):
+        with self._lock:
+            expired = [
+                key for key, (period, windows) in self._counters.items()
+                if max(windows) + 2 * period <= now
+            ]
+            for key in expired:
+                del self._counters[key]
+        return len(expired)
+
+
+class SQLRateLimitBackend:
+    """
+    Rate limit backend that stores counters in the rate_limit_counter table.
+
+    Shared by all workers and instances using the same database. Each counter
+    row is one fixed window of one key. A request costs one INSERT ... ON
+    CONFLICT DO UPDATE per key, which increments the current window and
+    returns it together with the previous window's count, and a single commit
+    for all keys. Databases without ON CONFLICT use an UPDATE, an INSERT for
+    the first request of a window, and a SELECT of both windows.
+    """
+
+    def hit(self, hits):
+        """
+        Count one request against each key in one transaction.
+
+        Args:
+            hits: List of (key, window_start, period) tuples
+
+        Returns:
+            List of (previous window count, current window count including this request)
+        """
+        insert = upsert_insert(RateLimitCounter)
+        if insert is None:
+            results = [self._hit_without_upsert(key, window_start, period) for key, window_start, period in hits]
+        else:
+            table = RateLimitCounter.__table__
+            results = []
+            for key, window_start, period in hits:
+                previous = select(table.c.count).where(
+                    table.c.key == key,
+                    table.c.window_start == window_start - period
+                ).scalar_subquery()
+                row = db.session.execute(insert.values(
+                    key=key,
+                    window_start=window_start,
+                    count=1,
+                    expires_at=window_start + 2 * period
+                ).on_conflict_do_update(
+                    index_elements=[table.c.key, table.c.window_start],
+                    set_={'count': table.c.count + 1}
+                ).returning(previous, table.c.count)).one()
+                results.append((row[0] or 0, row[1]))
+        db.session.commit()
+        return results
+
+    def release(self, hits):
+        """
+        Take back requests counted by hit() (the request was rejected).
+
+        Args:
+            hits: The list passed to hit()
+        """
+        for key, window_start, period in hits:
+            RateLimitCounter.query.filter(
+                RateLimitCounter.key == key,
+                RateLimitCounter.window_start == window_start,
+                RateLimitCounter.count > 0
+            ).update({'count': RateLimitCounter.count - 1}, synchronize_session=False)
+        db.session.commit()
+
+    def purge_expired(self, now):
+        deleted = RateLimitCounter.query.filter(
+            RateLimitCounter.expires_at <= now
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def _hit_without_upsert(self, key, window_start, period):
+        if not self._update(key, window_start):
+            try:
+                # Savepoint: a failed INSERT must not undo the other keys' increments
+                with db.session.begin_nested():
+                    db.session.add(RateLimitCounter(
+                        key=key,
+                        window_start=window_start,
+                        count=1,
+                        expires_at=window_start + 2 * period
+                    ))
+            except IntegrityError:
+                # Another worker created the row first - increment it instead
+                self._update(key, window_start)
+        rows = db.session.query(RateLimitCounter.window_start, RateLimitCounter.count).filter(
+            RateLimitCounter.key == key,
+            RateLimitCounter.window_start.in_([window_start - period, window_start])
+        ).all()
+        counts = {row.window_start: row.count for row in rows}
+        return counts.get(window_start - period, 0), counts.get(window_start, 0)
+
+    def _update(self, key, window_start):
+        return RateLimitCounter.query.filter(
+            RateLimitCounter.key == key,
+            RateLimitCounter.window_start == window_start
+        ).update({'count': RateLimitCounter.count + 1}, synchronize_session=False)
+
+
+class RateLimiter:
+    """
+    Sliding-window rate limiter keyed by username and client IP.
+
+    Each key has a counter per fixed window of `period` seconds. The request
+    rate is estimated as the previous window's count, weighted by how much of
+    it still overlaps the sliding window, plus the current window's count.
+    This approximates a true sliding window with two counters per key.
+
+    A rejected request is not counted, and the key is remembered in a small
+    per-worker block list until its Retry-After time, so a client that keeps
+    retrying is rejected without any backend access. The backend is chosen
+    with RATE_LIMIT_BACKEND ('sql' or 'memory').
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        # key -> monotonic time until which the key is known to be over its limit
+        self._blocked = {}
+        self.backend = SQLRateLimitBackend()
+        self.enabled = True
+        self.proxy_count = 0
+        # Set once the X-Forwarded-For warning below has been printed in this worker
+        self._proxy_warning_logged = False
+        self.rules = {}
+        self.rejected = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configure the rate limiter for a Flask application.
+
+        Args:
+            app: Flask application instance
+        """
+        backend = app.config.get('RATE_LIMIT_BACKEND', 'sql')
+        if backend == 'memory':
+            self.backend = MemoryRateLimitBackend()
+        elif backend == 'sql':
+            self.backend = SQLRateLimitBackend()
+        else:
+            raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.proxy_count = app.config.get('RATE_LIMIT_PROXY_COUNT', 0)
+        # scope -> {'user': (limit, period) or None, 'ip': (limit, period) or None}
+        self.rules = {
+            'login': {
+                'user': parse_limit(app.config.get('RATE_LIMIT_LOGIN_USER')),
+                'ip': parse_limit(app.config.get('RATE_LIMIT_LOGIN_IP'))
+            },
+            'email-code': {
+                'user': parse_limit(app.config.get('RATE_LIMIT_EMAIL_CODE_USER')),
+                'ip': parse_limit(app.config.get('RATE_LIMIT_EMAIL_CODE_IP'))
+            }
+        }
+        app.extensions['rate_limiter'] = self
+
+    def limit(self, scope, on_limited=None):
+        """
+        Decorator that rate limits POST requests to a route.
+
+        Args:
+            scope: Rule name from self.rules ('login' or 'email-code')
+            on_limited: Optional callable(retry_after) returning the response for a
+                        rejected request (default: JSON 429 response)
+
+        Returns:
+            Decorator function
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if request.method == 'POST':
+                    retry_after = self.check(scope, self.request_username(), self.client_ip())
+                    if retry_after:
+                        if on_limited is not None:
+                            response = on_limited(retry_after)
+                        else:
+                            response = jsonify({
+                                'success': False,
+                                'error': f'Too many attempts. Please try again in {retry_after} seconds.'
+                            }), 429
+                        return self._with_retry_after(response, retry_after)
+                return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def check(self, scope, username, ip_address):
+        """
+        Count a request against a scope's limits.
+
+        Args:
+            scope: Rule name from self.rules
+            username: Normalized username from the request, or None
+            ip_address: Client IP address, or None
+
+        Returns:
+            0 if the request is allowed, otherwise seconds until it may be retried
+        """
+        rules = self.rules.get(scope)
+        if not self.enabled or not rules:
+            return 0
+        checks = []
+        if username and rules['user']:
+            checks.append((f'{scope}:user:{username}', rules['user']))
+        if ip_address and rules['ip']:
+            checks.append((f'{scope}:ip:{ip_address}', rules['ip']))
+
+        try:
+            for key, _ in checks:
+                retry_after = self._blocked_for(key)
+                if retry_after:
+                    return self._reject(key, retry_after)
+            if not checks:
+                return 0
+            now = time.time()
+            hits = [(key, int(now // period) * period, period) for key, (limit, period) in checks]
+            for (key, (limit, period)), (previous, current) in zip(checks, self.backend.hit(hits)):
+                # The counts include this request - the limit applies to the ones before it
+                retry_after = self._retry_after(previous, current - 1, limit, period, now)
+                if retry_after:
+                    # A rejected request is not counted
+                    self.backend.release(hits)
+                    return self._reject(key, retry_after)
+        except Exception as e:
+            # Never lock everybody out because the counter store failed
+            db.session.rollback()
+            print(f"Rate limiter error (request allowed): {e}")
+        return 0
+
+    def purge_expired(self):
+        """
+        Delete counters whose windows can no longer affect a limit
+        (run periodically by the maintenance scheduler).
+
+        Returns:
+            Number of counters deleted
+        """
+        now = time.monotonic()
+        with self._lock:
+            for key in [key for key, until in self._blocked.items() if until <= now]:
+                del self._blocked[key]
+        return self.backend.purge_expired(int(time.time()))
+
+    def request_username(self):
+        """
+        Get the normalized username from the form or JSON body of the request.
+
+        Returns:
+            Username string, or None if the request has none
+        """
+        username = request.form.get('username')
+        if username is None:
+            data = request.get_json(silent=True)
+            if isinstance(data, dict):
+                username = data.get('username')
+        if not isinstance(username, str) or not username.strip():
+            return None
+        return normalize_username(username.strip())[:80]
+
+    def client_ip(self):
+        """
+        Get the client IP address.
+
+        With RATE_LIMIT_PROXY_COUNT set, the address added to X-Forwarded-For by
+        the outermost trusted proxy is used instead of the proxy's own address.
+        Without it, a request carrying X-Forwarded-For prints a warning (once
+        per worker): behind a proxy every client would share one IP bucket.
+
+        Returns:
+            IP address string, or None
+        """
+        if self.proxy_count > 0:
+            forwarded = [part.strip() for part in request.headers.get('X-Forwarded-For', '').split(',') if part.strip()]
+            if len(forwarded) >= self.proxy_count:
+                return forwarded[-self.proxy_count]
+        elif not self._proxy_warning_logged and request.headers.get('X-Forwarded-For'):
+            self._proxy_warning_logged = True
+            print(
+                f"[WARNING] Request has X-Forwarded-For but RATE_LIMIT_PROXY_COUNT is 0 - the per-IP rate "
+                f"limits use the proxy address {request.remote_addr} for every client. "
+                "Set RATE_LIMIT_PROXY_COUNT to the number of reverse proxies."
+            )
+        return request.remote_addr
+
+    def _blocked_for(self, key):
+        with self._lock:
+            until = self._blocked.get(key)
+            if until is None:
+                return 0
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                del self._blocked[key]
+                return 0
+            return math.ceil(remaining)
+
+    def _reject(self, key, retry_after):
+        # Rejected without touching the backend until Retry-After has passed
+        with self._lock:
+            self._blocked[key] = time.monotonic() + retry_after
+            self.rejected += 1
+        return retry_after
+
+    @staticmethod
+    def _retry_after(previous, current, limit, period, now):
+        elapsed = now - int(now // period) * period
+        # Weight of the previous window still inside the sliding window
+        weight = 1 - elapsed / period
+        if previous * weight + current < limit:
+            return 0
+        if current >= limit:
+            # Wait for the next window, then for this window's weight to decay below the limit
+            wait = (period - elapsed) + period * (1 - limit / current)
+        else:
+            # Wait for the previous window's weight to decay below the limit
+            wait = period * (1 - (limit - current) / previous) - elapsed
+        return max(1, math.ceil(wait))
+
+    @staticmethod
+    def _with_retry_after(response, retry_after):
+        # Views may return (body, status) tuples or Response objects
+        response = make_response(response)
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+
+
+# Shared rate limiter instance, initialized with the app in app.py
+rate_limiter = RateLimiter()
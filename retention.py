@@ -0,0 +1,274 @@
+# ------------------------------------------------------------------------------------
+# retention.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for keeping only a
+# recent window of login attempts in the login_attempt table and moving older
+# rows, in small batches, to an archive table or to compressed JSONL files.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    app.py - Retention job and archive command
+#    models.py - LoginAttempt and LoginAttemptArchive models
+#    site_stats.py - Successful login total reduced by the archived rows
+#    login_rollups.py - Hourly counts, kept for archived hours
+#    config.py - Retention window, archive target and batch settings
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statements: Standard library modules used for archiving
+# gzip: Compressed archive files
+# json: One JSON object per archived row
+# os: Archive directory and fsync
+import gzip
+import json
+import os
+
+# Python import statement: Imports datetime helpers for the retention cutoff
+from datetime import timedelta
+
+# Python import statement: Imports SQL expression helpers
+from sqlalchemy import delete, func, select, text
+
+# Python import statement: Imports the models and db instance
+from models import LoginAttempt, LoginAttemptArchive, db
+
+# Python import statement: Imports the maintained dashboard totals
+from site_stats import site_stats
+
+# Python import statement: Imports the hour rounding shared with the login rollups
+from login_rollups import hour_bucket
+
+# Python import statement: Imports the EST time helper (login timestamps use EST wall-clock time)
+from auth import get_est_time
+
+
+# LoginAttempt columns copied to the archive
+ARCHIVE_COLUMNS = ('id', 'timestamp', 'user_id', 'username', 'method', 'status', 'ip_address', 'user_agent')
+
+
+def month_start(timestamp):
+    """
+    Get the first moment of the month a timestamp belongs to.
+
+    Args:
+        timestamp: Naive datetime
+
+    Returns:
+        Naive datetime at midnight on the first day of the month
+    """
+    return timestamp.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(timestamp):
+    """
+    Get the first moment of the month after the one a timestamp belongs to.
+
+    Args:
+        timestamp: Naive datetime
+
+    Returns:
+        Naive datetime at midnight on the first day of the next month
+    """
+    start = month_start(timestamp)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+class LoginAttemptRetention:
+    """
+    Moves login attempts older than LOGIN_RETENTION_DAYS out of login_attempt.
+
+    LOGIN_ARCHIVE_TARGET decides where they go: 'table' (login_attempt_archive,
+    partitioned by month on PostgreSQL) or 'file' (gzip-compressed JSONL files,
+    one per month, in LOGIN_ARCHIVE_DIR).
+
+    Rows are moved oldest hour first, at most LOGIN_RETENTION_BATCH_SIZE rows
+    per transaction, so locks are only held briefly and login requests keep
+    running in between. Batches end at an hour boundary whenever possible.
+    Each batch is a DELETE ... RETURNING whose rows are written to the archive
+    before the commit, so two workers running the job at once never archive
+    the same row twice. A scheduled run stops after LOGIN_RETENTION_MAX_BATCHES
+    batches (at the end of an hour) and continues on its next run.
+    """
+
+    def __init__(self, app=None):
+        self.retention_days = 0
+        self.target = 'table'
+        self.archive_dir = None
+        self.batch_size = 1000
+        self.max_batches = 100
+        # Archive partitions known to exist (PostgreSQL)
+        self._partitions = set()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configure retention for a Flask application.
+
+        Args:
+            app: Flask application instance
+        """
+        target = app.config.get('LOGIN_ARCHIVE_TARGET', 'table')
+        if target not in ('table', 'file'):
+            raise ValueError(f"Unknown LOGIN_ARCHIVE_TARGET: {target}")
+        self.retention_days = app.config.get('LOGIN_RETENTION_DAYS', 0)
+        self.target = target
+        self.archive_dir = app.config.get('LOGIN_ARCHIVE_DIR') or os.path.join(app.instance_path, 'login_archive')
+        self.batch_size = app.config.get('LOGIN_RETENTION_BATCH_SIZE', 1000)
+        self.max_batches = app.config.get('LOGIN_RETENTION_MAX_BATCHES', 100)
+        app.extensions['login_retention'] = self
+
+    def cutoff(self):
+        """
+        Get the start of the retention window.
+
+        Returns:
+            Naive EST datetime (start of an hour) - older attempts are archived,
+            or None if retention is disabled
+        """
+        if self.retention_days <= 0:
+            return None
+        return hour_bucket(get_est_time()) - timedelta(days=self.retention_days)
+
+    def run(self):
+        """
+        Archive old login attempts (scheduled job, limited to LOGIN_RETENTION_MAX_BATCHES batches).
+
+        Returns:
+            Number of login attempts archived
+        """
+        archived = self.archive(max_batches=self.max_batches)
+        if archived:
+            print(f"[MAINTENANCE] Archived {archived} login attempts to {self.target}")
+        return archived
+
+    def archive(self, cutoff=None, max_batches=None):
+        """
+        Move login attempts older than the cutoff to the archive.
+
+        Whole hours are archived before stopping, so the oldest hour left in
+        login_attempt is always complete (the login rollups rely on this).
+
+        Args:
+            cutoff: Archive attempts before this time (default: the retention window)
+            max_batches: Stop after this many batches (None to archive everything)
+
+        Returns:
+            Number of login attempts archived
+        """
+        cutoff = cutoff or self.cutoff()
+        if cutoff is None:
+            return 0
+        archived = 0
+        batches = 0
+        inside_hour = False
+        # A batch that stopped inside an hour is always followed by the rest of that hour
+        while max_batches is None or batches < max_batches or inside_hour:
+            moved, inside_hour = self._archive_batch(cutoff)
+            if not moved:
+                break
+            archived += moved
+            batches += 1
+        return archived
+
+    def _archive_batch(self, cutoff):
+        table = LoginAttempt.__table__
+        # Timestamp of the batch_size-th oldest attempt - the batch ends at the start of its hour
+        last = db.session.execute(
+            select(table.c.timestamp).where(table.c.timestamp < cutoff).order_by(
+                table.c.timestamp, table.c.id
+            ).offset(self.batch_size - 1).limit(1)
+        ).scalar()
+        oldest = db.session.execute(select(func.min(table.c.timestamp))).scalar()
+        db.session.rollback()
+        if last is None:
+            # Fewer than batch_size attempts left before the cutoff
+            before, inside_hour = cutoff, False
+        elif hour_bucket(last) > hour_bucket(oldest):
+            # Whole hours only
+            before, inside_hour = hour_bucket(last), False
+        else:
+            # The oldest hour alone has more than batch_size attempts
+            before, inside_hour = cutoff, True
+        ids = select(table.c.id).where(table.c.timestamp < before).order_by(
+            table.c.timestamp, table.c.id
+        ).limit(self.batch_size)
+        columns = [table.c[name] for name in ARCHIVE_COLUMNS]
+        with db.engine.begin() as connection:
+            if connection.dialect.delete_returning:
+                rows = connection.execute(
+                    delete(table).where(table.c.id.in_(ids)).returning(*columns)
+                ).mappings().all()
+            else:
+                rows = connection.execute(select(*columns).where(table.c.id.in_(ids))).mappings().all()
+                connection.execute(delete(table).where(table.c.id.in_([row['id'] for row in rows])))
+            if not rows:
+                return 0, False
+            if self.target == 'file':
+                self._write_files(rows)
+            else:
+                try:
+                    self._ensure_partitions(connection, rows)
+                    connection.execute(LoginAttemptArchive.__table__.insert(), [dict(row) for row in rows])
+                except Exception:
+                    # Partitions created in this transaction are rolled back with it
+                    self._partitions.clear()
+                    raise
+            # The dashboard total counts login_attempt rows - keep it in the same transaction
+            site_stats.increment(
+                'successful_logins',
+                -sum(1 for row in rows if row['status'] == 'success'),
+                connection=connection
+            )
+        return len(rows), inside_hour
+
+    def _ensure_partitions(self, connection, rows):
+        # PostgreSQL only: create the monthly partition for each month in the batch
+        if connection.dialect.name != 'postgresql':
+            return
+        for start in {month_start(row['timestamp']) for row in rows} - self._partitions:
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS login_attempt_archive_{start:%Y_%m} "
+                f"PARTITION OF login_attempt_archive "
+                f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{next_month(start):%Y-%m-%d}')"
+            ))
+            self._partitions.add(start)
+
+    def _write_files(self, rows):
+        # One gzip member per batch appended to the month's file (gzip readers read all members)
+        # Written and synced before the DELETE commits; if the commit fails the rows
+        # stay in login_attempt and are archived again, so files may contain duplicates
+        os.makedirs(self.archive_dir, exist_ok=True)
+        months = {}
+        for row in rows:
+            months.setdefault(month_start(row['timestamp']), []).append(row)
+        for start, month_rows in months.items():
+            path = os.path.join(self.archive_dir, f"login_attempts-{start:%Y-%m}.jsonl.gz")
+            with open(path, 'ab') as archive_file:
+                with gzip.GzipFile(fileobj=archive_file, mode='wb') as gzip_file:
+                    for row in month_rows:
+                        record = dict(row)
+                        record['timestamp'] = record['timestamp'].isoformat()
+                        gzip_file.write(json.dumps(record).encode() + b'\n')
+                archive_file.flush()
+                os.fsync(archive_file.fileno())
+
+
+# Shared retention instance, initialized with the app in app.py
+login_retention = LoginAttemptRetention()
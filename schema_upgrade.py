@@ -0,0 +1,135 @@
+# ------------------------------------------------------------------------------------
+# schema_upgrade.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for adding new model
+# columns to the tables of an existing database, run at every startup so a
+# deploy never serves requests against an older schema.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    app.py - initialize_database() runs upgrade_schema() under the startup lock
+#    migrate_db.py - Manual migration script (also runs upgrade_schema())
+#    models.py - Models whose columns are added and backfilled here
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statement: Imports text for running raw DDL statements
+# inspect: Reads the existing columns of a table
+# or_: Combines backfill conditions
+from sqlalchemy import text, inspect, or_
+
+# Python import statement: Imports the db instance and the models with added columns
+from models import db, User, WebAuthnCredential
+
+
+def added_columns():
+    """
+    Get the model columns added after their table was first created.
+
+    db.create_all() creates them on a new database but never adds them to an
+    existing table, so they are added by upgrade_schema().
+
+    Returns:
+        List of SQLAlchemy Column objects
+    """
+    return [
+        User.__table__.c.otp_last_counter,
+        WebAuthnCredential.__table__.c.credential_id_raw,
+        WebAuthnCredential.__table__.c.public_key_cose,
+    ]
+
+
+def add_column_if_missing(column):
+    """
+    Add a model column to an existing table if the table does not have it yet.
+
+    Uses ALTER TABLE ... ADD COLUMN (a metadata-only change on both SQLite and
+    PostgreSQL when the column is nullable and has no default).
+
+    Args:
+        column: SQLAlchemy Column object taken from a model's table
+
+    Returns:
+        True if the column was added
+    """
+    table_name = column.table.name
+    existing_columns = {info['name'] for info in inspect(db.engine).get_columns(table_name)}
+    if column.name in existing_columns:
+        return False
+
+    preparer = db.engine.dialect.identifier_preparer
+    column_type = column.type.compile(dialect=db.engine.dialect)
+    with db.engine.begin() as connection:
+        connection.execute(text(
+            f'ALTER TABLE {preparer.quote(table_name)} ADD COLUMN {preparer.quote(column.name)} {column_type}'
+        ))
+    print(f"  ✓ Column {column.name} on {table_name}")
+    return True
+
+
+def backfill_webauthn_credentials(batch_size=500):
+    """
+    Fill the binary WebAuthn credential columns from the existing text columns.
+
+    credential_id_raw is decoded from the base64 credential_id, and public_key_cose
+    from the JSON public_key. Rows are processed in primary key order in batches,
+    each committed on its own. Legacy integer credential IDs keep a NULL
+    credential_id_raw and are matched by the legacy fallback at login.
+
+    Args:
+        batch_size: Number of rows read and updated per transaction
+    """
+    updated_ids = 0
+    updated_keys = 0
+    last_id = 0
+    while True:
+        credentials = WebAuthnCredential.query.filter(
+            WebAuthnCredential.id > last_id,
+            or_(WebAuthnCredential.credential_id_raw.is_(None), WebAuthnCredential.public_key_cose.is_(None))
+        ).order_by(WebAuthnCredential.id).limit(batch_size).all()
+        if not credentials:
+            break
+        for credential in credentials:
+            try:
+                if credential.credential_id_raw is None:
+                    credential.credential_id_raw = WebAuthnCredential.decode_credential_id(credential.credential_id)
+                    updated_ids += credential.credential_id_raw is not None
+                if credential.public_key_cose is None:
+                    credential.public_key_cose = WebAuthnCredential.decode_public_key(credential.public_key)
+                    updated_keys += credential.public_key_cose is not None
+            except ValueError as e:
+                print(f"  ! Could not decode credential {credential.id}: {e}")
+        last_id = credentials[-1].id
+        db.session.commit()
+    if updated_ids or updated_keys:
+        print(f"  ✓ Backfilled {updated_ids} raw WebAuthn credential IDs and {updated_keys} COSE public keys")
+
+
+def upgrade_schema():
+    """
+    Add missing model columns to existing tables and fill them from existing data.
+
+    Called at startup by initialize_database() after db.create_all(), while
+    it holds the startup lock, and by migrate_db.py. Once the database is up
+    to date this is one column lookup per table and one backfill query.
+
+    WebAuthn login looks credentials up by credential_id_raw, so the backfill
+    has to run before workers serve requests, not only from migrate_db.py.
+    """
+    for column in added_columns():
+        add_column_if_missing(column)
+    backfill_webauthn_credentials()
@@ -0,0 +1,217 @@
+# ------------------------------------------------------------------------------------
+# session_activity.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for buffering active session
+# activity updates in memory and writing them to the database in batches.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    app.py - Main Flask application that initializes the buffer
+#    auth.py - Session tracking that records activity into the buffer
+#    models.py - ActiveSession model updated by the buffer
+#    config.py - Flush interval and size settings
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statements: Standard library modules used by the buffer
+# atexit: Flushes pending updates when the worker process exits
+# threading: Lock for thread-safe access and background flush thread
+import atexit
+import threading
+
+# Python import statement: Imports OrderedDict to keep known sessions in least recently used order
+from collections import OrderedDict
+
+# Python import statement: Imports contextlib.nullcontext for optional app contexts
+from contextlib import nullcontext
+
+# Python import statement: Imports has_app_context to detect if we are inside a request
+from flask import has_app_context
+
+# Python import statement: Imports bindparam for building the batched UPDATE statement
+from sqlalchemy import bindparam
+
+# Python import statement: Imports database models and db instance
+# ActiveSession: Model whose last_activity column is updated in batches
+# db: SQLAlchemy database instance
+from models import ActiveSession, db
+
+
+class SessionActivityBuffer:
+    """
+    In-process write-behind buffer for ActiveSession.last_activity updates.
+
+    Activity timestamps are collected per session_id and merged in memory (only
+    the most recent timestamp for each session is kept). Pending updates are
+    written in one batched UPDATE when the buffer reaches SESSION_ACTIVITY_FLUSH_SIZE
+    entries, every SESSION_ACTIVITY_FLUSH_INTERVAL seconds, and on worker shutdown.
+
+    Session ids whose row is known to exist are remembered in an LRU of at most
+    SESSION_ACTIVITY_KNOWN_SESSIONS entries; an evicted session simply goes
+    through the create path again on its next request.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        # session_id -> most recent last_activity timestamp waiting to be written
+        self._pending = {}
+        # session_ids this worker knows to exist in the active_session table (least recently used first)
+        self._known_sessions = OrderedDict()
+        self._flush_thread = None
+        self._stop_event = threading.Event()
+        self._app = None
+        self.flush_interval = 30
+        self.flush_size = 500
+        self.known_sessions_size = 10000
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configure the buffer for a Flask application and register the shutdown flush.
+
+        Args:
+            app: Flask application instance
+        """
+        self._app = app
+        self.flush_interval = app.config.get('SESSION_ACTIVITY_FLUSH_INTERVAL', 30)
+        self.flush_size = app.config.get('SESSION_ACTIVITY_FLUSH_SIZE', 500)
+        self.known_sessions_size = app.config.get('SESSION_ACTIVITY_KNOWN_SESSIONS', 10000)
+        app.extensions['session_activity_buffer'] = self
+        atexit.register(self.shutdown)
+
+    def is_known(self, session_id):
+        """
+        Check if a session is already known to exist in the database.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            True if the session row was created or seen by this worker
+        """
+        with self._lock:
+            if session_id not in self._known_sessions:
+                return False
+            self._known_sessions.move_to_end(session_id)
+            return True
+
+    def mark_known(self, session_id):
+        """
+        Remember that a session row exists so later activity can be buffered.
+
+        Args:
+            session_id: Session identifier
+        """
+        with self._lock:
+            self._known_sessions[session_id] = True
+            self._known_sessions.move_to_end(session_id)
+            while len(self._known_sessions) > self.known_sessions_size:
+                self._known_sessions.popitem(last=False)
+
+    def record(self, session_id, timestamp):
+        """
+        Record activity for a session, keeping only the latest timestamp.
+
+        Args:
+            session_id: Session identifier
+            timestamp: Naive UTC datetime of the activity
+        """
+        with self._lock:
+            current = self._pending.get(session_id)
+            if current is None or timestamp > current:
+                self._pending[session_id] = timestamp
+            flush_due = len(self._pending) >= self.flush_size
+        self._ensure_flush_thread()
+        if flush_due:
+            self.flush()
+
+    def flush(self):
+        """
+        Write all pending last_activity updates in a single batched UPDATE.
+
+        Returns:
+            Number of sessions written
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+        if not pending:
+            return 0
+
+        table = ActiveSession.__table__
+        statement = table.update().where(
+            table.c.session_id == bindparam('b_session_id')
+        ).values(last_activity=bindparam('b_last_activity'))
+        params = [
+            {'b_session_id': session_id, 'b_last_activity': timestamp}
+            for session_id, timestamp in pending.items()
+        ]
+
+        try:
+            with self._app_context():
+                with db.engine.begin() as connection:
+                    result = connection.execute(statement, params)
+            # Rows may have been removed (expired or logged out) since they were seen;
+            # forget them so the next request goes through the create path again
+            if 0 <= result.rowcount < len(params):
+                with self._lock:
+                    for session_id in pending:
+                        self._known_sessions.pop(session_id, None)
+            return len(params)
+        except Exception as e:
+            print(f"Error flushing session activity: {e}")
+            # Put the updates back so they are retried on the next flush
+            with self._lock:
+                for session_id, timestamp in pending.items():
+                    current = self._pending.get(session_id)
+                    if current is None or timestamp > current:
+                        self._pending[session_id] = timestamp
+            return 0
+
+    def shutdown(self):
+        """Stop the background flush thread and write any pending updates."""
+        self._stop_event.set()
+        self.flush()
+
+    def _app_context(self):
+        # Reuse the current request's app context, or push one for background flushes
+        if has_app_context() or self._app is None:
+            return nullcontext()
+        return self._app.app_context()
+
+    def _ensure_flush_thread(self):
+        # Started lazily so each gunicorn worker runs its own flusher after forking
+        if self._flush_thread is not None and self._flush_thread.is_alive():
+            return
+        with self._lock:
+            if self._flush_thread is not None and self._flush_thread.is_alive():
+                return
+            self._flush_thread = threading.Thread(
+                target=self._run_flush_loop,
+                name='session-activity-flush',
+                daemon=True
+            )
+            self._flush_thread.start()
+
+    def _run_flush_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+
+# Shared buffer instance, initialized with the app in app.py
+session_activity_buffer = SessionActivityBuffer()
@@ -0,0 +1,153 @@
+# ------------------------------------------------------------------------------------
+# site_stats.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for keeping running
+# totals (users, successful logins) in a small statistics table, so the admin
+# dashboard reads them by primary key instead of counting large tables.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    app.py - Admin dashboard and user management routes
+#    audit_log.py - Counts successful logins as they are written
+#    update_user.py - Command line script that creates users
+#    models.py - SiteStatistic model
+#    config.py - Reconciliation interval setting
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statement: Imports SQL expression helpers
+from sqlalchemy import func, select, update
+
+# Python import statement: Imports IntegrityError raised when two processes create the same statistic
+from sqlalchemy.exc import IntegrityError
+
+# Python import statement: Imports the models whose rows are counted and the db instance
+from models import SiteStatistic, User, LoginAttempt, db
+
+
+# Statistic name -> query that counts it from the source table
+STATISTIC_QUERIES = {
+    'total_users': lambda: select(func.count()).select_from(User),
+    'successful_logins': lambda: select(func.count()).select_from(LoginAttempt).where(LoginAttempt.status == 'success'),
+}
+
+
+class SiteStats:
+    """
+    Maintained totals stored in the site_statistic table.
+
+    Writers call increment() in the same transaction as the rows they add or
+    remove; it is a single UPDATE ... SET value = value + delta, so concurrent
+    writers never lose updates. reconcile() recounts the source tables and
+    corrects any drift (e.g. rows changed outside the application). It runs
+    once at startup (in the gunicorn master, see initialize_database) and
+    periodically from the maintenance scheduler of a single worker.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Register the statistics with a Flask application.
+
+        Args:
+            app: Flask application instance
+        """
+        app.extensions['site_stats'] = self
+
+    def increment(self, name, delta=1, connection=None):
+        """
+        Add to a statistic as part of the caller's transaction (not committed here).
+
+        Args:
+            name: Statistic name from STATISTIC_QUERIES
+            delta: Amount to add (negative to subtract)
+            connection: Connection to use instead of db.session (e.g. a bulk insert's connection)
+        """
+        if not delta:
+            return
+        table = SiteStatistic.__table__
+        statement = update(table).where(table.c.name == name).values(value=table.c.value + delta)
+        (connection or db.session).execute(statement)
+
+    def get(self, *names):
+        """
+        Read statistics by primary key.
+
+        A statistic that has no row yet (e.g. a database created before this
+        table existed) is counted once and stored.
+
+        Args:
+            names: Statistic names from STATISTIC_QUERIES
+
+        Returns:
+            Dictionary of name -> value
+        """
+        rows = db.session.query(SiteStatistic.name, SiteStatistic.value).filter(
+            SiteStatistic.name.in_(names)
+        ).all()
+        values = {row.name: row.value for row in rows}
+        for name in names:
+            if name not in values:
+                values[name] = self._reconcile_one(name)[1]
+        return values
+
+    def reconcile(self):
+        """
+        Recount every statistic from its source table and fix any drift
+        (run at startup and periodically by the maintenance scheduler).
+
+        Returns:
+            Dictionary of name -> difference that was corrected (0 if it was right)
+        """
+        drift = {}
+        for name in STATISTIC_QUERIES:
+            old_value, new_value = self._reconcile_one(name)
+            drift[name] = new_value - (old_value or 0)
+            if old_value is not None and old_value != new_value:
+                print(f"[WARNING] Statistic {name} was {old_value}, corrected to {new_value}")
+        return drift
+
+    def _reconcile_one(self, name):
+        table = SiteStatistic.__table__
+        try:
+            with db.engine.begin() as connection:
+                # No-op UPDATE first: locks the row (the whole database on SQLite) so writers
+                # calling increment() wait until the recount is stored; with READ COMMITTED the
+                # COUNT below then sees every row whose increment was already applied
+                locked = connection.execute(
+                    update(table).where(table.c.name == name).values(value=table.c.value)
+                ).rowcount
+                count = connection.execute(STATISTIC_QUERIES[name]()).scalar()
+                if locked:
+                    old_value = connection.execute(select(table.c.value).where(table.c.name == name)).scalar()
+                    connection.execute(update(table).where(table.c.name == name).values(value=count))
+                else:
+                    old_value = None
+                    connection.execute(table.insert().values(name=name, value=count))
+            return old_value, count
+        except IntegrityError:
+            # Another process created the row at the same time - use its value
+            with db.engine.connect() as connection:
+                value = connection.execute(select(table.c.value).where(table.c.name == name)).scalar()
+            return None, value
+
+
+# Shared statistics instance, initialized with the app in app.py
+site_stats = SiteStats()
@@ -0,0 +1,100 @@
+# ------------------------------------------------------------------------------------
+# tests/conftest.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes shared pytest fixtures: the Flask app
+# on a temporary SQLite database, logged-in test clients and a SQL statement
+# counter.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    app.py - Flask application under test
+#    models.py - Database models
+#
+# ------------------------------------------------------------------------------------
+
+import os
+import sys
+import tempfile
+import threading
+
+import pytest
+
+# The database URL is read when config.py is imported, so it is set before importing the app
+TEST_DB_DIR = tempfile.mkdtemp(prefix='campuskey-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TEST_DB_DIR, 'test.db')}"
+os.environ.setdefault('EMAIL_SERVICE', 'smtp')
+# No background email workers - tests deliver outbox messages themselves
+os.environ['EMAIL_OUTBOX_WORKERS'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+
+@pytest.fixture(scope='session')
+def app():
+    """Flask app with tables and sample data (admin, professor, student) created."""
+    import app as app_module
+    app_module.app.config['TESTING'] = True
+    app_module.initialize_database()
+    return app_module.app
+
+
+@pytest.fixture
+def login_client(app):
+    """Return a function that creates a test client logged in as the given username."""
+    from models import User
+
+    def make_client(username):
+        with app.app_context():
+            user_id = User.query.filter_by(username=username).one().id
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        return client
+    return make_client
+
+
+class QueryCounter:
+    """Counts SQL statements executed by the current thread (background flush threads are ignored)."""
+
+    def __init__(self):
+        self.count = 0
+        self._thread_id = threading.get_ident()
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread_id:
+            self.count += 1
+
+
+@pytest.fixture
+def count_queries(app):
+    """Return a function that runs a callable and returns the number of SQL statements it executed."""
+    from models import db
+
+    with app.app_context():
+        engine = db.engine
+
+    def run(func):
+        counter = QueryCounter()
+        event.listen(engine, 'before_cursor_execute', counter)
+        try:
+            func()
+        finally:
+            event.remove(engine, 'before_cursor_execute', counter)
+        return counter.count
+    return run
@@ -0,0 +1,57 @@
+# ------------------------------------------------------------------------------------
+# tests/test_email_outbox.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes tests of the purge of delivered and
+# failed outbox messages, which still contain the verification code.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    email_outbox.py - EmailOutboxWorker.purge_finished
+#
+# ------------------------------------------------------------------------------------
+
+from datetime import timedelta
+
+
+def test_purge_removes_only_old_finished_messages(app):
+    from auth import get_utc_time
+    from email_outbox import email_outbox
+    from models import EmailOutbox, db
+
+    with app.app_context():
+        now = get_utc_time()
+        old = now - timedelta(seconds=email_outbox.retention + 60)
+        recent = now - timedelta(seconds=60)
+        messages = {
+            (status, label): EmailOutbox(
+                email='student@example.com', username='student', code='123456',
+                status=status, attempts=1, next_attempt_at=when
+            )
+            for status in ('pending', 'sending', 'sent', 'failed')
+            for label, when in (('old', old), ('recent', recent))
+        }
+        db.session.add_all(messages.values())
+        db.session.commit()
+        ids = {message.id: key for key, message in messages.items()}
+
+        try:
+            assert email_outbox.purge_finished() == 2
+            remaining = {ids[row.id] for row in EmailOutbox.query.filter(EmailOutbox.id.in_(ids))}
+            assert remaining == set(messages) - {('sent', 'old'), ('failed', 'old')}
+        finally:
+            EmailOutbox.query.filter(EmailOutbox.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
@@ -0,0 +1,186 @@
+# ------------------------------------------------------------------------------------
+# tests/test_email_templates.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes tests checking that the verification
+# email rendered from the Jinja2 templates matches the inline f-string bodies
+# it replaced, and that the templates are compiled only once per process.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    email_service.py - render_verification_email
+#    templates/email/verification_code.html - HTML body template
+#    templates/email/verification_code.txt - Plain text body template
+#
+# ------------------------------------------------------------------------------------
+
+import re
+import time
+
+import pytest
+
+from email_service import email_templates, render_verification_email
+
+
+# The SMTP bodies as they were built inline in send_email_code before the templates
+# ({email_address} and {code} were f-string fields)
+INLINE_HTML_BODY = """
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+</head>
+<body style="margin: 0; padding: 0; font-family: 'Google Sans', Roboto, Arial, sans-serif; background-color: #202124; color: #e8eaed;">
+    <table width="100%" cellpadding="0" cellspacing="0" style="background-color: #202124; padding: 20px;">
+        <tr>
+            <td align="center">
+                <table width="600" cellpadding="0" cellspacing="0" style="background-color: #202124; max-width: 600px;">
+                    <!-- Blue Banner Header -->
+                    <tr>
+                        <td style="background-color: #1a73e8; padding: 24px 32px; text-align: center;">
+                            <h1 style="margin: 0; color: #ffffff; font-size: 22px; font-weight: 400; letter-spacing: 0.25px;">CAMPUSKEY Verification Code</h1>
+                        </td>
+                    </tr>
+
+                    <!-- Email Body -->
+                    <tr>
+                        <td style="background-color: #202124; padding: 32px; color: #e8eaed; font-size: 14px; line-height: 20px;">
+                            <p style="margin: 0 0 16px 0; color: #e8eaed;">Dear CAMPUSKEY User,</p>
+
+                            <p style="margin: 0 0 16px 0; color: #e8eaed;">
+                                We received a request to access your CAMPUSKEY Account
+                                <span style="color: #8ab4f8; text-decoration: underline;">{email_address}</span>
+                                through your email address. Your CAMPUSKEY verification code is:
+                            </p>
+
+                            <!-- Verification Code Display -->
+                            <div style="margin: 24px 0; text-align: center;">
+                                <div style="font-size: 36px; font-weight: 400; color: #e8eaed; letter-spacing: 8px; font-family: 'Courier New', monospace;">
+                                    {code}
+                                </div>
+                            </div>
+
+                            <p style="margin: 16px 0; color: #e8eaed;">
+                                If you did not request this code, it is possible that someone else is trying to access the CAMPUSKEY Account
+                                <span style="color: #8ab4f8; text-decoration: underline;">{email_address}</span>.
+                                Do not forward or give this code to anyone.
+                            </p>
+
+                            <p style="margin: 24px 0 0 0; color: #e8eaed;">Sincerely yours,</p>
+                            <p style="margin: 4px 0 0 0; color: #e8eaed;">The CAMPUSKEY Security Team</p>
+                        </td>
+                    </tr>
+
+                    <!-- Footer -->
+                    <tr>
+                        <td style="padding: 16px 32px; text-align: center;">
+                            <p style="margin: 0; color: #9aa0a6; font-size: 12px; line-height: 16px;">
+                                This email can't receive replies. For more information, visit the
+                                <a href="#" style="color: #8ab4f8; text-decoration: underline;">CAMPUSKEY Help Center</a>.
+                            </p>
+                        </td>
+                    </tr>
+                </table>
+            </td>
+        </tr>
+    </table>
+</body>
+</html>
+"""
+
+INLINE_TEXT_BODY = """Dear CAMPUSKEY User,
+
+We received a request to access your CAMPUSKEY Account {email_address} through your email address. Your CAMPUSKEY verification code is:
+
+{code}
+
+If you did not request this code, it is possible that someone else is trying to access the CAMPUSKEY Account {email_address}. Do not forward or give this code to anyone.
+
+Sincerely yours,
+The CAMPUSKEY Security Team
+
+---
+This email can't receive replies. For more information, visit the CAMPUSKEY Help Center.
+"""
+
+
+def inline_bodies(email_address, code):
+    """Fill in the old inline bodies the way the f-strings did (no escaping)."""
+    def fill(body):
+        return body.replace('{email_address}', email_address).replace('{code}', code)
+    return fill(INLINE_TEXT_BODY), fill(INLINE_HTML_BODY)
+
+
+def normalize_html(body):
+    """Drop HTML comments and indentation - the templates use Jinja comments instead."""
+    body = re.sub(r'<!--.*?-->', '', body, flags=re.S)
+    return '\n'.join(line.strip() for line in body.splitlines() if line.strip())
+
+
+@pytest.mark.parametrize('email_address, code', [
+    ('student@example.com', '123456'),
+    ('-email-', '-code-'),
+])
+def test_rendered_bodies_match_inline_bodies(email_address, code):
+    text_body, html_body = render_verification_email(email_address, code)
+    old_text, old_html = inline_bodies(email_address, code)
+
+    assert text_body.strip() == old_text.strip()
+    assert normalize_html(html_body) == normalize_html(old_html)
+    # Markup comments are no longer sent to recipients
+    assert '<!--' not in html_body
+
+
+def test_html_body_escapes_the_address():
+    text_body, html_body = render_verification_email('a<b>&"c"@example.com', '123456')
+
+    assert 'a&lt;b&gt;&amp;&#34;c&#34;@example.com' in html_body
+    assert 'a<b>' not in html_body
+    # The plain text body is not HTML and is left as it is
+    assert 'a<b>&"c"@example.com' in text_body
+
+
+def test_templates_are_compiled_once(monkeypatch):
+    render_verification_email('student@example.com', '123456')
+    compiled = [email_templates.get_template(name) for name in ('verification_code.txt', 'verification_code.html')]
+
+    # Any further load from disk would go through the loader
+    def fail(*args, **kwargs):
+        raise AssertionError('template loaded from disk again')
+    monkeypatch.setattr(email_templates.loader, 'get_source', fail)
+
+    for _ in range(3):
+        render_verification_email('student@example.com', '654321')
+    assert [email_templates.get_template(name) for name in ('verification_code.txt', 'verification_code.html')] == compiled
+
+
+def test_render_cost_per_message():
+    # Reports the cost of rendering one message next to the old inline f-strings.
+    # Rendering is not expected to be faster - the templates remove the duplicated
+    # markup - so this only checks it stays far below the cost of sending an email.
+    runs = 2000
+    started = time.perf_counter()
+    for _ in range(runs):
+        render_verification_email('student@example.com', '123456')
+    rendered = (time.perf_counter() - started) / runs
+    started = time.perf_counter()
+    for _ in range(runs):
+        inline_bodies('student@example.com', '123456')
+    inline = (time.perf_counter() - started) / runs
+
+    print(f"\nrender_verification_email: {rendered * 1e6:.1f} us/message, inline bodies: {inline * 1e6:.1f} us/message")
+    assert rendered < 0.005
@@ -0,0 +1,107 @@
+# ------------------------------------------------------------------------------------
+# tests/test_exports.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes tests of the admin data export:
+# CSV cells that spreadsheet applications would run as formulas, and expired
+# sessions left out of the session export.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    exports.py - Export queries and encoding
+#    app.py - Admin export endpoint
+#
+# ------------------------------------------------------------------------------------
+
+import csv
+import io
+import json
+from datetime import timedelta
+
+import pytest
+
+
+FORMULA_USERNAMES = ['=HYPERLINK("http://x")', '+1+1', '-2+3', '@SUM(A1)', '\tcmd', '\rcmd']
+
+
+@pytest.fixture
+def formula_attempts(app):
+    """Failed login attempts whose username and user agent look like spreadsheet formulas."""
+    from models import LoginAttempt, db
+
+    with app.app_context():
+        attempts = [
+            LoginAttempt(username=username, method='otp', status='failed', user_agent='=cmd|/c calc')
+            for username in FORMULA_USERNAMES
+        ]
+        db.session.add_all(attempts)
+        db.session.commit()
+        ids = [attempt.id for attempt in attempts]
+    yield ids
+    with app.app_context():
+        LoginAttempt.query.filter(LoginAttempt.id.in_(ids)).delete()
+        db.session.commit()
+
+
+def export(login_client, query):
+    response = login_client('admin').get(f'/api/admin/export/login-logs?{query}')
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def test_csv_cells_starting_with_formula_characters_are_quoted(formula_attempts, login_client):
+    rows = list(csv.DictReader(io.StringIO(export(login_client, 'format=csv&status=failed'), newline='')))
+    exported = {int(row['id']): row for row in rows if int(row['id']) in formula_attempts}
+
+    assert sorted(row['username'] for row in exported.values()) == sorted("'" + name for name in FORMULA_USERNAMES)
+    assert all(row['user_agent'] == "'=cmd|/c calc" for row in exported.values())
+    # Non-text values are left alone
+    assert all(row['status'] == 'failed' and row['timestamp'][0].isdigit() for row in exported.values())
+
+
+def test_jsonl_values_are_not_changed(formula_attempts, login_client):
+    rows = [json.loads(line) for line in export(login_client, 'format=jsonl&status=failed').splitlines()]
+    exported = [row for row in rows if row['id'] in formula_attempts]
+
+    assert sorted(row['username'] for row in exported) == sorted(FORMULA_USERNAMES)
+
+
+def test_session_export_leaves_out_expired_sessions(app, login_client):
+    from auth import SESSION_TIMEOUT, get_utc_time
+    from models import ActiveSession, User, db
+
+    with app.app_context():
+        student = User.query.filter_by(username='student').one()
+        now = get_utc_time()
+        live = ActiveSession(user_id=student.id, session_id='export-live', last_activity=now)
+        expired = ActiveSession(
+            user_id=student.id, session_id='export-expired',
+            last_activity=now - SESSION_TIMEOUT - timedelta(minutes=1)
+        )
+        db.session.add_all([live, expired])
+        db.session.commit()
+        ids = {live.id: 'live', expired.id: 'expired'}
+
+    try:
+        response = login_client('admin').get('/api/admin/export/sessions?format=jsonl')
+        assert response.status_code == 200
+        exported = [ids[row['id']] for row in map(json.loads, response.get_data(as_text=True).splitlines())
+                    if row['id'] in ids]
+        assert exported == ['live']
+    finally:
+        with app.app_context():
+            ActiveSession.query.filter(ActiveSession.id.in_(ids)).delete()
+            db.session.commit()
@@ -0,0 +1,90 @@
+# ------------------------------------------------------------------------------------
+# tests/test_grade_queries.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes tests checking that the grade and
+# course pages run a constant number of SQL queries however many rows they show.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    queries.py - grade_query() and course_query() eager-loading helpers
+#    app.py - Grade listing routes
+#
+# ------------------------------------------------------------------------------------
+
+import itertools
+
+import pytest
+
+# Usernames and pages that list grades (or courses with their professor)
+GRADE_PAGES = [
+    ('admin', '/admin/grades'),
+    ('professor', '/professor/dashboard'),
+    ('professor', '/professor/give-grades'),
+    ('student', '/student/dashboard'),
+    ('student', '/student/grades'),
+]
+
+_batch = itertools.count()
+
+
+def add_grades(app, count):
+    """
+    Add grades that each reference a different student, course and professor,
+    so lazy loading would need new queries for every row.
+    """
+    from models import Course, Grade, User, db
+
+    batch = next(_batch)
+    with app.app_context():
+        student = User.query.filter_by(username='student').one()
+        professor = User.query.filter_by(username='professor').one()
+        own_course = Course.query.filter_by(professor_id=professor.id).first()
+        for i in range(count):
+            new_professor = User(username=f'prof{batch}x{i}', role='professor')
+            new_student = User(username=f'stud{batch}x{i}', role='student')
+            db.session.add_all([new_professor, new_student])
+            db.session.flush()
+            course = Course(code=f'T{batch}X{i}', name=f'Test course {i}', professor_id=new_professor.id)
+            db.session.add(course)
+            db.session.flush()
+            db.session.add_all([
+                # New student, course and professor (admin grades page)
+                Grade(student_id=new_student.id, course_id=course.id, grade_value='A',
+                      percentage=95.0, professor_id=new_professor.id),
+                # The sample student in a new course (student pages)
+                Grade(student_id=student.id, course_id=course.id, grade_value='B',
+                      percentage=85.0, professor_id=new_professor.id),
+                # A new student in the sample professor's course (professor pages)
+                Grade(student_id=new_student.id, course_id=own_course.id, grade_value='C',
+                      percentage=75.0, professor_id=professor.id),
+            ])
+        db.session.commit()
+
+
+@pytest.mark.parametrize('username,url', GRADE_PAGES)
+def test_grade_pages_run_constant_number_of_queries(app, login_client, count_queries, username, url):
+    client = login_client(username)
+    # Warm up caches (user snapshot, session tracking) so both measurements see the same state
+    assert client.get(url).status_code == 200
+
+    add_grades(app, 2)
+    few = count_queries(lambda: client.get(url))
+
+    add_grades(app, 10)
+    many = count_queries(lambda: client.get(url))
+
+    assert few == many, f"{url}: {few} queries with fewer rows, {many} with more"
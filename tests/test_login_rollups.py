@@ -0,0 +1,111 @@
+# ------------------------------------------------------------------------------------
+# tests/test_login_rollups.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes tests checking that the login rollup
+# backfill rebuilds hourly buckets the same way live counting fills them.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    login_rollups.py - LoginRollups.backfill
+#
+# ------------------------------------------------------------------------------------
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import login_rollups as login_rollups_module
+from login_rollups import hour_bucket, login_rollups
+
+
+USERNAME = 'rollup-test'
+START = datetime(2020, 3, 2, 9, 0)
+
+
+def bucket_counts(since, until):
+    from models import LoginRollup
+
+    rows = LoginRollup.query.filter(LoginRollup.bucket_start >= since, LoginRollup.bucket_start < until)
+    return {(row.bucket_start, row.method, row.status): row.attempts for row in rows}
+
+
+@pytest.fixture
+def rollup_app(app):
+    """App context whose test attempts and buckets are removed afterwards."""
+    from models import LoginAttempt, LoginRollup, db
+
+    with app.app_context():
+        yield app
+        db.session.rollback()
+        LoginAttempt.query.filter(LoginAttempt.username == USERNAME).delete()
+        LoginRollup.query.filter(LoginRollup.bucket_start < START + timedelta(hours=6)).delete()
+        db.session.commit()
+
+
+@pytest.mark.parametrize('sql_buckets', [True, False], ids=['insert-select', 'python'])
+def test_backfill_replaces_buckets_in_range(rollup_app, monkeypatch, sql_buckets):
+    from models import LoginAttempt, LoginRollup, db
+
+    if not sql_buckets:
+        monkeypatch.setattr(login_rollups_module, 'hour_bucket_sql', lambda column: None)
+    timestamps = [
+        (START + timedelta(hours=1, minutes=5), 'otp', 'failed'),
+        (START + timedelta(hours=1, minutes=59, seconds=59, microseconds=500000), 'otp', 'failed'),
+        (START + timedelta(hours=2, minutes=30), 'otp', 'failed'),
+        (START + timedelta(hours=2, minutes=40), 'email', 'success'),
+    ]
+    db.session.add_all(LoginAttempt(username=USERNAME, method=method, status=status, timestamp=timestamp)
+                       for timestamp, method, status in timestamps)
+    # A wrong count and a bucket without attempts, both replaced by the rebuild
+    db.session.add(LoginRollup(bucket_start=START + timedelta(hours=1), method='otp', status='failed', attempts=99))
+    db.session.add(LoginRollup(bucket_start=START + timedelta(hours=3), method='rfid', status='failed', attempts=5))
+    db.session.commit()
+
+    assert login_rollups.backfill(since=START, until=START + timedelta(hours=4)) == (4, 3)
+    assert bucket_counts(START, START + timedelta(hours=4)) == {
+        (START + timedelta(hours=1), 'otp', 'failed'): 2,
+        (START + timedelta(hours=2), 'otp', 'failed'): 1,
+        (START + timedelta(hours=2), 'email', 'success'): 1,
+    }
+
+    # Live counting adds to the rebuilt bucket rather than writing a second one
+    login_rollups.add([{'timestamp': START + timedelta(hours=2, minutes=50), 'method': 'otp', 'status': 'failed'}])
+    db.session.commit()
+    assert bucket_counts(START + timedelta(hours=2), START + timedelta(hours=3)) == {
+        (START + timedelta(hours=2), 'otp', 'failed'): 2,
+        (START + timedelta(hours=2), 'email', 'success'): 1,
+    }
+
+
+def test_backfill_keeps_previous_hour_by_default(rollup_app):
+    from auth import get_est_time
+    from models import LoginAttempt, LoginRollup, db
+
+    previous_hour = hour_bucket(get_est_time()) - timedelta(hours=1)
+    # backfill() returns early while login_attempt is empty
+    db.session.add(LoginAttempt(username=USERNAME, method='otp', status='failed', timestamp=START))
+    # Queued attempts for the previous hour may still be flushed into this bucket
+    db.session.add(LoginRollup(bucket_start=previous_hour, method='rfid', status='success', attempts=7))
+    db.session.commit()
+    try:
+        login_rollups.backfill(since=previous_hour - timedelta(hours=1))
+        assert bucket_counts(previous_hour, previous_hour + timedelta(hours=1)).get(
+            (previous_hour, 'rfid', 'success')
+        ) == 7
+    finally:
+        LoginRollup.query.filter(LoginRollup.bucket_start == previous_hour, LoginRollup.method == 'rfid').delete()
+        db.session.commit()
@@ -0,0 +1,94 @@
+# ------------------------------------------------------------------------------------
+# tests/test_maintenance.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes tests of the maintenance scheduler's
+# single-worker jobs and the lock file that picks their worker on SQLite.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    maintenance.py - MaintenanceScheduler
+#
+# ------------------------------------------------------------------------------------
+
+import time
+
+from maintenance import MaintenanceScheduler
+
+
+def run_scheduler(app, holds_lock):
+    """Run a scheduler with one ordinary and one single-worker job and return the run counts."""
+    scheduler = MaintenanceScheduler(app)
+    runs = {'every-worker': 0, 'single-worker': 0}
+    scheduler.add_job('every-worker', lambda: runs.__setitem__('every-worker', runs['every-worker'] + 1), 0.05)
+    scheduler.add_job(
+        'single-worker', lambda: runs.__setitem__('single-worker', runs['single-worker'] + 1), 0.05,
+        single_worker=True
+    )
+    # Another worker holds (False) or this worker holds (True) the lock
+    scheduler._holds_worker_lock = lambda: holds_lock
+    scheduler.start()
+    time.sleep(0.4)
+    scheduler.stop()
+    scheduler._thread.join()
+    return runs
+
+
+def test_single_worker_job_is_skipped_without_the_lock(app):
+    runs = run_scheduler(app, holds_lock=False)
+
+    assert runs['every-worker'] > 0
+    assert runs['single-worker'] == 0
+
+
+def test_single_worker_job_runs_in_the_lock_holder(app):
+    runs = run_scheduler(app, holds_lock=True)
+
+    assert runs['single-worker'] > 0
+
+
+def test_lock_file_picks_one_worker_on_sqlite(app, tmp_path):
+    # Two schedulers stand in for two gunicorn workers on the same host
+    first, second = MaintenanceScheduler(app), MaintenanceScheduler(app)
+    first._lock_path = second._lock_path = str(tmp_path / 'maintenance.lock')
+    with app.app_context():
+        assert first._holds_worker_lock()
+        assert not second._holds_worker_lock()
+        # Still held on the next run
+        assert first._holds_worker_lock()
+
+        # The lock holder exits - the other worker takes over
+        first.stop()
+        assert second._holds_worker_lock()
+        second.stop()
+
+
+def test_single_worker_job_runs_once_across_workers_on_sqlite(app, tmp_path):
+    lock_path = str(tmp_path / 'maintenance.lock')
+    schedulers = [MaintenanceScheduler(app) for _ in range(3)]
+    runs = []
+    for number, scheduler in enumerate(schedulers):
+        scheduler._lock_path = lock_path
+        scheduler.add_job('recount', lambda number=number: runs.append(number), 0.05, single_worker=True)
+    for scheduler in schedulers:
+        scheduler.start()
+    time.sleep(0.4)
+    for scheduler in schedulers:
+        scheduler.stop()
+        scheduler._thread.join()
+
+    assert runs
+    assert len(set(runs)) == 1
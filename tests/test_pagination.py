@@ -0,0 +1,84 @@
+# ------------------------------------------------------------------------------------
+# tests/test_pagination.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes tests of keyset pagination over rows
+# whose sort timestamp is NULL.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    queries.py - keyset_page, encode_cursor, decode_cursor
+#
+# ------------------------------------------------------------------------------------
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from queries import decode_cursor, encode_cursor, login_attempt_page
+
+
+USERNAME = 'pagination-test'
+
+
+@pytest.fixture
+def attempts(app):
+    """Five dated and three undated login attempts; returns their ids in page order."""
+    from models import LoginAttempt, db
+
+    with app.app_context():
+        start = datetime(2026, 1, 1, 12, 0)
+        # Two attempts share a timestamp, so the id tie-breaker is exercised too
+        timestamps = [start, start + timedelta(minutes=1), start + timedelta(minutes=1),
+                      start + timedelta(minutes=2), start + timedelta(minutes=3), None, None, None]
+        rows = [LoginAttempt(username=USERNAME, method='otp', status='failed', timestamp=timestamp)
+                for timestamp in timestamps]
+        db.session.add_all(rows)
+        db.session.commit()
+        # The column default fills in a None timestamp on insert - clear it afterwards
+        # (rows written by older code or outside the application)
+        LoginAttempt.query.filter(
+            LoginAttempt.id.in_([row.id for row in rows if row.timestamp > start + timedelta(minutes=3)])
+        ).update({'timestamp': None}, synchronize_session='fetch')
+        db.session.commit()
+        dated = sorted((row for row in rows if row.timestamp), key=lambda row: (row.timestamp, row.id), reverse=True)
+        undated = sorted((row for row in rows if row.timestamp is None), key=lambda row: row.id, reverse=True)
+        expected = [row.id for row in dated + undated]
+        yield expected
+        LoginAttempt.query.filter(LoginAttempt.username == USERNAME).delete()
+        db.session.commit()
+
+
+def test_null_timestamp_cursor_round_trip():
+    assert decode_cursor(encode_cursor(None, 42)) == (None, 42)
+    moment = datetime(2026, 1, 1, 12, 30)
+    assert decode_cursor(encode_cursor(moment, 7)) == (moment, 7)
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 5, 8, 10])
+def test_pages_cover_rows_without_timestamp_once(app, attempts, limit):
+    seen = []
+    cursor = None
+    with app.app_context():
+        for _ in range(len(attempts) + 1):
+            rows, cursor = login_attempt_page(cursor, limit, username=USERNAME)
+            seen += [row.id for row in rows]
+            if cursor is None:
+                break
+
+    # Every row exactly once, NULL timestamps last, and the last page ends the walk
+    assert cursor is None
+    assert seen == attempts
@@ -0,0 +1,140 @@
+# ------------------------------------------------------------------------------------
+# tests/test_rate_limiter.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes tests of the client IP used by the
+# per-IP rate limits behind reverse proxies, and of the counter backends.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    rate_limiter.py - RateLimiter.client_ip
+#    config.py - RATE_LIMIT_PROXY_COUNT default
+#
+# ------------------------------------------------------------------------------------
+
+import importlib
+
+import pytest
+
+import config
+from rate_limiter import MemoryRateLimitBackend, RateLimiter, SQLRateLimitBackend
+
+
+def client_ip(app, proxy_count, forwarded_for=None):
+    limiter = RateLimiter()
+    limiter.proxy_count = proxy_count
+    headers = {'X-Forwarded-For': forwarded_for} if forwarded_for else {}
+    with app.test_request_context(headers=headers, environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+        return limiter.client_ip()
+
+
+def test_client_address_from_the_trusted_proxy(app):
+    assert client_ip(app, 1, '203.0.113.7') == '203.0.113.7'
+    # A spoofed address added by the client itself is ignored
+    assert client_ip(app, 1, '198.51.100.1, 203.0.113.7') == '203.0.113.7'
+
+
+def test_forwarded_for_without_proxy_count_warns_once(app, capsys):
+    limiter = RateLimiter()
+    for _ in range(3):
+        with app.test_request_context(headers={'X-Forwarded-For': '203.0.113.7'},
+                                      environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+            assert limiter.client_ip() == '10.0.0.1'
+
+    assert capsys.readouterr().out.count('RATE_LIMIT_PROXY_COUNT is 0') == 1
+
+
+def test_no_warning_without_forwarded_for(app, capsys):
+    assert client_ip(app, 0) == '10.0.0.1'
+    assert 'RATE_LIMIT_PROXY_COUNT' not in capsys.readouterr().out
+
+
+def test_proxy_count_defaults_to_one_on_render(monkeypatch):
+    monkeypatch.delenv('RATE_LIMIT_PROXY_COUNT', raising=False)
+    try:
+        monkeypatch.delenv('RENDER', raising=False)
+        monkeypatch.delenv('RENDER_EXTERNAL_URL', raising=False)
+        assert importlib.reload(config).Config.RATE_LIMIT_PROXY_COUNT == 0
+
+        monkeypatch.setenv('RENDER', 'true')
+        assert importlib.reload(config).Config.RATE_LIMIT_PROXY_COUNT == 1
+
+        # An explicit setting wins
+        monkeypatch.setenv('RATE_LIMIT_PROXY_COUNT', '2')
+        assert importlib.reload(config).Config.RATE_LIMIT_PROXY_COUNT == 2
+    finally:
+        monkeypatch.undo()
+        importlib.reload(config)
+
+
+@pytest.fixture(params=['sql', 'memory'])
+def limiter(app, request):
+    """Rate limiter allowing 3 requests per username and 5 per IP, on each backend."""
+    from models import RateLimitCounter, db
+
+    limiter = RateLimiter()
+    limiter.backend = SQLRateLimitBackend() if request.param == 'sql' else MemoryRateLimitBackend()
+    limiter.rules = {'login': {'user': (3, 300), 'ip': (5, 300)}}
+    with app.app_context():
+        yield limiter
+        RateLimitCounter.query.filter(RateLimitCounter.key.like('login:%:limit-test%')).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def test_requests_over_the_limit_are_rejected_and_not_counted(limiter):
+    assert [limiter.check('login', 'limit-test', '192.0.2.1') for _ in range(3)] == [0, 0, 0]
+    assert limiter.check('login', 'limit-test', '192.0.2.1') > 0
+
+    # The rejected request took nothing from the IP's allowance: two more users fit
+    limiter._blocked.clear()
+    assert limiter.check('login', 'limit-test-2', '192.0.2.1') == 0
+    assert limiter.check('login', 'limit-test-3', '192.0.2.1') == 0
+    assert limiter.check('login', 'limit-test-4', '192.0.2.1') > 0
+
+
+@pytest.mark.parametrize('upsert', [True, False])
+def test_sql_backend_counts_both_windows(app, monkeypatch, upsert):
+    import rate_limiter
+    from models import RateLimitCounter, db
+
+    if not upsert:
+        # A database without INSERT ... ON CONFLICT
+        monkeypatch.setattr(rate_limiter, 'upsert_insert', lambda model: None)
+    backend = SQLRateLimitBackend()
+    hits = [('login:user:limit-test', 600, 300), ('login:ip:limit-test', 600, 300)]
+    with app.app_context():
+        try:
+            assert backend.hit(hits) == [(0, 1), (0, 1)]
+            assert backend.hit(hits) == [(0, 2), (0, 2)]
+            # The next window returns this one as its previous window
+            assert backend.hit([(key, 900, period) for key, _, period in hits]) == [(2, 1), (2, 1)]
+        finally:
+            RateLimitCounter.query.filter(RateLimitCounter.key.like('login:%:limit-test')).delete(synchronize_session=False)
+            db.session.commit()
+
+
+def test_sql_backend_counts_a_request_in_one_statement_per_key(app, count_queries):
+    from models import RateLimitCounter, db
+
+    backend = SQLRateLimitBackend()
+    hits = [('login:user:limit-test', 600, 300), ('login:ip:limit-test', 600, 300)]
+    with app.app_context():
+        try:
+            # One upsert per key and a single commit - no SELECT before it
+            assert count_queries(lambda: backend.hit(hits)) == 2
+        finally:
+            RateLimitCounter.query.filter(RateLimitCounter.key.like('login:%:limit-test')).delete(synchronize_session=False)
+            db.session.commit()
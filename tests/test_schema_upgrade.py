@@ -0,0 +1,90 @@
+# ------------------------------------------------------------------------------------
+# tests/test_schema_upgrade.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes tests checking that startup adds new
+# model columns to the tables of an existing database.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    schema_upgrade.py - upgrade_schema
+#    app.py - initialize_database
+#
+# ------------------------------------------------------------------------------------
+
+from sqlalchemy import inspect, text
+
+
+def column_names(table_name):
+    from models import db
+    return {info['name'] for info in inspect(db.engine).get_columns(table_name)}
+
+
+def test_startup_adds_missing_columns(app):
+    import app as app_module
+    from models import User, db
+
+    with app.app_context():
+        # A database created before the column existed
+        with db.engine.begin() as connection:
+            connection.execute(text('ALTER TABLE user DROP COLUMN otp_last_counter'))
+        assert 'otp_last_counter' not in column_names('user')
+
+    app_module.initialize_database()
+
+    with app.app_context():
+        assert 'otp_last_counter' in column_names('user')
+        # Every User query selects the column
+        assert User.query.filter_by(username='student').one().otp_last_counter is None
+
+
+def test_startup_adds_and_backfills_webauthn_columns(app):
+    import base64
+    import json
+
+    import app as app_module
+    from models import User, WebAuthnCredential, db
+
+    raw_id = b'\x01\x02credential-id'
+    cose_key = b'\xa5\x01\x02cose-key'
+    with app.app_context():
+        # A database created before the binary columns, with a credential registered back then
+        with db.engine.begin() as connection:
+            connection.execute(text('DROP INDEX ix_webauthn_credential_credential_id_raw'))
+            connection.execute(text('ALTER TABLE web_authn_credential DROP COLUMN credential_id_raw'))
+            connection.execute(text('ALTER TABLE web_authn_credential DROP COLUMN public_key_cose'))
+            connection.execute(text(
+                'INSERT INTO web_authn_credential (user_id, credential_id, public_key, counter) '
+                'VALUES (:user_id, :credential_id, :public_key, 0)'
+            ), {
+                'user_id': User.query.filter_by(username='student').one().id,
+                'credential_id': base64.urlsafe_b64encode(raw_id).decode().rstrip('='),
+                'public_key': json.dumps(base64.b64encode(cose_key).decode())
+            })
+
+    app_module.initialize_database()
+
+    with app.app_context():
+        assert {'credential_id_raw', 'public_key_cose'} <= column_names('web_authn_credential')
+        # Login finds the credential by its raw id
+        credential = WebAuthnCredential.query.filter_by(credential_id_raw=raw_id).one()
+        assert credential.public_key_cose == cose_key
+        db.session.delete(credential)
+        db.session.commit()
+        # migrate_db.py creates the index on existing databases - restore it for the other tests
+        index = next(index for index in WebAuthnCredential.__table__.indexes
+                     if index.name == 'ix_webauthn_credential_credential_id_raw')
+        index.create(db.engine)
@@ -0,0 +1,209 @@
+# ------------------------------------------------------------------------------------
+# tests/test_sendgrid.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes tests of the SendGrid transport against
+# a local mock HTTP server: keep-alive connection reuse, batched substitution
+# payloads and outbox retries with backoff on 429 and 5xx responses.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    email_service.py - SendGridClient and send_email_batch_via_sendgrid()
+#    email_outbox.py - Outbox workers that retry failed deliveries
+#
+# ------------------------------------------------------------------------------------
+
+import json
+import socket
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import email_service
+from email_service import SendGridClient
+
+
+class MockSendGridHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps the connection open between requests
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        with self.server.lock:
+            self.server.requests.append({
+                'path': self.path,
+                'authorization': self.headers.get('Authorization'),
+                'payload': json.loads(body)
+            })
+            status = self.server.statuses.pop(0) if self.server.statuses else 202
+            close = self.server.close_after_reply
+        response = b'' if status == 202 else json.dumps({'errors': [{'message': 'mock error'}]}).encode()
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(response)))
+        if close:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockSendGrid(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), MockSendGridHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = []
+        # Status codes for the next responses (202 once the list is empty)
+        self.statuses = []
+        self.close_after_reply = False
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+@pytest.fixture
+def sendgrid_server():
+    server = MockSendGrid()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sendgrid_client(sendgrid_server, monkeypatch):
+    """Route the shared SendGrid client and API key to the mock server."""
+    client = SendGridClient(base_url=sendgrid_server.url, timeout=5)
+    monkeypatch.setattr(email_service, 'sendgrid_client', client)
+    monkeypatch.setenv('EMAIL_SERVICE', 'sendgrid')
+    monkeypatch.setenv('SENDGRID_API_KEY', 'test-key')
+    yield client
+    client.close()
+
+
+def payload(address):
+    return {
+        'personalizations': [{'to': [{'email': address}], 'subject': 'Code'}],
+        'from': {'email': 'noreply@example.com'},
+        'content': [{'type': 'text/plain', 'value': '123456'}]
+    }
+
+
+def test_keep_alive_connection_is_reused(sendgrid_server, sendgrid_client):
+    for i in range(5):
+        assert sendgrid_client.send(payload(f'user{i}@example.com'), 'test-key') is True
+
+    assert len(sendgrid_server.requests) == 5
+    assert sendgrid_server.connections == 1
+    assert sendgrid_server.requests[0]['path'] == '/v3/mail/send'
+    assert sendgrid_server.requests[0]['authorization'] == 'Bearer test-key'
+
+
+def test_closed_connection_is_reopened(sendgrid_server, sendgrid_client):
+    sendgrid_server.close_after_reply = True
+    for i in range(3):
+        assert sendgrid_client.send(payload(f'user{i}@example.com'), 'test-key') is True
+
+    assert len(sendgrid_server.requests) == 3
+    assert sendgrid_server.connections == 3
+
+
+def test_error_status_raises(sendgrid_server, sendgrid_client):
+    sendgrid_server.statuses = [429]
+    with pytest.raises(Exception, match='429'):
+        sendgrid_client.send(payload('user@example.com'), 'test-key')
+    # The connection is still usable after an error response
+    assert sendgrid_client.send(payload('user@example.com'), 'test-key') is True
+    assert sendgrid_server.connections == 1
+
+
+def test_batch_uses_one_request_with_substitutions(sendgrid_server, sendgrid_client):
+    messages = [(f'user{i}@example.com', f'{i:06d}', f'user{i}') for i in range(3)]
+
+    assert email_service.send_email_batch_via_sendgrid(messages, 'test-key') is True
+
+    assert len(sendgrid_server.requests) == 1
+    sent = sendgrid_server.requests[0]['payload']
+    assert [p['to'][0]['email'] for p in sent['personalizations']] == [m[0] for m in messages]
+    assert [p['substitutions'] for p in sent['personalizations']] == [
+        {'-email-': address, '-code-': code} for address, code, username in messages
+    ]
+    # One shared body with substitution tags instead of per-recipient codes
+    for content in sent['content']:
+        assert '-code-' in content['value']
+        assert all(code not in content['value'] for _, code, _ in messages)
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.parametrize('failure', [429, 503])
+def test_outbox_retries_with_backoff_after_429_and_5xx(app, sendgrid_server, sendgrid_client, monkeypatch, failure):
+    from auth import get_utc_time
+    from email_outbox import email_outbox
+    from models import EmailOutbox, db
+
+    # The SMTP fallback is unreachable too, so a rejected send is a failed delivery
+    monkeypatch.setenv('SMTP_SERVER', '127.0.0.1')
+    monkeypatch.setenv('SMTP_PORT', str(closed_port()))
+    monkeypatch.setenv('SMTP_USERNAME', 'user@example.com')
+    monkeypatch.setenv('SMTP_PASSWORD', 'secret')
+
+    with app.app_context():
+        messages = [email_outbox.enqueue(f'retry{i}@example.com', f'{i:06d}', f'retry{i}') for i in range(2)]
+        db.session.commit()
+        ids = [message.id for message in messages]
+
+        # The batch and both individual retries are rejected
+        sendgrid_server.statuses = [failure] * 3
+        before = get_utc_time()
+        assert email_outbox._process_next() is True
+        db.session.expire_all()
+        rows = EmailOutbox.query.filter(EmailOutbox.id.in_(ids)).all()
+        assert len(sendgrid_server.requests) == 3
+        for row in rows:
+            assert row.status == 'pending'
+            assert row.attempts == 1
+            assert row.next_attempt_at >= before + timedelta(seconds=email_outbox.backoff_base)
+
+        # Not due yet - nothing is sent
+        assert email_outbox._process_next() is False
+
+        # Once the backoff has passed the batch is sent in one request
+        for row in rows:
+            row.next_attempt_at = get_utc_time() - timedelta(seconds=1)
+        db.session.commit()
+        assert email_outbox._process_next() is True
+        db.session.expire_all()
+        rows = EmailOutbox.query.filter(EmailOutbox.id.in_(ids)).all()
+        assert len(sendgrid_server.requests) == 4
+        assert all(row.status == 'sent' and row.attempts == 2 for row in rows)
@@ -0,0 +1,52 @@
+# ------------------------------------------------------------------------------------
+# tests/test_session_activity.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes tests of the bounded set of session
+# ids the activity buffer knows to exist.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    session_activity.py - SessionActivityBuffer
+#
+# ------------------------------------------------------------------------------------
+
+from session_activity import SessionActivityBuffer
+
+
+def test_known_sessions_are_bounded():
+    buffer = SessionActivityBuffer()
+    buffer.known_sessions_size = 3
+    for number in range(10):
+        buffer.mark_known(f'session-{number}')
+
+    assert len(buffer._known_sessions) == 3
+    assert not buffer.is_known('session-0')
+    assert all(buffer.is_known(f'session-{number}') for number in (7, 8, 9))
+
+
+def test_least_recently_used_session_is_evicted():
+    buffer = SessionActivityBuffer()
+    buffer.known_sessions_size = 2
+    buffer.mark_known('first')
+    buffer.mark_known('second')
+    # A request for the first session makes the second the least recently used
+    assert buffer.is_known('first')
+    buffer.mark_known('third')
+
+    assert buffer.is_known('first')
+    assert not buffer.is_known('second')
+    assert buffer.is_known('third')
@@ -0,0 +1,277 @@
+# ------------------------------------------------------------------------------------
+# tests/test_smtp_pool.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes tests of the pooled SMTP connections
+# against a local SMTP stand-in server (STARTTLS and AUTH PLAIN on localhost).
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    email_service.py - SMTPConnectionPool
+#
+# ------------------------------------------------------------------------------------
+
+import datetime
+import os
+import socketserver
+import ssl
+import tempfile
+import threading
+import time
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from email_service import SMTPConnectionPool
+
+
+def make_tls_context():
+    """Server TLS context with a throwaway self-signed certificate for localhost."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'localhost')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    directory = tempfile.mkdtemp(prefix='campuskey-smtp-')
+    cert_path = os.path.join(directory, 'cert.pem')
+    key_path = os.path.join(directory, 'key.pem')
+    with open(cert_path, 'wb') as cert_file:
+        cert_file.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, 'wb') as key_file:
+        key_file.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ))
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    return context
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal ESMTP dialogue: EHLO, STARTTLS, AUTH PLAIN, MAIL, RCPT, DATA, RSET, NOOP, QUIT."""
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+            server.open_sockets.add(self.request)
+        try:
+            self.dialogue()
+        except (OSError, ValueError):
+            pass
+        finally:
+            with server.lock:
+                server.open_sockets.discard(self.request)
+            self.request.close()
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+        self.wfile.flush()
+
+    def dialogue(self):
+        server = self.server
+        tls = False
+        self.reply('220 localhost ESMTP test server')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                extensions = ['AUTH PLAIN'] if tls else ['STARTTLS', 'AUTH PLAIN']
+                for extension in ['localhost'] + extensions[:-1]:
+                    self.reply(f'250-{extension}')
+                self.reply(f'250 {extensions[-1]}')
+            elif verb == 'STARTTLS':
+                self.reply('220 Ready to start TLS')
+                plain = self.request
+                self.request = server.tls_context.wrap_socket(plain, server_side=True)
+                with server.lock:
+                    server.open_sockets.discard(plain)
+                    server.open_sockets.add(self.request)
+                self.rfile = self.request.makefile('rb')
+                self.wfile = self.request.makefile('wb')
+                tls = True
+            elif verb == 'AUTH':
+                with server.lock:
+                    server.logins += 1
+                self.reply('235 Authentication successful')
+            elif verb in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                with server.lock:
+                    server.messages += 1
+                if server.stall_after_data:
+                    # Message accepted but the reply never comes (client times out)
+                    server.release.wait(10)
+                    return
+                self.reply('250 OK: queued')
+            elif verb == 'QUIT':
+                with server.lock:
+                    server.quits += 1
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.tls_context = make_tls_context()
+        self.lock = threading.Lock()
+        self.open_sockets = set()
+        self.connections = 0
+        self.logins = 0
+        self.messages = 0
+        self.quits = 0
+        self.stall_after_data = False
+        self.release = threading.Event()
+
+    def drop_connections(self):
+        """Close every client connection without a reply, like a server restart."""
+        with self.lock:
+            sockets = list(self.open_sockets)
+        for sock in sockets:
+            try:
+                sock.shutdown(2)
+            except OSError:
+                pass
+            sock.close()
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                if condition():
+                    return True
+            time.sleep(0.01)
+        return False
+
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool():
+    pool = SMTPConnectionPool(max_size=2, idle_timeout=60, max_messages=100, timeout=5)
+    yield pool
+    pool.close_all()
+
+
+def settings_for(server):
+    return ('127.0.0.1', server.server_address[1], 'user@example.com', 'secret')
+
+
+def send(pool, server, recipient='student@example.com'):
+    message = f"From: noreply@example.com\r\nTo: {recipient}\r\nSubject: Code\r\n\r\n123456\r\n"
+    return pool.send(settings_for(server), 'noreply@example.com', [recipient], message)
+
+
+def test_one_connection_serves_several_sends(smtp_server, pool):
+    for _ in range(5):
+        assert send(pool, smtp_server) == {}
+
+    assert smtp_server.messages == 5
+    assert smtp_server.connections == 1
+    assert smtp_server.logins == 1
+
+
+def test_dropped_connection_is_replaced(smtp_server, pool):
+    assert send(pool, smtp_server) == {}
+    smtp_server.drop_connections()
+
+    # The pooled connection is dead - the message is sent again over a new one
+    assert send(pool, smtp_server) == {}
+    assert send(pool, smtp_server) == {}
+
+    assert smtp_server.messages == 3
+    assert smtp_server.connections == 2
+    assert smtp_server.logins == 2
+
+
+def test_timeout_after_data_is_not_sent_again(smtp_server):
+    pool = SMTPConnectionPool(max_size=2, idle_timeout=60, max_messages=100, timeout=1)
+    try:
+        assert send(pool, smtp_server) == {}
+        smtp_server.stall_after_data = True
+
+        # The server may already have accepted the message - a retry would deliver it twice
+        with pytest.raises(OSError):
+            send(pool, smtp_server)
+        assert smtp_server.messages == 2
+        assert smtp_server.connections == 1
+    finally:
+        pool.close_all()
+
+
+def test_close_all_quits_idle_connections(smtp_server, pool):
+    assert send(pool, smtp_server) == {}
+    pool.close_all()
+
+    assert smtp_server.wait_for(lambda: smtp_server.quits == 1 and not smtp_server.open_sockets)
+    # The next send opens a fresh connection
+    assert send(pool, smtp_server) == {}
+    assert smtp_server.connections == 2
+
+
+def test_concurrent_senders_share_the_pool(smtp_server, pool):
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(10):
+                send(pool, smtp_server)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert smtp_server.messages == 40
+    # Never more connections than senders, and at most max_size are kept open afterwards
+    assert smtp_server.connections <= 4
+    assert smtp_server.wait_for(lambda: len(smtp_server.open_sockets) <= pool.max_size)
@@ -0,0 +1,92 @@
+# ------------------------------------------------------------------------------------
+# tests/test_totp.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes tests of TOTP replay protection: a
+# code is only remembered as used once the login that used it commits.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    totp_service.py - TOTPService
+#    models.py - User.otp_last_counter
+#
+# ------------------------------------------------------------------------------------
+
+import time
+
+import pyotp
+import pytest
+
+
+@pytest.fixture
+def student(app):
+    """The sample student with a fresh secret and no used code, inside an app context."""
+    from models import User, db
+    from totp_service import totp_service
+
+    with app.app_context():
+        user = User.query.filter_by(username='student').one()
+        user.otp_secret = pyotp.random_base32()
+        user.otp_last_counter = None
+        db.session.commit()
+        # Forget codes remembered by earlier tests for the same user
+        totp_service._used_codes.clear()
+        yield user
+
+
+def test_code_is_rejected_after_the_login_commits(student):
+    from models import db
+    from totp_service import totp_service
+
+    code = pyotp.TOTP(student.otp_secret).now()
+    assert totp_service.verify(student, code)
+    db.session.commit()
+
+    rejected = totp_service.replays_rejected
+    assert not totp_service.verify(student, code)
+    # Rejected from memory, before the database update
+    assert totp_service.replays_rejected == rejected + 1
+    assert (student.id, student.otp_last_counter) in totp_service._used_codes
+
+
+def test_rolled_back_login_does_not_block_the_code(student):
+    from models import db
+    from totp_service import totp_service
+
+    code = pyotp.TOTP(student.otp_secret).now()
+    assert totp_service.verify(student, code)
+    # The login failed after the code was checked (e.g. the commit raised)
+    db.session.rollback()
+
+    assert not any(key[0] == student.id for key in totp_service._used_codes)
+    assert totp_service.verify(student, code)
+    db.session.commit()
+    assert not totp_service.verify(student, code)
+
+
+def test_failed_claim_is_not_remembered(student):
+    from models import db
+    from totp_service import totp_service
+
+    totp = pyotp.TOTP(student.otp_secret)
+    code = totp.now()
+    # Another worker already accepted a later code
+    student.otp_last_counter = int(time.time()) // totp.interval + 1
+    db.session.commit()
+
+    assert not totp_service.verify(student, code)
+    db.session.commit()
+    assert not any(key[0] == student.id for key in totp_service._used_codes)
@@ -0,0 +1,190 @@
+# ------------------------------------------------------------------------------------
+# totp_service.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for verifying TOTP codes
+# from authenticator apps with cached TOTP instances, configurable clock drift
+# and protection against replaying a code that was already used.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    models.py - User.verify_otp() delegates to this service
+#    app.py - Initializes the service
+#    config.py - Drift window and cache size settings
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statements: Standard library modules used by the service
+# hmac: Constant-time comparison of OTP codes
+# threading: Lock for the shared caches
+# time: Current time for the TOTP counter
+import hmac
+import threading
+import time
+
+# Python import statement: Imports OrderedDict for the bounded caches
+from collections import OrderedDict
+
+# Python import statement: Imports pyotp for generating TOTP codes
+import pyotp
+
+# Python import statement: Imports or_ for the conditional counter update
+# event: Session hooks that remember a used code only once the login commits
+from sqlalchemy import event, or_
+
+# Python import statement: Imports the Session class the commit hooks are attached to
+from sqlalchemy.orm import Session
+
+# Python import statement: Imports the User model and db instance
+from models import User, db
+
+
+class TOTPService:
+    """
+    Verifies TOTP codes and rejects codes that were already accepted.
+
+    pyotp.TOTP objects are cached per secret (LRU, TOTP_CACHE_SIZE entries).
+    Codes from TOTP_VALID_WINDOW time steps before or after the current one are
+    accepted to allow for clock drift. Each accepted (user, time step) pair is
+    remembered, once the login that used it commits, in a bounded in-memory set
+    until that step can no longer validate, so a replay in the same worker is
+    rejected without touching the database. Across workers, replays are stopped by User.otp_last_counter:
+    a code is only accepted if its time step is newer than the last accepted
+    one (RFC 6238 section 5.2).
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        # otp_secret -> pyotp.TOTP
+        self._totp_cache = OrderedDict()
+        # (user_id, counter) -> counter, in the order codes were accepted
+        self._used_codes = OrderedDict()
+        self.valid_window = 0
+        self.cache_size = 1024
+        self.replays_rejected = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configure the service for a Flask application.
+
+        Args:
+            app: Flask application instance
+        """
+        self.valid_window = app.config.get('TOTP_VALID_WINDOW', 0)
+        self.cache_size = app.config.get('TOTP_CACHE_SIZE', 1024)
+        app.extensions['totp_service'] = self
+
+    def verify(self, user, token):
+        """
+        Verify a TOTP code for a user and mark it as used.
+
+        The used counter is written to the user's row in the current database
+        session; it is committed together with the rest of the login. The code
+        is added to the in-memory replay set only after that commit, so a
+        failed or rolled back login does not block the code in this worker.
+
+        Args:
+            user: User model instance
+            token: Code entered by the user
+
+        Returns:
+            True if the code is valid and was not used before, False otherwise
+        """
+        if not user or not user.otp_secret:
+            return False
+        totp = self._get_totp(user.otp_secret)
+        token = str(token or '').strip()
+        # Reject malformed input before computing any HMAC
+        if len(token) != totp.digits or not token.isdigit():
+            return False
+
+        current_counter = int(time.time()) // totp.interval
+        counter = None
+        for offset in range(-self.valid_window, self.valid_window + 1):
+            if hmac.compare_digest(totp.generate_otp(current_counter + offset), token):
+                counter = current_counter + offset
+                break
+        if counter is None:
+            return False
+
+        key = (user.id, counter)
+        with self._lock:
+            self._purge_used_codes(current_counter - self.valid_window)
+            if key in self._used_codes:
+                self.replays_rejected += 1
+                return False
+
+        # Conditional UPDATE - only succeeds if no worker accepted this or a later code
+        # (concurrent requests in this worker are also stopped here: the row update serializes them)
+        claimed = User.query.filter(
+            User.id == user.id,
+            or_(User.otp_last_counter.is_(None), User.otp_last_counter < counter)
+        ).update({'otp_last_counter': counter}, synchronize_session=False)
+        if not claimed:
+            with self._lock:
+                self.replays_rejected += 1
+            return False
+        # Remembered by _remember_committed_codes when the session commits
+        db.session.info.setdefault('totp_pending_codes', []).append((self, key))
+        return True
+
+    def _get_totp(self, secret):
+        with self._lock:
+            totp = self._totp_cache.get(secret)
+            if totp is not None:
+                self._totp_cache.move_to_end(secret)
+                return totp
+        totp = pyotp.TOTP(secret)
+        with self._lock:
+            self._totp_cache[secret] = totp
+            while len(self._totp_cache) > self.cache_size:
+                self._totp_cache.popitem(last=False)
+        return totp
+
+    def _remember(self, key):
+        with self._lock:
+            self._used_codes[key] = key[1]
+            while len(self._used_codes) > self.cache_size:
+                self._used_codes.popitem(last=False)
+
+    def _purge_used_codes(self, oldest_valid_counter):
+        # Entries are in acceptance order, so expired time steps are at the front
+        while self._used_codes:
+            key, counter = next(iter(self._used_codes.items()))
+            if counter >= oldest_valid_counter and len(self._used_codes) <= self.cache_size:
+                break
+            del self._used_codes[key]
+
+
+@event.listens_for(Session, 'after_commit')
+def _remember_committed_codes(session):
+    # The login committed otp_last_counter - reject these codes in memory from now on
+    for service, key in session.info.pop('totp_pending_codes', ()):
+        service._remember(key)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _forget_uncommitted_codes(session, transaction):
+    # The outermost transaction ended without a commit (rollback or close) - the DB
+    # never recorded the codes, so they are not remembered either
+    if transaction.parent is None:
+        session.info.pop('totp_pending_codes', None)
+
+
+# Shared TOTP service instance, initialized with the app in app.py
+totp_service = TOTPService()
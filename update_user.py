@@ -42,6 +42,12 @@ from app import app
 # db is the SQLAlchemy database instance for database operations
 from models import User, db
 
+# Python import statement: Imports the user cache so running workers drop the old user data
+from user_cache import user_cache
+
+# Python import statement: Imports the admin dashboard totals so the user count stays current
+from site_stats import site_stats
+
 # Python comment: Marks the user information configuration section
 # User information
 # Python variable: Stores the email address for the user account
@@ -75,6 +81,8 @@ with app.app_context():
         # Database operation: Adds new user object to database session
         # db.session.add() stages the object for insertion (not yet committed)
         db.session.add(user)
+        # Database operation: Updates the admin dashboard user total in the same transaction
+        site_stats.increment('total_users')
         # Python print statement: Outputs success message with checkmark emoji
         # f-string formatting inserts username variable into the message
         print(f"✓ Created new user: {username}")
@@ -93,6 +101,9 @@ with app.app_context():
     # This is when the database is actually modified
     db.session.commit()
     
+    # Python method call: Tells running app workers to reload this user on their next request
+    user_cache.invalidate(user.id)
+    
     # Python print statement: Outputs blank line for spacing
     print(f"\nUser Details:")
     # Python print statement: Displays username from user object
@@ -0,0 +1,202 @@
+# ------------------------------------------------------------------------------------
+# user_cache.py
+#
+# Copyright (c) 2025 CampusKey. All rights reserved
+# Description:
+# This Python code is part of a software application developed for CampusKey
+# University Access System. It includes functionality for caching lightweight
+# user snapshots in each worker process so Flask-Login does not query the
+# database for the logged-in user on every request.
+#
+# Related Documents:
+#    Specification Document
+#    Design Document
+#
+# Disclaimer:
+# This code is provided as-is, without any warranty or support. Use it at your
+# own risk. The author and CampusKey shall not be liable for any damages or
+# issues arising from the use of this code.
+#
+# File created on 10/17/2026
+#
+# Associated files:
+# ------------------
+#    app.py - load_user and the admin user management routes
+#    update_user.py - Command line script that updates users
+#    models.py - User model
+#    config.py - Cache size and TTL settings
+#
+# ------------------------------------------------------------------------------------
+
+# Python import statements: Standard library modules used by the cache
+# os: Invalidation stamp file shared by all worker processes
+# threading: Lock for thread-safe access
+# time: Monotonic clock for entry expiry
+import os
+import threading
+import time
+
+# Python import statement: Imports OrderedDict to keep entries in least recently used order
+from collections import OrderedDict
+
+# Python import statement: Imports UserMixin so snapshots work as Flask-Login users
+from flask_login import UserMixin
+
+# Python import statement: Imports the User model
+from models import User
+
+
+class UserSnapshot(UserMixin):
+    """
+    Read-only copy of the User fields needed on every request.
+
+    Returned by load_user as current_user. It is not attached to a database
+    session, so views that need other User columns or relationships must
+    load the User model themselves.
+    """
+
+    def __init__(self, id, username, role, email):
+        self.id = id
+        self.username = username
+        self.role = role
+        self.email = email
+
+    def __repr__(self):
+        return f'<UserSnapshot {self.username}>'
+
+
+class UserCache:
+    """
+    Per-worker LRU cache of UserSnapshot objects with a time-to-live.
+
+    Entries expire after USER_CACHE_TTL seconds, and the least recently used
+    entry is evicted when USER_CACHE_SIZE is reached. invalidate() also touches
+    a stamp file in the instance folder. Every worker process checks the file's
+    modification time before each lookup and clears its whole cache when it
+    changed. This way a change made in one worker, or by update_user.py, is
+    seen by all workers on the same host.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        # user_id -> (UserSnapshot, expires_at)
+        self._entries = OrderedDict()
+        self._stamp_path = None
+        self._stamp_mtime = None
+        self.max_size = 1024
+        self.ttl = 60
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configure the cache for a Flask application.
+
+        Args:
+            app: Flask application instance
+        """
+        self.max_size = app.config.get('USER_CACHE_SIZE', 1024)
+        self.ttl = app.config.get('USER_CACHE_TTL', 60)
+        self._stamp_path = app.config.get('USER_CACHE_STAMP_FILE') or os.path.join(app.instance_path, 'user_cache.stamp')
+        self._stamp_mtime = self._read_stamp()
+        app.extensions['user_cache'] = self
+
+    def get(self, user_id):
+        """
+        Get a user snapshot, loading it from the database on a miss.
+
+        Args:
+            user_id: User ID (integer)
+
+        Returns:
+            UserSnapshot, or None if the user does not exist
+        """
+        self._check_stamp()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        row = User.query.with_entities(User.id, User.username, User.role, User.email).filter_by(id=user_id).first()
+        if row is None:
+            return None
+        snapshot = UserSnapshot(row.id, row.username, row.role, row.email)
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[user_id] = (snapshot, now + self.ttl)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return snapshot
+
+    def invalidate(self, user_id=None):
+        """
+        Remove a user from the cache in every worker process.
+
+        Args:
+            user_id: User ID to remove, or None to clear the whole cache
+        """
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+        self._touch_stamp()
+
+    def stats(self):
+        """
+        Get the cache counters for this worker process.
+
+        Returns:
+            Dictionary with hits, misses, evictions, size, max_size, ttl and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
+
+    def _check_stamp(self):
+        mtime = self._read_stamp()
+        if mtime != self._stamp_mtime:
+            # Another process changed a user - drop everything cached in this worker
+            with self._lock:
+                self._entries.clear()
+                self._stamp_mtime = mtime
+
+    def _read_stamp(self):
+        if self._stamp_path is None:
+            return None
+        try:
+            return os.stat(self._stamp_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _touch_stamp(self):
+        if self._stamp_path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self._stamp_path), exist_ok=True)
+            with open(self._stamp_path, 'a'):
+                pass
+            os.utime(self._stamp_path)
+        except OSError as e:
+            print(f"Error updating user cache stamp: {e}")
+
+
+# Shared cache instance, initialized with the app in app.py
+user_cache = UserCache()